@@ -1,34 +1,75 @@
 import os
+import argparse
 import getpass
+import time
 from dotenv import load_dotenv
-from llama_index.core import VectorStoreIndex, SimpleDirectoryReader, Settings
-from llama_index.embeddings.openai import OpenAIEmbedding
-from llama_index.llms.mistralai import MistralAI
 
-# Change working directory
-os.chdir("C:/Users/HP/Desktop/AI Project/LlamaIndex")
-print("Is 'data' a directory?:", os.path.isdir("data"))
-print("Current working directory:", os.getcwd())
-print("Contents of directory:", os.listdir())
+# data/ and storage/ live next to this script, wherever it is run from
+HERE = os.path.dirname(os.path.abspath(__file__))
 
 load_dotenv()
 
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Answer questions over the data/ directory")
+    parser.add_argument("-q", "--query", action="append", default=[], help="question to answer (repeatable)")
+    parser.add_argument("--queries-file", help="file with one question per line")
+    parser.add_argument("--data-dir", default=os.path.join(HERE, "data"))
+    parser.add_argument("--persist-dir", default=os.path.join(HERE, "storage"))
+    return parser.parse_args()
+
+
 if __name__ == '__main__':
+    args = parse_args()
+    print("Is 'data' a directory?:", os.path.isdir(args.data_dir), f"({args.data_dir})")
     if not os.environ.get("MISTRAL_API_KEY"):
         print("Mistral API key missing")
         os.environ["MISTRAL_API_KEY"] = getpass.getpass("Enter API key for Mistral AI: ")
 
+    # llama_index takes seconds to import, so it is only loaded once the arguments are valid
+    from llama_index.core import Settings
+    from llama_index.embeddings.openai import OpenAIEmbedding
+    from llama_index.llms.mistralai import MistralAI
+    from utils.llama_index_embedding_cache import CachedLlamaIndexEmbedding
+    from utils.llama_index_store import load_index
+    from utils.response_cache import ResponseCache
+    from utils.tracing import tracer
 
-    documents = SimpleDirectoryReader("data").load_data()
-    if not documents:
+    Settings.embed_model = CachedLlamaIndexEmbedding(OpenAIEmbedding(), cache_dir=os.path.join(HERE, "embedding_cache"))
+    Settings.llm = MistralAI(model="mistral-small-latest")
+
+    # Load the persisted index and re-embed only added/changed/deleted files
+    start = time.perf_counter()
+    with tracer.span("index") as span:
+        index, report = load_index(args.data_dir, args.persist_dir)
+        span.add("items", len(report.added) + len(report.changed))
+    print(f"Index ready in {time.perf_counter() - start:.2f}s: {len(report.added)} added, "
+          f"{len(report.changed)} changed, {len(report.deleted)} deleted, {report.unchanged} unchanged files")
+
+    if not index.docstore.docs:
         print("No documents were loaded. Check your 'data' directory.")
     else:
-        print(f"Loaded {len(documents)} documents")
+        queries = list(args.query)
+        if args.queries_file:
+            with open(args.queries_file, encoding="utf-8") as f:
+                queries.extend(line.strip() for line in f if line.strip())
+        if not queries:
+            queries = ["What is Nike's annual revenue for 2023?"]
 
-        Settings.embed_model = OpenAIEmbedding()
-        Settings.llm = MistralAI(model="mistral-small-latest")
-        index = VectorStoreIndex.from_documents(documents)
+        # Answers are reused until a file under data/ changes
+        response_cache = ResponseCache(path=os.path.join(args.persist_dir, "response_cache.pkl"))
+        if report.modified:
+            response_cache.invalidate("data")
         query_engine = index.as_query_engine()
-
-        response = query_engine.query("What is Nike's annual revenue for 2023?")
-        print(response)
+        # RAG_TRACE_SPANS / RAG_TRACE_METRICS: retrieval + synthesis per uncached query, cache hits per answer
+        tracer.instrument(query_engine, "query", "query_engine",
+                          items=lambda response, *args, **kwargs: len(response.source_nodes))
+        answer = tracer.wrap(response_cache.cached, "answer",
+                             hits=lambda: response_cache.stats.exact_hits + response_cache.stats.semantic_hits)
+        for query in queries:
+            response = answer(
+                "mistral-small-latest", query, lambda: str(query_engine.query(query)), tags=("data",)
+            )
+            print(f"\nQ: {query}\nA: {response}")
+        print("Embedding cache:", Settings.embed_model.cache.stats())
+        print("Response cache:", response_cache.report())
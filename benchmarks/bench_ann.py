@@ -0,0 +1,68 @@
+import argparse
+import tempfile
+import time
+from typing import Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+
+from utils.ann_index import IVFVectorStore
+from utils.fakes import FakeEmbeddings
+
+
+def clustered_vectors(count: int, dim: int, clusters: int = 256, spread: float = 0.6, seed: int = 0) -> np.ndarray:
+    """Synthetic embeddings: real text embeddings are clustered by topic, not uniformly random."""
+    rng = np.random.default_rng(seed)
+    centres = rng.standard_normal((clusters, dim), dtype=np.float32)
+    labels = rng.integers(0, clusters, count)
+    return centres[labels] + spread * rng.standard_normal((count, dim), dtype=np.float32)
+
+
+def run_queries(store: IVFVectorStore, queries: np.ndarray, k: int, **search) -> Tuple:
+    latencies, results = [], []
+    for query in queries:
+        start = time.perf_counter()
+        hits = store.search_vectors([query], k, **search)[0]
+        latencies.append((time.perf_counter() - start) * 1000)
+        results.append({doc.id for doc, _ in hits})
+    return results, np.percentile(latencies, 50), np.percentile(latencies, 99)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="IVF recall@k and latency vs exact search")
+    parser.add_argument("--size", type=int, default=200_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--n-lists", type=int, default=None)
+    parser.add_argument("--n-probe", type=int, nargs="+", default=[1, 4, 8, 16, 32, 64])
+    args = parser.parse_args()
+
+    vectors = clustered_vectors(args.size + args.queries, args.dim)
+    data, queries = vectors[:args.size], vectors[args.size:]
+    store = IVFVectorStore(FakeEmbeddings(size=args.dim), n_lists=args.n_lists)
+    store.add_embeddings([Document(page_content="") for _ in range(args.size)], data,
+                         ids=[str(i) for i in range(args.size)])
+
+    start = time.perf_counter()
+    store.build_index()
+    print(f"{args.size} vectors, dim {args.dim}: index built in {time.perf_counter() - start:.2f}s "
+          f"({len(store._centroids)} lists)")
+
+    with tempfile.TemporaryDirectory() as directory:
+        store.save(directory)
+        start = time.perf_counter()
+        store = IVFVectorStore.load(directory, store.embedding)
+        print(f"loaded from disk in {time.perf_counter() - start:.2f}s (no rebuild)\n")
+
+        truth, p50, p99 = run_queries(store, queries, args.k, exact=True)
+        print(f"{'search':<14} {'recall@' + str(args.k):>10} {'p50 ms':>8} {'p99 ms':>8}")
+        print(f"{'exact':<14} {1.0:>10.3f} {p50:>8.2f} {p99:>8.2f}")
+        for n_probe in args.n_probe:
+            found, p50, p99 = run_queries(store, queries, args.k, n_probe=n_probe)
+            recall = np.mean([len(f & t) / len(t) for f, t in zip(found, truth)])
+            print(f"{'ivf n_probe=' + str(n_probe):<14} {recall:>10.3f} {p50:>8.2f} {p99:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
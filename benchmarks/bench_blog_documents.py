@@ -0,0 +1,94 @@
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from bson.json_util import dumps
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from utils.blog_documents import BlogDocumentBuilder, where_matches
+from utils.blog_sync import plan_chunks
+from utils.fakes import FakeEmbeddings
+from utils.numpy_vector_store import NumpyVectorStore
+from utils.tokens import estimate_tokens
+
+WORDS = ("vector search index python mongo deploy cache latency model prompt agent chunk "
+         "embedding stream query token graph server docker testing design").split()
+TAGS = ("python", "mongodb", "llm", "devops", "rag", "frontend", "testing", "career")
+AUTHORS = ("Jane Doe", "Sam Lee", "Ana Silva", "Omar Khan", "Li Wei")
+
+
+def fake_blogs(count: int, words: int, seed: int = 0):
+    rng = random.Random(seed)
+    start = datetime(2023, 1, 1)
+    for i in range(count):
+        created = start + timedelta(hours=rng.randrange(20_000))
+        yield {
+            "_id": ObjectId(),
+            "title": f"Post {i}: " + " ".join(rng.choices(WORDS, k=6)),
+            "content": " ".join(rng.choices(WORDS, k=words)),
+            "author": {"name": rng.choice(AUTHORS), "email": f"user{i % 50}@example.com"},
+            "tags": rng.sample(TAGS, 3),
+            "createdAt": created,
+            "updatedAt": created + timedelta(days=rng.randrange(30)),
+            "views": rng.randrange(10_000),
+        }
+
+
+def build_store(chunks, embeddings):
+    store = NumpyVectorStore(embeddings)
+    start = time.perf_counter()
+    store.add_documents(list(chunks.values()), ids=list(chunks))
+    return store, time.perf_counter() - start
+
+
+def query_ms(search, queries) -> float:
+    start = time.perf_counter()
+    for query in queries:
+        search(query)
+    return (time.perf_counter() - start) / len(queries) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Blog chunks: bson dumps(indent=2) vs BlogDocumentBuilder")
+    parser.add_argument("--blogs", type=int, default=2000)
+    parser.add_argument("--words", type=int, default=300, help="words of body text per blog")
+    parser.add_argument("--queries", type=int, default=50)
+    args = parser.parse_args()
+
+    blogs = list(fake_blogs(args.blogs, args.words))
+    splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=100)
+    builder = BlogDocumentBuilder()
+    queries = [" ".join(random.Random(i).choices(WORDS, k=4)) for i in range(args.queries)]
+    filtered = [builder.parse_query(f"tag:{TAGS[i % len(TAGS)]} since:2024-06-01 {query}")
+                for i, query in enumerate(queries)]
+
+    rows = []
+    for name, kwargs in (("dumps(indent=2)", {"to_text": lambda blog: dumps(blog, indent=2)}),
+                         ("BlogDocumentBuilder", {"to_document": builder})):
+        chunks = plan_chunks(blogs, splitter, **kwargs)
+        tokens = sum(estimate_tokens(chunk.page_content) for chunk in chunks.values())
+        embeddings = FakeEmbeddings()
+        store, build = build_store(chunks, embeddings)
+        plain = query_ms(lambda q: store.similarity_search(q, k=4), queries)
+        rows.append((name, len(chunks), tokens, build, plain))
+        if "to_document" in kwargs:
+            narrowed = query_ms(
+                lambda qw: store.similarity_search(qw[0], k=4, filter=lambda doc: where_matches(qw[1], doc.metadata)),
+                filtered)
+            sample = store.similarity_search(filtered[0][0], k=4,
+                                             filter=lambda doc: where_matches(filtered[0][1], doc.metadata))
+
+    print(f"{'serialiser':<20} {'chunks':>7} {'embed tokens':>13} {'index s':>8} {'query ms':>9}")
+    for name, chunks, tokens, build, plain in rows:
+        print(f"{name:<20} {chunks:>7} {tokens:>13,} {build:>8.2f} {plain:>9.2f}")
+    before, after = rows
+    print(f"\nchunks -{1 - after[1] / before[1]:.0%}, embedding tokens -{1 - after[2] / before[2]:.0%}")
+    # Here the where filter is a Python predicate per chunk; Chroma evaluates it in its metadata index
+    print(f"filtered query (tag + since, Python predicate) {narrowed:.2f} ms, {len(sample)} hits, "
+          f"where={filtered[0][1]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+import argparse
+import asyncio
+import json
+import time
+
+import numpy as np
+
+from utils.chat_server import ChatServer, MessagesBackend
+from utils.fakes import FakeStreamingModel
+
+
+async def chat_once(port: int, session_id, message: str):
+    """One POST /chat; returns (time to first token, total time, session id, tokens)."""
+    start = time.perf_counter()
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    body = json.dumps({"message": message, "session_id": session_id}).encode()
+    writer.write(b"POST /chat HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+                 + f"Content-Length: {len(body)}\r\n\r\n".encode() + body)
+    await writer.drain()
+    status = await reader.readline()
+    if b" 200 " not in status:
+        writer.close()
+        return None
+    first_token, tokens, event = None, 0, None
+    while line := await reader.readline():
+        line = line.decode().strip()
+        if line.startswith("event:"):
+            event = line[6:].strip()
+        elif line.startswith("data:"):
+            data = json.loads(line[5:])
+            if event == "done":
+                session_id = data["session_id"]
+            elif "token" in data:
+                tokens += 1
+                if first_token is None:
+                    first_token = time.perf_counter() - start
+    writer.close()
+    return first_token, time.perf_counter() - start, session_id, tokens
+
+
+async def client(port: int, turns: int, results: list, rejected: list):
+    session_id = None
+    for turn in range(turns):
+        result = await chat_once(port, session_id, f"question {turn}")
+        if result is None:
+            rejected.append(1)
+            continue
+        results.append(result)
+        session_id = result[2]
+
+
+async def main(args):
+    model = FakeStreamingModel(tokens=args.tokens, first_token_latency=args.first_token_latency,
+                               token_latency=args.token_latency)
+    server = ChatServer(MessagesBackend(model), max_concurrent=args.max_concurrent, max_waiting=args.sessions)
+    listener = await server.start(port=0)
+    port = listener.sockets[0].getsockname()[1]
+
+    results, rejected = [], []
+    start = time.perf_counter()
+    await asyncio.gather(*(client(port, args.turns, results, rejected) for _ in range(args.sessions)))
+    elapsed = time.perf_counter() - start
+    listener.close()
+
+    ttft = np.array([r[0] for r in results]) * 1000
+    total = np.array([r[1] for r in results]) * 1000
+    print(f"{args.sessions} sessions x {args.turns} turns, max {args.max_concurrent} concurrent LLM streams")
+    print(f"  {len(results)} replies in {elapsed:.2f}s: {args.sessions / elapsed:.1f} sessions/sec, "
+          f"{len(results) / elapsed:.1f} replies/sec, {len(rejected)} rejected")
+    print(f"  time to first token p50 {np.percentile(ttft, 50):.0f} ms  p99 {np.percentile(ttft, 99):.0f} ms")
+    print(f"  full reply          p50 {np.percentile(total, 50):.0f} ms  p99 {np.percentile(total, 99):.0f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test for the chat server with a fake streaming model")
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--turns", type=int, default=3)
+    parser.add_argument("--max-concurrent", type=int, default=64)
+    parser.add_argument("--tokens", type=int, default=50)
+    parser.add_argument("--first-token-latency", type=float, default=0.2)
+    parser.add_argument("--token-latency", type=float, default=0.005)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,70 @@
+import argparse
+import os
+import resource
+import tempfile
+import time
+
+import numpy as np
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.graph import MessagesState, StateGraph
+
+from utils.sqlite_checkpointer import SqliteCheckpointer
+
+
+def fake_model(state: MessagesState):
+    return {"messages": [AIMessage(content="reply " * 40)]}
+
+
+def build_graph(checkpointer):
+    workflow = StateGraph(state_schema=MessagesState)
+    workflow.add_node("model", fake_model)
+    workflow.set_entry_point("model")
+    return workflow.compile(checkpointer=checkpointer)
+
+
+def peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run(name: str, checkpointer, threads: int, turns: int):
+    graph = build_graph(checkpointer)
+    rss_before = peak_rss_mb()
+    writes, reads = [], []
+    for turn in range(turns):
+        for i in range(threads):
+            config = {"configurable": {"thread_id": f"session-{i}"}}
+            start = time.perf_counter()
+            graph.invoke({"messages": [HumanMessage(content=f"turn {turn} " * 20)]}, config)
+            writes.append(time.perf_counter() - start)
+    if hasattr(checkpointer, "flush"):
+        checkpointer.flush()
+    for i in range(0, threads, max(1, threads // 1000)):
+        start = time.perf_counter()
+        graph.get_state({"configurable": {"thread_id": f"session-{i}"}})
+        reads.append(time.perf_counter() - start)
+
+    writes, reads = np.array(writes) * 1000, np.array(reads) * 1000
+    print(f"{name:<8} turn p50 {np.percentile(writes, 50):6.2f} ms  p99 {np.percentile(writes, 99):6.2f} ms | "
+          f"read p50 {np.percentile(reads, 50):6.2f} ms  p99 {np.percentile(reads, 99):6.2f} ms | "
+          f"peak RSS +{peak_rss_mb() - rss_before:,.0f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Checkpoint latency and memory with many active threads")
+    parser.add_argument("--threads", type=int, default=10_000)
+    parser.add_argument("--turns", type=int, default=2)
+    parser.add_argument("--batch-size", type=int, default=256)
+    args = parser.parse_args()
+
+    # SQLite first: peak RSS only grows, so the in-memory saver's number includes its own growth only
+    with tempfile.TemporaryDirectory() as directory:
+        checkpointer = SqliteCheckpointer(os.path.join(directory, "bench.sqlite"), batch_size=args.batch_size)
+        run("sqlite", checkpointer, args.threads, args.turns)
+        checkpointer.close()
+        print(f"         database size {os.path.getsize(os.path.join(directory, 'bench.sqlite')) / 2**20:,.1f} MB")
+    run("memory", MemorySaver(), args.threads, args.turns)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+import argparse
+import os
+import re
+import subprocess
+import sys
+import time
+
+ENTRY_POINTS = [
+    "langchain_learning.AI_agent_with_langchain",
+    "langchain_learning.chatbot_with_memory_usig_langchain",
+    "langchain_learning.extraction",
+    "langchain_learning.langchain_with_rag_part1",
+    "langchain_learning.profiles_chatbot_with_langchain",
+    "langchain_learning.prompt_template",
+    "langchain_learning.semantic_search",
+    "langchain_learning.semantic_search_using_chroma_db",
+    "langchain_learning.simple_chat_with_langchain",
+    "llms.chatbot_with_mistral",
+    "llms.profile_chatbot",
+    "utils.chat_server",
+]
+LLAMA_INDEX = os.path.join("LlamaIndex", "LlamaIndex.py")
+_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)")
+_STOP = "cold-start stopped at: "
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Placeholder keys so scripts get past their "key missing" checks; no request leaves the machine
+DUMMY_ENV = {"MISTRAL_API_KEY": "cold-start", "OPENAI_API_KEY": "cold-start", "AGENT_OFFLINE": "1"}
+
+# Prepended to the script in the child. The clock stops (the process exits) at the first
+# input()/getpass(), the first outbound connection from the main thread (the user would
+# be waiting on the LLM or Mongo from here on) or the first listening socket (a server is
+# up). Connections from background threads (prefetching) fail at once instead, and
+# pymongo's MongoClient is replaced by mongomock's, so nothing waits on a real server.
+_HARNESS = """
+import builtins, getpass, importlib.abc, importlib.util, os, runpy, socket, sys, threading
+
+def _stop(reason):
+    sys.stdout.flush()
+    sys.stderr.write(%(stop)r + reason + "\\n")
+    sys.stderr.flush()
+    os._exit(0)
+
+builtins.input = lambda prompt="": _stop("input()")
+getpass.getpass = lambda prompt="", stream=None: _stop("getpass()")
+_getaddrinfo, _connect, _listen = socket.getaddrinfo, socket.socket.connect, socket.socket.listen
+
+def _offline(error):
+    if threading.current_thread() is threading.main_thread():
+        _stop("network")
+    raise error("cold-start benchmark: no network")
+
+def _is_local(host):
+    if host in (None, "localhost", b"localhost"):
+        return True
+    for family in (socket.AF_INET, socket.AF_INET6):
+        try:
+            socket.inet_pton(family, host if isinstance(host, str) else host.decode())
+            return True
+        except OSError:
+            pass
+    return False
+
+def _guarded_getaddrinfo(host, *args, **kwargs):
+    # A DNS lookup is network too (and can hang for seconds offline)
+    if not _is_local(host):
+        _offline(socket.gaierror)
+    return _getaddrinfo(host, *args, **kwargs)
+
+def _guarded_connect(sock, address):
+    if sock.family in (socket.AF_INET, socket.AF_INET6):
+        _offline(ConnectionRefusedError)
+    return _connect(sock, address)
+
+def _guarded_listen(sock, *args):
+    if threading.current_thread() is threading.main_thread():
+        _stop("listen")
+    return _listen(sock, *args)
+
+socket.getaddrinfo = _guarded_getaddrinfo
+socket.socket.connect, socket.socket.listen = _guarded_connect, _guarded_listen
+
+class _MongoStub(importlib.abc.MetaPathFinder):
+    def find_spec(self, name, path, target=None):
+        if name != "pymongo":
+            return None
+        sys.meta_path.remove(self)
+        spec = importlib.util.find_spec(name)
+        exec_module = spec.loader.exec_module
+
+        def exec_and_stub(module):
+            exec_module(module)
+            import mongomock
+            module.MongoClient = mongomock.MongoClient
+
+        spec.loader.exec_module = exec_and_stub
+        return spec
+
+sys.meta_path.insert(0, _MongoStub())
+sys.argv = [%(name)r]
+"""
+
+
+def cold_start(name: str, run: str):
+    """
+    Wall seconds until the script stops (see `_HARNESS`), why it stopped, the heaviest
+    packages {root package: cumulative seconds} and the error line (if any). Packages
+    come from `python -X importtime` at the top two nesting levels, so the entry
+    point's own dependencies show up by name.
+    """
+    env = dict(os.environ, PYTHONPATH=ROOT + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    env.update({key: value for key, value in DUMMY_ENV.items() if key not in os.environ})
+    code = _HARNESS % {"stop": _STOP, "name": name} + run
+    start = time.perf_counter()
+    try:
+        result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=ROOT, env=env,
+                                capture_output=True, text=True, timeout=120)
+    except subprocess.TimeoutExpired:
+        return time.perf_counter() - start, "timeout", {}, ""
+    wall = time.perf_counter() - start
+    packages = {}
+    other = []
+    stopped = "exit"
+    for line in result.stderr.splitlines():
+        match = _LINE.match(line)
+        if line.startswith(_STOP):
+            stopped = line[len(_STOP):]
+        elif not match:
+            other.append(line)
+        elif len(match.group(3)) <= 2:
+            root = match.group(4).split(".")[0]
+            packages[root] = max(packages.get(root, 0.0), int(match.group(2)) / 1e6)
+    error = other[-1].strip() if result.returncode and other else ""
+    return wall, stopped, packages, error
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time from start until each entry point waits on the user "
+                                                 "(first input()), with network clients stubbed out")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per entry point, the fastest is kept")
+    parser.add_argument("--top", type=int, default=3, help="heaviest top-level imports to list")
+    args = parser.parse_args()
+
+    baseline = min(cold_start("baseline", "pass")[0] for _ in range(args.repeat))
+    print(f"bare interpreter start: {baseline * 1000:.0f} ms (subtracted below)\n")
+    print(f"{'entry point':<54} {'startup ms':>10}  {'stopped at':<10}  heaviest imports")
+    targets = [(module, f"runpy.run_module({module!r}, run_name='__main__', alter_sys=True)")
+               for module in ENTRY_POINTS]
+    # LlamaIndex.py is a script in a plain directory, so it is run by path
+    targets.append((LLAMA_INDEX, f"runpy.run_path({LLAMA_INDEX!r}, run_name='__main__')"))
+    for name, run in targets:
+        wall, stopped, packages, error = min((cold_start(name, run) for _ in range(args.repeat)),
+                                             key=lambda result: result[0])
+        own = name.split(".")[0]
+        ranked = sorted(((seconds, package) for package, seconds in packages.items()
+                         if package not in (own, "site", "encodings")), reverse=True)
+        heaviest = ", ".join(f"{package} {seconds * 1000:.0f}ms" for seconds, package in ranked[:args.top])
+        note = f"  [{error[:60]}]" if error else ""
+        print(f"{name:<54} {(wall - baseline) * 1000:>10.0f}  {stopped:<10}  {heaviest}{note}")
+
+
+if __name__ == "__main__":
+    main()
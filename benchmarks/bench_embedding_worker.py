@@ -0,0 +1,90 @@
+import argparse
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+from utils.embedding_worker import WorkerEmbeddings, WorkerUnavailable, run_worker
+from utils.fakes import FakeEmbeddings
+
+
+def start_worker(path: str, model: str, max_batch: int, max_wait_ms: float, latency: float, text_latency: float):
+    if model:
+        from langchain_huggingface import HuggingFaceEmbeddings
+        embeddings = HuggingFaceEmbeddings(model_name=model, model_kwargs={"device": "cpu"})
+    else:
+        embeddings = FakeEmbeddings(latency=latency, text_latency=text_latency)
+    run_worker(embeddings, path, max_batch, max_wait_ms)
+
+
+def wait_for(client: WorkerEmbeddings, timeout: float = 120.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            return client.model
+        except (WorkerUnavailable, FileNotFoundError):
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.05)
+
+
+def run_clients(client: WorkerEmbeddings, clients: int, queries: int):
+    """`clients` threads, each embedding `queries` single texts one after another."""
+    latencies = [[] for _ in range(clients)]
+
+    def work(index: int):
+        for i in range(queries):
+            start = time.perf_counter()
+            client.embed_query(f"client {index} query {i} about quarterly revenue")
+            latencies[index].append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=work, args=(i,)) for i in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start, np.concatenate(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Embedding worker: throughput and latency per batch window")
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--queries", type=int, default=50, help="embed_query calls per client")
+    parser.add_argument("--windows", default="0,1,2,5,10,20", help="max_wait_ms values to compare")
+    parser.add_argument("--max-batch", type=int, default=64)
+    parser.add_argument("--model", default="", help="real sentence-transformers model (default: fake CPU cost)")
+    parser.add_argument("--latency", type=float, default=0.004, help="fake forward pass overhead, seconds")
+    parser.add_argument("--text-latency", type=float, default=0.0003, help="fake cost per text, seconds")
+    args = parser.parse_args()
+
+    configs = [("unbatched", 1, 0.0)] + [(f"{w} ms window", args.max_batch, float(w)) for w in args.windows.split(",")]
+    print(f"{args.clients} concurrent clients x {args.queries} queries, "
+          f"{'model ' + args.model if args.model else 'fake model'} on CPU\n")
+    print(f"{'config':<14} {'texts/s':>8} {'p50 ms':>7} {'p99 ms':>7} {'batches':>8} {'mean batch':>10}")
+    for name, max_batch, max_wait_ms in configs:
+        path = os.path.join(tempfile.mkdtemp(), "embed.sock")
+        worker = multiprocessing.Process(target=start_worker, daemon=True, args=(
+            path, args.model, max_batch, max_wait_ms, args.latency, args.text_latency))
+        worker.start()
+        client = WorkerEmbeddings(path)
+        try:
+            load_start = time.perf_counter()
+            wait_for(client)
+            load = time.perf_counter() - load_start
+            client.embed_query("warm up")
+            wall, latencies = run_clients(client, args.clients, args.queries)
+            stats = client.stats()
+        finally:
+            worker.terminate()
+            worker.join()
+        print(f"{name:<14} {latencies.size / wall:>8.0f} {np.percentile(latencies, 50) * 1000:>7.1f} "
+              f"{np.percentile(latencies, 99) * 1000:>7.1f} {stats['batches']:>8} {stats['mean_batch']:>10.1f}")
+    print(f"\nworker start-up (model load) {load:.2f}s is paid once, not per script run")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+
+from langchain_learning.extraction import Person, build_prompt, extract_bulk, read_snippets
+from utils.fakes import FakeStructuredModel
+
+
+def write_snippets(path: str, count: int):
+    names = ["Alan", "Grace", "Ada", "Linus", "Margaret", "Dennis"]
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(count):
+            text = f"{names[i % len(names)]} is {150 + i % 50} cm tall and has brown hair (record {i})."
+            f.write(json.dumps({"id": str(i), "text": text}) + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk extraction throughput vs one request at a time")
+    parser.add_argument("--records", type=int, default=2000)
+    parser.add_argument("--latency", type=float, default=0.1, help="seconds per fake LLM call")
+    parser.add_argument("--sequential", type=int, default=30, help="records timed on the one-at-a-time path")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[8, 32, 128])
+    args = parser.parse_args()
+
+    model = FakeStructuredModel(latency=args.latency)
+    structured_llm = model.with_structured_output(Person)
+
+    with tempfile.TemporaryDirectory() as directory:
+        input_path = os.path.join(directory, "snippets.jsonl")
+        write_snippets(input_path, args.records)
+
+        start = time.perf_counter()
+        for _, (_, text) in zip(range(args.sequential), read_snippets(input_path)):
+            structured_llm.invoke(build_prompt().invoke({"input": text}))
+        sequential = args.sequential / (time.perf_counter() - start)
+        print(f"one at a time: {sequential:8.1f} records/sec")
+
+        for concurrency in args.concurrency:
+            output_path = os.path.join(directory, f"people-{concurrency}.jsonl")
+            report = asyncio.run(extract_bulk(input_path, output_path, structured_llm, concurrency=concurrency))
+            print(f"bulk x{concurrency:<4}    {report['records_per_sec']:8.1f} records/sec "
+                  f"({report['records_per_sec'] / sequential:.0f}x), {report['failed']} failed")
+
+        # A rerun over the same output resumes and has nothing left to do
+        report = asyncio.run(extract_bulk(input_path, output_path, structured_llm))
+        print(f"resume: {report['skipped']} already done, {report['extracted']} extracted")
+
+
+if __name__ == "__main__":
+    main()
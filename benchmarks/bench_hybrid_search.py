@@ -0,0 +1,78 @@
+import argparse
+import random
+import time
+
+from langchain_core.documents import Document
+
+from utils.fakes import BagOfWordsEmbeddings
+from utils.hybrid_search import HybridSearch
+from utils.numpy_vector_store import NumpyVectorStore
+
+FILLER = ("the company reported strong growth across its global markets while investing in new "
+          "products brand marketing digital channels supply chain retail partners and sustainability "
+          "programs during the fiscal year with revenue margins and outlook discussed by management").split()
+METRICS = ("annual revenue", "net income", "employee count", "store count", "marketing spend")
+SYLLABLES = ("zor", "vex", "tal", "mira", "qu", "bex", "lon", "dri", "kas", "pel", "nu", "tor")
+
+
+def company_names(count: int, rng: random.Random):
+    names = set()
+    while len(names) < count:
+        names.add("".join(rng.choices(SYLLABLES, k=3)).capitalize())
+    return sorted(names)
+
+
+def corpus(companies: int, years: range, filler: int, seed: int = 0):
+    """Fact chunks buried in shared filler, with hard negatives for the same company/other years."""
+    rng = random.Random(seed)
+    documents, questions = [], []
+    for company in company_names(companies, rng):
+        for metric in METRICS:
+            for year in years:
+                doc_id = f"{company}-{metric}-{year}"
+                words = rng.choices(FILLER, k=filler)
+                words.insert(rng.randrange(filler), f"{company}'s {metric} for {year} was {rng.randrange(1, 900)}.{rng.randrange(10)}")
+                documents.append(Document(id=doc_id, page_content=" ".join(words)))
+                questions.append((f"What is {company}'s {metric} for {year}?", doc_id))
+    return documents, questions
+
+
+def evaluate(search, questions, k: int):
+    hits, start = 0, time.perf_counter()
+    for question, expected in questions:
+        hits += expected in [doc.id for doc in search(question, k)]
+    return hits / len(questions), (time.perf_counter() - start) / len(questions) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vector vs hybrid BM25+vector retrieval: recall@k and latency")
+    parser.add_argument("--companies", type=int, default=400)
+    parser.add_argument("--years", type=int, default=10)
+    parser.add_argument("--filler", type=int, default=60, help="filler words per chunk")
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--k", type=int, default=4)
+    args = parser.parse_args()
+
+    documents, questions = corpus(args.companies, range(2024 - args.years, 2024), args.filler)
+    questions = random.Random(1).sample(questions, min(args.queries, len(questions)))
+    embeddings = BagOfWordsEmbeddings(size=384)
+    hybrid = HybridSearch(NumpyVectorStore(embeddings))
+    start = time.perf_counter()
+    hybrid.add_documents(documents, ids=[doc.id for doc in documents])
+    print(f"indexed {len(documents)} chunks in {time.perf_counter() - start:.1f}s "
+          f"(BM25 terms: {len(hybrid.index._rows)})\n")
+
+    runs = {
+        "vector only": lambda q, k: hybrid.vector_store.similarity_search(q, k=k),
+        "BM25 only": lambda q, k: hybrid.vector_store.get_by_ids([i for i, _ in hybrid.index.search(q, k)]),
+        "hybrid RRF": lambda q, k: hybrid.search(q, k),
+        "hybrid shortlist": lambda q, k: hybrid.search(q, k, shortlist_only=True),
+    }
+    print(f"{'retriever':<18} {f'recall@{args.k}':>9} {'ms/query':>9}")
+    for name, search in runs.items():
+        recall, latency = evaluate(search, questions, args.k)
+        print(f"{name:<18} {recall:>9.3f} {latency:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+import argparse
+
+from langchain_core.documents import Document
+from langchain_core.vectorstores import InMemoryVectorStore
+
+from utils.fakes import FakeEmbeddings
+from utils.ingestion_pipeline import ingest
+
+
+def fake_chunks(count: int):
+    for i in range(count):
+        yield Document(page_content=f"chunk {i} " + "lorem ipsum dolor sit amet " * 30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingestion throughput with a fake embedder that adds latency")
+    parser.add_argument("--chunks", type=int, default=5000)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds per embedding call")
+    parser.add_argument("--rate-limit-every", type=int, default=0)
+    args = parser.parse_args()
+
+    for workers in (1, 2, 4, 8, 16):
+        embeddings = FakeEmbeddings(latency=args.latency, rate_limit_every=args.rate_limit_every)
+        store = InMemoryVectorStore(embeddings)
+        report = ingest(store, fake_chunks(args.chunks), batch_size=args.batch_size,
+                        max_workers=workers, backoff=0.01)
+        print(f"workers={workers:<3} chunks={report.chunks} batches={report.batches} "
+              f"retries={report.retries} {report.chunks_per_sec:,.0f} chunks/sec")
+
+
+if __name__ == "__main__":
+    main()
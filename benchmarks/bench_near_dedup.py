@@ -0,0 +1,52 @@
+import argparse
+import random
+import time
+
+from langchain_core.documents import Document
+
+from utils.near_dedup import NearDuplicateFilter
+from utils.pdf_pipeline import peak_rss_mb
+
+BOILERPLATE = [
+    "Subscribe to our newsletter to get the latest posts delivered to your inbox. We respect your privacy "
+    "and you can unsubscribe at any time. Follow us on social media for updates, tutorials and more. " * 4,
+    "Copyright 2024 Example Blog. All rights reserved. Terms of service. Privacy policy. Cookie settings. "
+    "Contact us. About the authors. Advertise with us. Careers. Sitemap. Accessibility statement. " * 4,
+]
+
+
+def chunks(count: int, duplicate_rate: float, seed: int = 0):
+    """Unique chunks mixed with boilerplate copies that differ in a word or two (dates, counters)."""
+    rng = random.Random(seed)
+    vocab = [f"w{i}" for i in range(20_000)]
+    for i in range(count):
+        if rng.random() < duplicate_rate:
+            text = rng.choice(BOILERPLATE).replace("2024", str(rng.randrange(2015, 2026)), 1)
+        else:
+            text = " ".join(rng.choices(vocab, k=160))
+        yield Document(page_content=text, metadata={"source": f"page-{i // 10}.html"})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MinHash/LSH near-duplicate filter: savings and scaling")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 300_000])
+    parser.add_argument("--duplicate-rate", type=float, default=0.3)
+    parser.add_argument("--dim", type=int, default=1024, help="embedding size used for the storage estimate")
+    args = parser.parse_args()
+
+    print(f"{'chunks':>9} {'kept':>9} {'dropped':>9} {'embed calls saved':>18} {'MiB saved':>10} "
+          f"{'seconds':>8} {'chunks/sec':>11} {'peak MB':>8}")
+    for size in args.sizes:
+        dedupe = NearDuplicateFilter()
+        start = time.perf_counter()
+        for _ in dedupe.filter(chunks(size, args.duplicate_rate)):
+            pass
+        seconds = time.perf_counter() - start
+        stats = dedupe.stats
+        print(f"{stats.chunks:>9} {stats.kept:>9} {stats.dropped:>9} {stats.embedding_calls_saved:>18} "
+              f"{stats.bytes_saved(args.dim) / 2**20:>10.1f} {seconds:>8.1f} {stats.chunks / seconds:>11,.0f} "
+              f"{peak_rss_mb():>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+import argparse
+import os
+import tempfile
+import time
+
+from langchain_core.vectorstores import InMemoryVectorStore
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from utils.fakes import FakeEmbeddings
+from utils.ingestion_pipeline import ingest
+from utils.pdf_pipeline import PdfChunkStream, peak_rss_mb
+
+
+def write_pdf(path: str, pages: int, lines_per_page: int = 40):
+    """Plain multi-page PDF with Helvetica text, written by hand so no PDF library is needed."""
+    offsets, objects = [], []
+
+    def add(body: bytes) -> int:
+        objects.append(body)
+        return len(objects)
+
+    font = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    pages_id = len(objects) + 1 + 2 * pages
+    kids = []
+    for page in range(pages):
+        lines = [f"Page {page + 1} line {line}: Nike operates in many countries and reports revenue yearly."
+                 for line in range(lines_per_page)]
+        text = " T* ".join(f"({line}) Tj" for line in lines)
+        stream = f"BT /F1 10 Tf 12 TL 40 800 Td {text} ET".encode()
+        content = add(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        kids.append(add(b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 595 842] /Contents %d 0 R "
+                        b"/Resources << /Font << /F1 %d 0 R >> >> >>" % (pages_id, content, font)))
+    add(b"<< /Type /Pages /Kids [" + b" ".join(b"%d 0 R" % kid for kid in kids) + b"] /Count %d >>" % pages)
+    catalog = add(b"<< /Type /Catalog /Pages %d 0 R >>" % pages_id)
+
+    with open(path, "wb") as f:
+        f.write(b"%PDF-1.4\n")
+        for number, body in enumerate(objects, 1):
+            offsets.append(f.tell())
+            f.write(b"%d 0 obj\n" % number + body + b"\nendobj\n")
+        xref = f.tell()
+        f.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+        f.writelines(b"%010d 00000 n \n" % offset for offset in offsets)
+        f.write(b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, catalog, xref))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Streaming PDF ingestion: pages/sec and peak RSS")
+    parser.add_argument("--pages", type=int, default=5000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "generated.pdf")
+        write_pdf(path, args.pages)
+        print(f"generated {args.pages} pages ({os.path.getsize(path) / 2 ** 20:.1f} MB)")
+
+        for workers in args.workers:
+            splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200, add_start_index=True)
+            stream = PdfChunkStream(path, splitter, workers=workers)
+            store = InMemoryVectorStore(FakeEmbeddings(size=64))
+            start = time.perf_counter()
+            report = ingest(store, stream, batch_size=128)
+            elapsed = time.perf_counter() - start
+            print(f"workers={workers}: {stream.stats.pages} pages -> {report.chunks} chunks in {elapsed:.1f}s, "
+                  f"{stream.stats.pages / elapsed:.0f} pages/sec, peak RSS {peak_rss_mb():.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+import argparse
+import os
+import tempfile
+import time
+from multiprocessing import get_context
+
+import numpy as np
+from langchain_core.documents import Document
+
+from benchmarks.bench_ann import clustered_vectors
+from utils.fakes import FakeEmbeddings
+from utils.numpy_vector_store import NumpyVectorStore, normalise, top_k
+from utils.quantized_store import QuantizedVectorStore
+
+STORES = ("in_memory", "float32", "float16", "int8")
+# Bytes a query streams through per stored value: Python float objects plus list pointers, float32,
+# or the codes (the rescored rows add k * rescore full rows on top)
+BYTES_PER_VALUE = {"in_memory": 32, "float32": 4, "float16": 2, "int8": 1}
+
+
+def memory_mb() -> dict:
+    """Private (anonymous) and file-backed resident memory, and PSS, which splits shared pages among their users."""
+    usage = {}
+    with open("/proc/self/status", encoding="utf-8") as f:
+        for line in f:
+            if line.startswith(("RssAnon:", "RssFile:")):
+                usage[line.split(":")[0]] = int(line.split()[1]) / 1024
+    with open("/proc/self/smaps_rollup", encoding="utf-8") as f:
+        for line in f:
+            if line.startswith("Pss:"):
+                usage["Pss"] = int(line.split()[1]) / 1024
+    return usage
+
+
+def open_store(kind: str, directory: str, dim: int):
+    embeddings = FakeEmbeddings(size=dim)
+    if kind == "in_memory":
+        from langchain_core.vectorstores import InMemoryVectorStore
+
+        from benchmarks.bench_vector_store import fill_in_memory
+
+        store = InMemoryVectorStore(embeddings)
+        fill_in_memory(store, np.load(os.path.join(directory, "vectors.npy")))
+        return lambda query, k: [doc.id for doc, _ in store.similarity_search_with_score_by_vector(query.tolist(), k)]
+    if kind == "float32":
+        store = NumpyVectorStore.load(directory, embeddings)
+    else:
+        store = QuantizedVectorStore.load(os.path.join(directory, kind), embeddings)
+    return lambda query, k: [doc.id for doc, _ in store.search_vectors([query], k)[0]]
+
+
+def measure(kind: str, directory: str, dim: int, queries: np.ndarray, truth: np.ndarray, k: int, barrier, results):
+    """One process holding one store: load time, query latency, recall@k and memory while all siblings are loaded."""
+    before = memory_mb()
+    start = time.perf_counter()
+    search = open_store(kind, directory, dim)
+    loaded = time.perf_counter() - start
+    latencies, recalls = [], []
+    for query, expected in zip(queries, truth):
+        start = time.perf_counter()
+        found = search(query, k)
+        latencies.append(time.perf_counter() - start)
+        recalls.append(len(set(found) & {str(i) for i in expected}) / k)
+    barrier.wait()
+    after = memory_mb()
+    barrier.wait()
+    results.put({"store": kind, "load_s": loaded, "p50_ms": float(np.percentile(latencies, 50)) * 1000,
+                 "recall": float(np.mean(recalls)), **{key: after[key] - before[key] for key in after}})
+
+
+def run(kind: str, directory: str, dim: int, queries, truth, k: int, processes: int) -> dict:
+    context = get_context("spawn")
+    barrier, results = context.Barrier(processes), context.Queue()
+    workers = [context.Process(target=measure, args=(kind, directory, dim, queries, truth, k, barrier, results))
+               for _ in range(processes)]
+    for worker in workers:
+        worker.start()
+    rows = [results.get() for _ in workers]
+    for worker in workers:
+        worker.join()
+    return {key: float(np.mean([row[key] for row in rows])) if key != "store" else kind for key in rows[0]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Quantized memory-mapped store: memory, recall and latency "
+                                                 "against the float32 and InMemoryVectorStore stores")
+    parser.add_argument("--size", type=int, default=200_000)
+    parser.add_argument("--dims", type=int, nargs="+", default=[384, 1024], help="all-MiniLM-L6-v2, mistral-embed")
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--processes", type=int, default=4, help="processes mapping the same store at once")
+    parser.add_argument("--max-baseline", type=int, default=20_000,
+                        help="InMemoryVectorStore size (it keeps vectors as Python lists); its memory is scaled up")
+    args = parser.parse_args()
+
+    for dim in args.dims:
+        vectors = normalise(clustered_vectors(args.size + args.queries, dim))
+        data, queries = vectors[:args.size], vectors[args.size:]
+        truth = top_k(queries @ data.T, args.k)
+        print(f"\n{args.size} vectors, dim {dim} (float32 {data.nbytes / 2 ** 20:.0f} MB), recall@{args.k}, "
+              f"{args.processes} processes per store")
+        print(f"{'store':<10} {'load s':>7} {'p50 ms':>8} {'recall':>7} {'read MB/query':>14} {'private MB':>11} "
+              f"{'mapped MB':>10} {'PSS MB':>8}")
+
+        with tempfile.TemporaryDirectory() as directory:
+            documents = [Document(page_content="") for _ in range(args.size)]
+            ids = [str(i) for i in range(args.size)]
+            store = NumpyVectorStore(FakeEmbeddings(size=dim))
+            store.add_embeddings(documents, data, ids)
+            store.save(directory)
+            for dtype in ("float16", "int8"):
+                quantized = QuantizedVectorStore(FakeEmbeddings(size=dim), dtype=dtype)
+                quantized.add_embeddings(documents, data, ids)
+                quantized.save(os.path.join(directory, dtype))
+            del store, quantized
+
+            baseline = os.path.join(directory, "baseline")
+            os.makedirs(baseline)
+            small = min(args.size, args.max_baseline)
+            np.save(os.path.join(baseline, "vectors.npy"), data[:small])
+            small_truth = top_k(queries @ data[:small].T, args.k)
+
+            for kind in STORES:
+                if kind == "in_memory":
+                    row = run(kind, baseline, dim, queries[:10], small_truth[:10], args.k, 1)
+                    scale = args.size / small
+                    row.update({key: row[key] * scale for key in ("RssAnon", "RssFile", "Pss")}, store="in_memory*")
+                else:
+                    row = run(kind, directory, dim, queries, truth, args.k, args.processes)
+                read = args.size * dim * BYTES_PER_VALUE[kind]
+                if kind in ("float16", "int8"):
+                    read += args.k * 4 * dim * 4
+                print(f"{row['store']:<10} {row['load_s']:>7.2f} {row['p50_ms']:>8.2f} {row['recall']:>7.3f} "
+                      f"{read / 2 ** 20:>14.1f} {row['RssAnon']:>11.0f} {row['RssFile']:>10.0f} {row['Pss']:>8.0f}")
+    print(f"\n* InMemoryVectorStore measured at {args.max_baseline} vectors (latency too), "
+          f"memory scaled to the full size.\nMapped pages are shared page cache; PSS splits them among the "
+          f"{args.processes} processes. The kernel may map whole page-cache folios around each rescored row,\n"
+          f"so mapped MB overstates what rescoring reads.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+import argparse
+import time
+
+import numpy as np
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from benchmarks.rag import corpus
+from benchmarks.rag.stand_ins import ChromaLikeStore
+from langchain_learning.langchain_with_rag_part1 import compile_graph, index_documents
+from utils.fakes import BagOfWordsEmbeddings, FakeChatModel
+from utils.multi_retrieval import FanOutRetriever
+from utils.numpy_vector_store import NumpyVectorStore
+
+
+def delayed(retrieve, seconds: float):
+    """`retrieve` behind a fixed network-like delay."""
+    def call(question: str):
+        time.sleep(seconds)
+        return retrieve(question)
+
+    return call
+
+
+def build_retrievers(pages: int, delays, timeouts):
+    embeddings = BagOfWordsEmbeddings()
+    web = index_documents(corpus.web_pages(pages), embeddings, [])
+    # The same pages split differently: overlapping chunks the merge has to deduplicate
+    blogs = ChromaLikeStore(embeddings)
+    blogs.add_documents(RecursiveCharacterTextSplitter(chunk_size=600, chunk_overlap=0)
+                        .split_documents(corpus.web_pages(pages)))
+    data = NumpyVectorStore(embeddings)
+    data.add_documents(corpus.pdf_pages(pages))
+    funcs = {"web": web.search, "blogs": lambda q: blogs.similarity_search(q, k=4),
+             "data": lambda q: data.similarity_search(q, k=4)}
+    return {name: (delayed(funcs[name], delays[name]), timeouts[name]) for name in funcs}
+
+
+def run(title: str, retrievers, questions, token_latency: float):
+    sequential, retrieval, first_token, answer, merged, found = [], [], [], [], [], []
+    fan_out = FanOutRetriever(retrievers)
+    for question in questions:
+        start = time.perf_counter()
+        hits = [fan_out.retrieve(name, question) for name in retrievers]
+        fan_out.merge(hits)
+        sequential.append(time.perf_counter() - start)
+
+    graph = compile_graph(retrievers)
+    for question in questions:
+        start = time.perf_counter()
+        result = graph.invoke({"question": question})
+        retrieval.append(time.perf_counter() - start)
+        found.append(sum(len(hits.documents) for hits in result["hits"]))
+        merged.append(len(result["context"]))
+
+    graph = compile_graph(retrievers, FakeChatModel(token_latency=token_latency, reply_tokens=40))
+    for question in questions:
+        start, first = time.perf_counter(), None
+        for message, metadata in graph.stream({"question": question}, stream_mode="messages"):
+            if first is None and metadata["langgraph_node"] == "generate" and message.content:
+                first = time.perf_counter() - start
+        first_token.append(first)
+        answer.append(time.perf_counter() - start)
+
+    print(f"\n{title}")
+    print(f"  retrievers one after another: {np.mean(sequential) * 1000:7.1f} ms/query")
+    print(f"  graph fan-out, retrieval only: {np.mean(retrieval) * 1000:7.1f} ms/query "
+          f"({np.mean(found):.1f} hits merged into {np.mean(merged):.1f} passages)")
+    print(f"  graph with streamed answer:    {np.mean(first_token) * 1000:7.1f} ms to first token, "
+          f"{np.mean(answer) * 1000:7.1f} ms to last")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latency of the multi-retriever RAG graph against sequential retrieval")
+    parser.add_argument("--pages", type=int, default=100)
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--token-latency", type=float, default=0.01, help="seconds between streamed tokens")
+    args = parser.parse_args()
+
+    questions = corpus.questions(args.queries)
+    delays = {"web": 0.05, "blogs": 0.12, "data": 0.2}
+    run("all retrievers within their deadlines (web 50 ms, blogs 120 ms, data 200 ms; timeouts 500 ms)",
+        build_retrievers(args.pages, delays, dict.fromkeys(delays, 0.5)), questions, args.token_latency)
+    run("data/ retriever stalled (1 s, timeout 300 ms)",
+        build_retrievers(args.pages, {**delays, "data": 1.0}, {**dict.fromkeys(delays, 0.5), "data": 0.3}),
+        questions, args.token_latency)
+
+
+if __name__ == "__main__":
+    main()
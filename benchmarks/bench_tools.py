@@ -0,0 +1,83 @@
+import argparse
+import contextlib
+import io
+import random
+import time
+
+from utils.fakes import FakeSearchTool
+from utils.python_sandbox import PythonProcessPool
+from utils.tool_execution import ToolRunner
+
+QUERIES = [f"latest news about topic {i}" for i in range(40)]
+SNIPPETS = ["print(sum(i * i for i in range(10_000)))", "print(math.factorial(200) % 97)",
+            "print(statistics.mean([3, 5, 8, 13]))"]
+HANG = "while True: pass"
+
+
+def workload(steps: int, calls_per_step: int, seed: int = 0):
+    """Agent steps, each with a few independent tool calls; popular queries repeat (Zipf-like)."""
+    rng = random.Random(seed)
+    weights = [1 / (rank + 1) for rank in range(len(QUERIES))]
+    for _ in range(steps):
+        step = []
+        for _ in range(calls_per_step):
+            if rng.random() < 0.7:
+                step.append(("Search", rng.choices(QUERIES, weights)[0]))
+            else:
+                step.append(("Python REPL", rng.choice(SNIPPETS)))
+        yield step
+
+
+def exec_in_process(code: str) -> str:
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        exec(code, {"math": __import__("math"), "statistics": __import__("statistics")})
+    return output.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Agent tool execution: sequential/uncached vs ToolRunner")
+    parser.add_argument("--steps", type=int, default=40)
+    parser.add_argument("--calls-per-step", type=int, default=3)
+    parser.add_argument("--search-latency", type=float, default=0.3)
+    parser.add_argument("--timeout", type=float, default=2.0)
+    args = parser.parse_args()
+    steps = list(workload(args.steps, args.calls_per_step))
+
+    search = FakeSearchTool(latency=args.search_latency)
+    baseline = {"Search": search.run, "Python REPL": exec_in_process}
+    start = time.perf_counter()
+    for step in steps:
+        for name, tool_input in step:
+            baseline[name](tool_input)
+    sequential = time.perf_counter() - start
+    print(f"sequential, uncached, in-process: {sequential:.1f}s, {search.calls} searches "
+          f"(a '{HANG}' snippet would block this loop forever)")
+
+    search = FakeSearchTool(latency=args.search_latency)
+    pool = PythonProcessPool(workers=2, timeout=args.timeout)
+    pool.start()
+    runner = ToolRunner()
+    tools = {"Search": runner.wrap("Search", search.run, cache=True),
+             "Python REPL": runner.wrap("Python REPL", pool.run)}
+    start = time.perf_counter()
+    for i, step in enumerate(steps):
+        calls = [(tools[name], tool_input) for name, tool_input in step]
+        if i == len(steps) // 2:
+            calls.append((tools["Python REPL"], HANG))
+        runner.run_many(calls)
+    concurrent = time.perf_counter() - start
+    print(f"ToolRunner (cache + coalescing + process pool): {concurrent:.1f}s, {search.calls} searches, "
+          f"{pool.restarts} worker restarted after timeout, {sequential / concurrent:.1f}x faster\n")
+
+    print(f"{'tool':<12} {'calls':>6} {'hits':>5} {'coalesced':>9} {'hit rate':>8} {'timeouts':>8} "
+          f"{'p50 ms':>7} {'p95 ms':>7}")
+    for name, row in runner.report().items():
+        print(f"{name:<12} {row['calls']:>6} {row['cache_hits']:>5} {row['coalesced']:>9} {row['hit_rate']:>8.2f} "
+              f"{row['timeouts']:>8} {row['p50_ms']:>7.1f} {row['p95_ms']:>7.1f}")
+    pool.close()
+    runner.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+import argparse
+import os
+import tempfile
+import time
+
+import utils.tracing
+from benchmarks.rag import corpus
+from langchain_learning.langchain_with_rag_part1 import compile_graph, index_documents
+from utils.fakes import BagOfWordsEmbeddings
+from utils.tracing import Tracer
+
+
+def span_cost_ns(tracer: Tracer, calls: int) -> float:
+    start = time.perf_counter()
+    for _ in range(calls):
+        with tracer.span("stage") as span:
+            span.add("items", 1)
+    return (time.perf_counter() - start) / calls * 1e9
+
+
+def pipeline_seconds(tracer: Tracer, pages, questions) -> float:
+    """index_documents + graph queries of langchain_with_rag_part1, with `tracer` as the process tracer."""
+    utils.tracing.tracer = tracer
+    start = time.perf_counter()
+    graph = compile_graph({"web": (index_documents(pages, BagOfWordsEmbeddings(), []).search, 10.0)})
+    for question in questions:
+        with tracer.span("query"):
+            graph.invoke({"question": question}, config={"callbacks": tracer.callbacks()})
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cost of utils.tracing, disabled and enabled")
+    parser.add_argument("--calls", type=int, default=200_000)
+    parser.add_argument("--pages", type=int, default=300)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    spans_path, metrics_path = os.path.join(workdir, "spans.jsonl"), os.path.join(workdir, "metrics.prom")
+    enabled = Tracer(spans_path, metrics_path)
+    print(f"span() disabled: {span_cost_ns(Tracer(), args.calls):.0f} ns/call, "
+          f"enabled: {span_cost_ns(Tracer(enabled=True), args.calls // 10):.0f} ns/call (metrics only), "
+          f"{span_cost_ns(Tracer(os.path.join(workdir, 'micro.jsonl')), args.calls // 10):.0f} ns/call "
+          f"(metrics + spans file)")
+
+    pages = corpus.web_pages(args.pages)
+    questions = corpus.questions(args.queries)
+    pipeline_seconds(Tracer(), pages[:20], questions[:5])  # warm up imports and caches
+    # Interleaved, best of five each, so machine noise hits both sides alike
+    off, on = float("inf"), float("inf")
+    for _ in range(5):
+        off = min(off, pipeline_seconds(Tracer(), pages, questions))
+        on = min(on, pipeline_seconds(enabled, pages, questions))
+    enabled.flush()
+    with open(spans_path, encoding="utf-8") as f:
+        spans = sum(1 for _ in f)
+    print(f"RAG pipeline ({args.pages} pages, {args.queries} queries): off {off:.2f}s, on {on:.2f}s "
+          f"({(on - off) / off:+.1%}), {spans} spans written (5 runs)\n")
+
+    print(f"{'stage':<10} {'calls':>6} {'seconds':>8} {'items':>7} {'cache hits':>10}")
+    for stage, row in enabled.summary().items():
+        print(f"{stage:<10} {row['calls']:>6} {row['seconds']:>8.3f} {row.get('items', 0):>7.0f} "
+              f"{row.get('cache_hits', 0):>10.0f}")
+    print(f"\nPrometheus text in {metrics_path}, spans in {spans_path}")
+
+
+if __name__ == "__main__":
+    main()
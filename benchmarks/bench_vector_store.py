@@ -0,0 +1,68 @@
+import argparse
+import time
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.vectorstores import InMemoryVectorStore
+
+from utils.fakes import FakeEmbeddings
+from utils.numpy_vector_store import NumpyVectorStore
+
+
+def random_vectors(count: int, dim: int, seed: int = 0) -> np.ndarray:
+    return np.random.default_rng(seed).standard_normal((count, dim), dtype=np.float32)
+
+
+def fill_in_memory(store: InMemoryVectorStore, vectors: np.ndarray):
+    # Bypass embedding so both stores index exactly the same vectors
+    for i, vector in enumerate(vectors):
+        store.store[str(i)] = {"id": str(i), "vector": vector.tolist(), "text": f"chunk {i}", "metadata": {}}
+
+
+def time_queries(search, queries, repeat: int = 1) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        search(queries)
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="NumpyVectorStore vs InMemoryVectorStore")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=32)
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--max-baseline", type=int, default=100_000,
+                        help="skip InMemoryVectorStore above this size (it keeps vectors as Python lists)")
+    args = parser.parse_args()
+
+    embeddings = FakeEmbeddings(size=args.dim)
+    queries = [f"query {i}" for i in range(args.queries)]
+    print(f"{'chunks':>10} {'store':<20} {'build s':>8} {'1 query ms':>11} {'batch ms':>9} {'ms/query':>9}")
+
+    for size in args.sizes:
+        vectors = random_vectors(size, args.dim)
+        documents = [Document(page_content=f"chunk {i}") for i in range(size)]
+
+        start = time.perf_counter()
+        store = NumpyVectorStore(embeddings)
+        store.add_embeddings(documents, vectors, ids=[str(i) for i in range(size)])
+        build = time.perf_counter() - start
+        single = time_queries(lambda q: store.similarity_search(q[0], k=args.k), queries, repeat=5)
+        batch = time_queries(lambda q: store.similarity_search_batch(q, k=args.k), queries)
+        print(f"{size:>10} {'NumpyVectorStore':<20} {build:>8.2f} {single:>11.2f} {batch:>9.1f} {batch / len(queries):>9.2f}")
+
+        if size > args.max_baseline:
+            print(f"{size:>10} {'InMemoryVectorStore':<20} {'skipped':>8}")
+            continue
+        start = time.perf_counter()
+        baseline = InMemoryVectorStore(embeddings)
+        fill_in_memory(baseline, vectors)
+        build = time.perf_counter() - start
+        single = time_queries(lambda q: baseline.similarity_search(q[0], k=args.k), queries)
+        batch = time_queries(lambda q: [baseline.similarity_search(query, k=args.k) for query in q], queries)
+        print(f"{size:>10} {'InMemoryVectorStore':<20} {build:>8.2f} {single:>11.2f} {batch:>9.1f} {batch / len(queries):>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
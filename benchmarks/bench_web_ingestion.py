@@ -0,0 +1,66 @@
+import argparse
+import os
+import tempfile
+
+from benchmarks.rag import corpus
+from benchmarks.rag.stand_ins import LocalSite
+from utils.embedding_cache import CachedEmbeddings
+from utils.fakes import BagOfWordsEmbeddings
+from utils.web_ingestion import WebIngestor
+
+CLASSES = ("post-title", "post-header", "post-content")
+
+
+def run(title: str, site: LocalSite, ingestor: WebIngestor, embeddings: CachedEmbeddings):
+    before = site.requests, site.not_modified, embeddings.cache.misses
+    docs = ingestor.load(ingestor.sitemap_urls(site.url("/sitemap.xml")))
+    embeddings.embed_documents([doc.page_content for doc in docs])
+    ingestor.close()
+    print(f"{title:<34} {ingestor.stats.pages_per_sec:>9.1f} {ingestor.stats.cache_hit_rate:>9.0%} "
+          f"{site.requests - before[0]:>9} {site.not_modified - before[1]:>6} {ingestor.stats.parsed:>7} "
+          f"{embeddings.cache.misses - before[2]:>9}")
+    return docs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Web ingestion against a local http.server: pages/sec and cache hit rate")
+    parser.add_argument("--pages", type=int, default=300)
+    parser.add_argument("--latency", type=float, default=0.02, help="server seconds per request")
+    parser.add_argument("--max-per-host", type=int, default=8)
+    parser.add_argument("--changed", type=float, default=0.1, help="share of pages edited before the last run")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    pages = corpus.html_pages(args.pages)
+    embeddings = CachedEmbeddings(BagOfWordsEmbeddings(), cache_dir=os.path.join(workdir, "embedding_cache"))
+    print(f"{args.pages} pages, {args.latency * 1000:.0f} ms per request\n")
+    print(f"{'run':<34} {'pages/s':>9} {'hit rate':>9} {'requests':>9} {'304s':>6} {'parsed':>7} {'embedded':>9}")
+
+    with LocalSite(pages, args.latency) as site:
+        run("one at a time, parsed inline", site,
+            WebIngestor(os.path.join(workdir, "sequential"), CLASSES, max_workers=1, max_per_host=1,
+                        parse_workers=0),
+            CachedEmbeddings(BagOfWordsEmbeddings(), cache_dir=os.path.join(workdir, "sequential_embeddings")))
+
+        def ingestor():
+            return WebIngestor(os.path.join(workdir, "web_cache"), CLASSES, max_workers=32,
+                               max_per_host=args.max_per_host)
+
+        docs = run("concurrent, cold cache", site, ingestor(), embeddings)
+        run("concurrent, warm cache", site, ingestor(), embeddings)
+        for path in list(site.pages)[:int(args.pages * args.changed)]:
+            site.pages[path] = site.pages[path].replace("</div>", "<p>Updated with a correction.</p></div>")
+        run(f"warm, {args.changed:.0%} of pages edited", site, ingestor(), embeddings)
+        print(f"\nmost requests in flight at once: {site.max_in_flight} (per-host limit {args.max_per_host})")
+
+    with LocalSite(pages, args.latency, validators=False) as site:
+        cache_dir = os.path.join(workdir, "no_validators")
+        WebIngestor(cache_dir, CLASSES).load(site.url(path) for path in pages)
+        run("no ETag/Last-Modified, warm", site, WebIngestor(cache_dir, CLASSES, max_workers=32,
+                                                             max_per_host=args.max_per_host), embeddings)
+
+    print(f"\nfirst page as parsed: {docs[0].metadata} {docs[0].page_content[:120]!r}...")
+
+
+if __name__ == "__main__":
+    main()
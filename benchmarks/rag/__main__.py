@@ -0,0 +1,91 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict
+from multiprocessing import get_context
+
+from benchmarks.rag.flows import FLOWS, FlowConfig, run_flow
+from benchmarks.rag.metrics import compare
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        return ""
+
+
+def print_run(run: dict):
+    title = f"{run['flow']} [{run['size']}]"
+    if "skipped" in run or "error" in run:
+        print(f"{title}: {run.get('skipped') or run['error']}")
+        return
+    print(f"{title}: {run['seconds']:.1f}s, peak RSS {run['peak_rss_mb']:.0f} MB")
+    for stage, row in run["stages"].items():
+        latency = f"p50 {row['p50_ms']:>8.2f} ms  p99 {row['p99_ms']:>8.2f} ms" if "p50_ms" in row else " " * 33
+        tokens = "  ".join(f"{key.split('_')[0]} tokens {row[key]}"
+                           for key in ("prompt_tokens", "context_tokens") if key in row)
+        print(f"  {stage:<22} {row['items']:>7} items {row['items_per_sec']:>10.1f}/s  {latency}  {tokens}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="End-to-end RAG benchmarks: the project's flows replayed offline with fake "
+                    "embedders/LLMs and mongomock, per stage throughput, latency, tokens and peak memory")
+    parser.add_argument("--flows", default=",".join(FLOWS), help=f"comma-separated, from {', '.join(FLOWS)}")
+    parser.add_argument("--sizes", default="100,500", help="corpus sizes (source documents per flow)")
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--embed-latency", type=float, default=0.01, help="seconds per embedding call")
+    parser.add_argument("--embed-text-latency", type=float, default=0.0002, help="extra seconds per embedded text")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="seconds per LLM call")
+    parser.add_argument("--reply-tokens", type=int, default=40)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default="rag_bench_results.json", help="where to write the JSON results")
+    parser.add_argument("--compare", help="earlier results file to diff against")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="relative change worth reporting")
+    args = parser.parse_args()
+
+    flows = [name.strip() for name in args.flows.split(",") if name.strip()]
+    unknown = sorted(set(flows) - set(FLOWS))
+    if unknown:
+        parser.error(f"unknown flows {unknown}")
+    config = FlowConfig(queries=args.queries, embed_latency=args.embed_latency,
+                        embed_text_latency=args.embed_text_latency, llm_latency=args.llm_latency,
+                        reply_tokens=args.reply_tokens, seed=args.seed)
+
+    runs = []
+    for size in (int(size) for size in args.sizes.split(",")):
+        for name in flows:
+            # A fresh spawned process per run: peak RSS is that flow's own, and no state leaks between flows
+            with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+                run = pool.submit(run_flow, name, size, config).result()
+            print_run(run)
+            runs.append(run)
+
+    results = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": git_commit(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "config": asdict(config),
+        "runs": runs,
+    }
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2, default=str)
+    print(f"\nResults written to {args.out}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            lines = compare(json.load(f), results, args.tolerance)
+        print(f"\nChanges beyond {args.tolerance:.0%} against {args.compare} (! = worse):")
+        print("\n".join(lines) if lines else "  none")
+
+
+if __name__ == "__main__":
+    main()
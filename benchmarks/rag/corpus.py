@@ -0,0 +1,110 @@
+import os
+import random
+from datetime import datetime, timedelta
+from typing import List
+
+from langchain_core.documents import Document
+
+from benchmarks.bench_blog_documents import fake_blogs
+
+TOPICS = {
+    "revenue": "revenue grew across footwear apparel and equipment with strong direct sales in 2023",
+    "headquarters": "the headquarters campus is located near Beaverton Oregon with regional offices abroad",
+    "countries": "the company operates in more than 170 countries through subsidiaries and distributors",
+    "supply": "the supply chain relies on contract factories in Vietnam Indonesia and China",
+    "agents": "an autonomous agent combines planning memory and tool use around a language model",
+    "memory": "short term memory is the context window while long term memory lives in a vector store",
+    "planning": "task decomposition with chain of thought lets the agent break goals into steps",
+    "tools": "tool use lets the model call search engines calculators and code interpreters",
+}
+FILLER = ("market growth quarter report analysis customer product design strategy risk outlook "
+          "segment margin digital brand investment operations team result").split()
+BOILERPLATE = ("Subscribe to our newsletter for the latest posts. Follow us on social media. "
+               "Copyright 2024 All rights reserved. Privacy policy and terms of use apply to this site.")
+LOCATIONS = ("Berlin", "London", "Lagos", "Toronto", "Singapore", "Austin", "Mumbai", "Sydney")
+EXPERTISE = ("data engineering", "machine learning", "cloud security", "product design",
+             "mobile development", "devops", "finance", "marketing analytics")
+NAMES = ("Ada", "Grace", "Alan", "Linus", "Margaret", "Tim", "Barbara", "Ken", "Radia", "Dennis")
+
+
+def _paragraph(rng: random.Random, words: int = 120) -> str:
+    topic = rng.choice(list(TOPICS))
+    filler = " ".join(rng.choices(FILLER, k=words))
+    return f"{TOPICS[topic]}. {filler}."
+
+
+def pdf_pages(count: int, seed: int = 0) -> List[Document]:
+    """Pages of an annual-report-like PDF, as `PdfChunkStream` would yield them before splitting."""
+    rng = random.Random(seed)
+    return [Document(page_content="\n\n".join(_paragraph(rng) for _ in range(4)),
+                     metadata={"source": "example_file.pdf", "page": page})
+            for page in range(count)]
+
+
+def web_pages(count: int, seed: int = 0) -> List[Document]:
+    """Blog-post pages sharing a header and footer, which near-dedup should drop after the first page."""
+    rng = random.Random(seed)
+    return [Document(page_content="\n\n".join([f"Post {i}"] + [_paragraph(rng) for _ in range(6)] + [BOILERPLATE]),
+                     metadata={"source": f"https://example.com/posts/{i}/"})
+            for i in range(count)]
+
+
+def html_pages(count: int, seed: int = 0) -> dict:
+    """`web_pages` as HTML (path -> page) laid out like the blog `langchain_with_rag_part1.py` loads."""
+    pages = {}
+    for i, doc in enumerate(web_pages(count, seed)):
+        title, *paragraphs = doc.page_content.split("\n\n")
+        body = "".join(f"<p>{paragraph}</p>\n" for paragraph in paragraphs)
+        pages[f"/posts/{i}/"] = (
+            f"<html><head><title>{title}</title><script>var analytics = {{}};</script></head><body>"
+            f"<nav class=\"menu\"><a href=\"/\">Home</a> <a href=\"/archive/\">Archive</a></nav>"
+            f"<header class=\"post-header\"><h1 class=\"post-title\">{title}</h1></header>"
+            f"<div class=\"post-content\">\n{body}</div><footer>Comments are closed.</footer></body></html>")
+    return pages
+
+
+def blogs(count: int, seed: int = 0) -> List[dict]:
+    """Mongo blog documents shaped like `app-dev.blogs`."""
+    return list(fake_blogs(count, words=300, seed=seed))
+
+
+def write_text_files(directory: str, count: int, seed: int = 0):
+    """Plain-text files for the LlamaIndex `data/` directory."""
+    rng = random.Random(seed)
+    os.makedirs(directory, exist_ok=True)
+    for i in range(count):
+        with open(os.path.join(directory, f"doc_{i:05d}.txt"), "w", encoding="utf-8") as f:
+            f.write("\n\n".join(_paragraph(rng) for _ in range(6)))
+
+
+def profiles(count: int, seed: int = 0) -> List[dict]:
+    """Documents of `app-dev.profiles` with the fields the profile bots read."""
+    rng = random.Random(seed)
+    start = datetime(2020, 1, 1)
+    return [{
+        "firstName": rng.choice(NAMES),
+        "lastName": f"Tester{i}",
+        "areaOfExpertise": rng.choice(EXPERTISE),
+        "currentLocation": rng.choice(LOCATIONS),
+        "businessMemberSince": str(2010 + rng.randrange(14)),
+        "carrierSummary": f"Works on {rng.choice(EXPERTISE)} projects. " + " ".join(rng.choices(FILLER, k=40)),
+        "updatedAt": start + timedelta(hours=i),
+    } for i in range(count)]
+
+
+def questions(count: int, seed: int = 0) -> List[str]:
+    """Questions about the corpus topics; about a third repeat an earlier question."""
+    rng = random.Random(seed)
+    asked: List[str] = []
+    for _ in range(count):
+        if asked and rng.random() < 0.3:
+            asked.append(rng.choice(asked))
+        else:
+            topic = rng.choice(list(TOPICS))
+            asked.append(f"What does the report say about {topic} and {rng.choice(FILLER)}?")
+    return asked
+
+
+def profile_questions(count: int, seed: int = 0) -> List[str]:
+    rng = random.Random(seed)
+    return [f"Who works on {rng.choice(EXPERTISE)} in {rng.choice(LOCATIONS)}?" for _ in range(count)]
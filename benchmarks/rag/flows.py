@@ -0,0 +1,226 @@
+import atexit
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import time
+import traceback
+from dataclasses import dataclass
+
+from benchmarks.rag import corpus
+from benchmarks.rag.metrics import Recorder
+
+
+@dataclass
+class FlowConfig:
+    queries: int = 50
+    embed_latency: float = 0.01
+    embed_text_latency: float = 0.0002
+    llm_latency: float = 0.05
+    reply_tokens: int = 40
+    seed: int = 0
+
+    def embeddings(self):
+        from utils.embedding_cache import CachedEmbeddings
+        from utils.fakes import BagOfWordsEmbeddings
+
+        # Same wrapping as the scripts; every run starts in an empty directory, so the cache is cold
+        return CachedEmbeddings(BagOfWordsEmbeddings(latency=self.embed_latency, text_latency=self.embed_text_latency))
+
+    def chat_model(self):
+        from utils.fakes import FakeChatModel
+
+        return FakeChatModel(latency=self.llm_latency, reply_tokens=self.reply_tokens)
+
+
+def semantic_search(size: int, config: FlowConfig, rec: Recorder):
+    """semantic_search.py: split PDF pages, ingest into hybrid search, single and batched queries."""
+    from langchain_core.runnables import chain
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+    from utils.hybrid_search import HybridSearch
+    from utils.ingestion_pipeline import ingest
+    from utils.tokens import estimate_tokens
+    from utils.vector_stores import build_vector_store
+
+    pages = corpus.pdf_pages(size, config.seed)
+    splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200, add_start_index=True)
+    with rec.stage("split", items=len(pages)):
+        chunks = splitter.split_documents(pages)
+    search = HybridSearch(build_vector_store(config.embeddings()))
+    with rec.stage("ingest", items=len(chunks)):
+        ingest(search, chunks)
+
+    questions = corpus.questions(config.queries, config.seed)
+    results = rec.each("query", search.search, questions)
+    rec.stages["query"].context_tokens = sum(estimate_tokens(doc.page_content) for docs in results for doc in docs)
+
+    @chain
+    def retriever(query: str):
+        return search.search(query, k=1)
+
+    with rec.stage("batch_query", items=len(questions)):
+        retriever.batch(questions)
+
+
+def blog_search(size: int, config: FlowConfig, rec: Recorder):
+    """semantic_search_using_chroma_db.py: Mongo blogs synced into a vector store, filtered queries."""
+    import mongomock
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+    from benchmarks.rag.stand_ins import ChromaLikeStore
+    from utils.blog_documents import BlogDocumentBuilder
+    from utils.blog_sync import sync_blogs
+    from utils.near_dedup import NearDuplicateFilter
+
+    collection = mongomock.MongoClient()["app-dev"]["blogs"]
+    collection.insert_many(corpus.blogs(size, config.seed))
+    builder = BlogDocumentBuilder()
+    splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=100)
+    store = ChromaLikeStore(config.embeddings())
+
+    with rec.stage("load", items=size):
+        blogs = list(collection.find({}))
+    with rec.stage("sync") as stage:
+        report = sync_blogs(blogs, store, splitter, to_document=builder, dedupe=NearDuplicateFilter(threshold=0.85))
+        stage.items = report.added_chunks
+    rec.notes["duplicate_chunks"] = report.duplicate_chunks
+    with rec.stage("resync", items=size):
+        sync_blogs(list(collection.find({})), store, splitter, to_document=builder,
+                   dedupe=NearDuplicateFilter(threshold=0.85))
+
+    filters = ("", "tag:python ", "since:2024-01-01 ", "tag:rag since:2023-06-01 ")
+    queries = [filters[i % len(filters)] + question
+               for i, question in enumerate(corpus.questions(config.queries, config.seed))]
+
+    def search(text: str):
+        query, where = builder.parse_query(text)
+        return store.similarity_search(query, k=1, filter=where)
+
+    rec.each("query", search, queries)
+
+
+def web_rag(size: int, config: FlowConfig, rec: Recorder):
+    """langchain_with_rag_part1.py: split, near-dedup and index web pages, then run the graph per question."""
+    from langchain_learning.langchain_with_rag_part1 import compile_graph, index_documents
+    from utils.tokens import estimate_tokens
+
+    pages = corpus.web_pages(size, config.seed)
+    log = []
+    with rec.stage("index", items=len(pages)):
+        search = index_documents(pages, config.embeddings(), log)
+    rec.notes["log"] = log
+    model = config.chat_model()
+    graph = compile_graph({"web": (search.search, 10.0)}, model)
+    results = rec.each("query", lambda question: graph.invoke({"question": question}),
+                       corpus.questions(config.queries, config.seed), model=model)
+    rec.stages["query"].context_tokens = sum(estimate_tokens(doc.page_content)
+                                             for result in results for doc in result["context"])
+
+
+def llama_index(size: int, config: FlowConfig, rec: Recorder):
+    """LlamaIndex.py: build and persist the index from data/, reload it unchanged, answer through the response cache."""
+    from llama_index.core import Settings
+
+    from benchmarks.rag.stand_ins import llama_index_fakes
+    from utils.llama_index_embedding_cache import CachedLlamaIndexEmbedding
+    from utils.llama_index_store import load_index
+    from utils.response_cache import ResponseCache
+
+    corpus.write_text_files("data", size, config.seed)
+    embed_model, llm = llama_index_fakes(config.embeddings().embeddings, config.llm_latency, config.reply_tokens)
+    Settings.embed_model = CachedLlamaIndexEmbedding(embed_model)
+    Settings.llm = llm
+
+    with rec.stage("index", items=size):
+        index, _ = load_index("data", "storage")
+    with rec.stage("reload", items=size):
+        index, report = load_index("data", "storage")
+    rec.notes["reload_unchanged"] = report.unchanged
+
+    response_cache = ResponseCache(path="storage/response_cache.pkl")
+    query_engine = index.as_query_engine()
+
+    def answer(query: str) -> str:
+        return response_cache.cached("fake-llm", query, lambda: str(query_engine.query(query)), tags=("data",))
+
+    rec.each("query", answer, corpus.questions(config.queries, config.seed), model=llm)
+    rec.notes["response_cache"] = response_cache.report()
+
+
+def profiles_langchain(size: int, config: FlowConfig, rec: Recorder):
+    """profiles_chatbot_with_langchain.py: top-k profile retrieval versus the whole collection in every prompt."""
+    import mongomock
+
+    from langchain_learning.profiles_chatbot_with_langchain import ProfilesChatBot
+
+    collection = mongomock.MongoClient()["app-dev"]["profiles"]
+    collection.insert_many(corpus.profiles(size, config.seed))
+    questions = corpus.profile_questions(config.queries, config.seed)
+
+    for use_retrieval, prefix in ((True, "retrieval"), (False, "full_context")):
+        model = config.chat_model()
+        with rec.stage(f"{prefix}_setup", items=size):
+            bot = ProfilesChatBot("fake", "mistral-large-latest", use_retrieval=use_retrieval,
+                                  profiles_collection=collection, model=model, embeddings=config.embeddings())
+            bot._setup.get()
+        rec.each(f"{prefix}_chat", bot.chat, questions, model=model)
+
+
+def profiles_mistral(size: int, config: FlowConfig, rec: Recorder):
+    """llms/profile_chatbot.py: a multi-turn session with retrieval and history compaction."""
+    import mongomock
+
+    from llms.profile_chatbot import ChatBot
+    from utils.fakes import FakeMistralClient
+    from utils.profile_retrieval import ProfileRetriever
+
+    collection = mongomock.MongoClient()["app-dev"]["profiles-mistral"]
+    collection.insert_many(corpus.profiles(size, config.seed))
+    client = FakeMistralClient(latency=config.llm_latency, reply_tokens=config.reply_tokens)
+    bot = ChatBot("fake", "mistral-large-latest", ProfileRetriever(config.embeddings()), client=client)
+    with rec.stage("setup", items=size):
+        bot.initialize_context_from_db(collection)
+
+    def turn(question: str):
+        bot.conversation_history.append({"role": "user", "content": question})
+        bot.send_request()
+
+    rec.each("turn", turn, corpus.profile_questions(config.queries, config.seed), model=client)
+
+
+FLOWS = {
+    "semantic_search": semantic_search,
+    "blog_search": blog_search,
+    "web_rag": web_rag,
+    "llama_index": llama_index,
+    "profiles_langchain": profiles_langchain,
+    "profiles_mistral": profiles_mistral,
+}
+
+
+def run_flow(name: str, size: int, config: FlowConfig) -> dict:
+    """One flow at one corpus size, in a fresh process and an empty working directory."""
+    from utils.pdf_pipeline import peak_rss_mb
+
+    result = {"flow": name, "size": size}
+    rec = Recorder()
+    start = time.perf_counter()
+    workdir = tempfile.mkdtemp(prefix=f"rag-bench-{name}-")
+    # Registered first so it runs last, after the caches' own atexit flushes into it
+    atexit.register(shutil.rmtree, workdir, True)
+    os.chdir(workdir)
+    try:
+        # The scripts print progress; keep the report readable
+        with contextlib.redirect_stdout(io.StringIO()):
+            FLOWS[name](size, config, rec)
+    except ImportError as e:
+        return {**result, "skipped": f"{type(e).__name__}: {e}"}
+    except Exception as e:
+        return {**result, "error": f"{type(e).__name__}: {e}", "traceback": traceback.format_exc()}
+    result["seconds"] = round(time.perf_counter() - start, 3)
+    result["peak_rss_mb"] = round(peak_rss_mb(), 1)
+    result["stages"] = rec.report()
+    result["notes"] = rec.notes
+    return result
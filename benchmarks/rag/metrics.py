@@ -0,0 +1,103 @@
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+
+
+@dataclass
+class Stage:
+    seconds: float = 0.0
+    items: int = 0
+    latencies: List[float] = field(default_factory=list)
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    context_tokens: int = 0
+
+    def summary(self) -> dict:
+        row = {"seconds": round(self.seconds, 4), "items": self.items,
+               "items_per_sec": round(self.items / self.seconds, 2) if self.seconds else 0.0}
+        if self.latencies:
+            row["p50_ms"] = round(float(np.percentile(self.latencies, 50)) * 1000, 3)
+            row["p99_ms"] = round(float(np.percentile(self.latencies, 99)) * 1000, 3)
+        for name in ("prompt_tokens", "completion_tokens", "context_tokens"):
+            if getattr(self, name):
+                row[name] = getattr(self, name)
+        return row
+
+
+def _tokens(model) -> tuple:
+    return (getattr(model, "prompt_tokens", 0), getattr(model, "completion_tokens", 0)) if model else (0, 0)
+
+
+class Recorder:
+    """
+    Wall time, per-call latency and LLM tokens per named stage of one flow.
+
+    `model` is any fake that tallies `prompt_tokens` / `completion_tokens`
+    (`FakeChatModel`, `FakeMistralClient`, ...); the stage gets the difference.
+    """
+
+    def __init__(self):
+        self.stages: Dict[str, Stage] = {}
+        self.notes: Dict[str, object] = {}
+
+    @contextmanager
+    def stage(self, name: str, items: int = 0, model=None):
+        stage = self.stages.setdefault(name, Stage())
+        prompt, completion = _tokens(model)
+        start = time.perf_counter()
+        try:
+            yield stage
+        finally:
+            stage.seconds += time.perf_counter() - start
+            stage.items += items
+            after = _tokens(model)
+            stage.prompt_tokens += after[0] - prompt
+            stage.completion_tokens += after[1] - completion
+
+    def each(self, name: str, func: Callable, inputs: Iterable, model=None) -> list:
+        """Call `func` once per input, timing every call."""
+        results = []
+        with self.stage(name, model=model) as stage:
+            for item in inputs:
+                start = time.perf_counter()
+                results.append(func(item))
+                stage.latencies.append(time.perf_counter() - start)
+                stage.items += 1
+        return results
+
+    def report(self) -> dict:
+        return {name: stage.summary() for name, stage in self.stages.items()}
+
+
+def compare(old: dict, new: dict, tolerance: float = 0.1) -> List[str]:
+    """
+    Lines for every metric that moved by more than `tolerance` between two result files,
+    worse ones marked with `!`. Higher is better for throughput, lower for the rest.
+    """
+    def rows(results: dict):
+        for run in results["runs"]:
+            key = (run["flow"], run["size"])
+            if "peak_rss_mb" in run:
+                yield key + ("process",), "peak_rss_mb", run["peak_rss_mb"]
+            for stage, metrics in run.get("stages", {}).items():
+                for metric, value in metrics.items():
+                    if metric in ("items_per_sec", "p50_ms", "p99_ms", "prompt_tokens", "context_tokens"):
+                        yield key + (stage,), metric, value
+
+    before = {(key, metric): value for key, metric, value in rows(old)}
+    lines = []
+    for key, metric, value in rows(new):
+        previous: Optional[float] = before.get((key, metric))
+        if not previous:
+            continue
+        change = (value - previous) / previous
+        if abs(change) <= tolerance:
+            continue
+        worse = change < 0 if metric == "items_per_sec" else change > 0
+        flow, size, stage = key
+        lines.append(f"{'!' if worse else ' '} {flow}[{size}] {stage} {metric}: {previous:g} -> {value:g} "
+                     f"({change:+.0%})")
+    return lines
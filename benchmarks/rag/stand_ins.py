@@ -0,0 +1,181 @@
+import time
+from typing import Any, List, Optional
+
+from utils.blog_documents import where_matches
+from utils.numpy_vector_store import NumpyVectorStore
+
+
+class ChromaLikeStore(NumpyVectorStore):
+    """
+    In-memory stand-in for the LangChain `Chroma` wrapper in the blog flow: adds
+    `get(include=...)` for `sync_blogs` and Chroma `where` dicts as search filters.
+    """
+
+    def get(self, include: Optional[List[str]] = None, **kwargs: Any) -> dict:
+        with self._lock:
+            result = {"ids": list(self._ids)}
+            if include and "metadatas" in include:
+                result["metadatas"] = [dict(doc.metadata) for doc in self._docs]
+            return result
+
+    def similarity_search(self, query: str, k: int = 4, filter=None, **kwargs: Any):
+        if isinstance(filter, dict):
+            where = filter
+
+            def filter(doc) -> bool:
+                return where_matches(where, doc.metadata)
+
+        return super().similarity_search(query, k, filter=filter, **kwargs)
+
+    def persist(self):
+        pass
+
+
+def llama_index_fakes(embeddings, latency: float = 0.0, reply_tokens: int = 20):
+    """
+    (embed model, llm) for LlamaIndex `Settings`: the LangChain fake embedder behind
+    LlamaIndex's embedding interface, and an LLM that tallies tokens like `FakeChatModel`.
+    """
+    from llama_index.core.base.embeddings.base import BaseEmbedding
+    from llama_index.core.llms import CompletionResponse, CustomLLM, LLMMetadata
+    from llama_index.core.llms.callbacks import llm_completion_callback
+    from pydantic import PrivateAttr
+
+    from utils.fakes import fake_reply
+    from utils.tokens import estimate_tokens
+
+    class FakeLlamaEmbedding(BaseEmbedding):
+        _embeddings: Any = PrivateAttr()
+
+        def __init__(self, wrapped, **kwargs: Any):
+            super().__init__(model_name=wrapped.model, **kwargs)
+            self._embeddings = wrapped
+
+        def _get_query_embedding(self, query: str) -> List[float]:
+            return self._embeddings.embed_query(query)
+
+        async def _aget_query_embedding(self, query: str) -> List[float]:
+            return self._get_query_embedding(query)
+
+        def _get_text_embedding(self, text: str) -> List[float]:
+            return self._embeddings.embed_documents([text])[0]
+
+        def _get_text_embeddings(self, texts: List[str]) -> List[List[float]]:
+            return self._embeddings.embed_documents(texts)
+
+    class FakeLlamaLLM(CustomLLM):
+        latency: float = 0.0
+        reply_tokens: int = 20
+        calls: int = 0
+        prompt_tokens: int = 0
+        completion_tokens: int = 0
+
+        @property
+        def metadata(self) -> LLMMetadata:
+            return LLMMetadata(num_output=self.reply_tokens, model_name="fake-llm")
+
+        @llm_completion_callback()
+        def complete(self, prompt: str, formatted: bool = False, **kwargs: Any) -> CompletionResponse:
+            self.calls += 1
+            self.prompt_tokens += estimate_tokens(prompt)
+            self.completion_tokens += self.reply_tokens
+            if self.latency:
+                time.sleep(self.latency)
+            return CompletionResponse(text="".join(fake_reply(prompt, self.reply_tokens)))
+
+        @llm_completion_callback()
+        def stream_complete(self, prompt: str, formatted: bool = False, **kwargs: Any):
+            response = self.complete(prompt, formatted)
+
+            def stream():
+                yield response
+
+            return stream()
+
+    return FakeLlamaEmbedding(embeddings), FakeLlamaLLM(latency=latency, reply_tokens=reply_tokens)
+
+
+class LocalSite:
+    """
+    `http.server` stand-in for a blog: serves `pages` (path -> HTML) and `/sitemap.xml`
+    over keep-alive HTTP/1.1 with ETag / Last-Modified and 304 answers, after `latency`
+    seconds per request. Counts requests, 304s and the most requests in flight at once.
+    """
+
+    def __init__(self, pages: dict, latency: float = 0.0, validators: bool = True):
+        import hashlib
+        import threading
+        from email.utils import formatdate
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        self.pages = dict(pages)
+        self.requests = self.not_modified = self.in_flight = self.max_in_flight = 0
+        self._lock = threading.Lock()
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                with site._lock:
+                    site.requests += 1
+                    site.in_flight += 1
+                    site.max_in_flight = max(site.max_in_flight, site.in_flight)
+                try:
+                    if latency:
+                        time.sleep(latency)
+                    self._respond()
+                finally:
+                    with site._lock:
+                        site.in_flight -= 1
+
+            def _respond(self):
+                if self.path == "/sitemap.xml":
+                    locs = "".join(f"<url><loc>{site.url(path)}</loc></url>" for path in site.pages)
+                    body, content_type = (f'<?xml version="1.0" encoding="UTF-8"?><urlset xmlns='
+                                          f'"http://www.sitemaps.org/schemas/sitemap/0.9">{locs}</urlset>'), "text/xml"
+                elif self.path in site.pages:
+                    body, content_type = site.pages[self.path], "text/html; charset=utf-8"
+                else:
+                    self.send_response(404)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                body = body.encode("utf-8")
+                etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+                if validators and self.headers.get("If-None-Match") == etag:
+                    with site._lock:
+                        site.not_modified += 1
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                if validators:
+                    self.send_header("ETag", etag)
+                    self.send_header("Last-Modified", formatdate(0, usegmt=True))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def url(self, path: str) -> str:
+        return f"http://127.0.0.1:{self.server.server_port}{path}"
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -1,49 +1,93 @@
+import asyncio
+import os
 from dotenv import load_dotenv
-from langchain.agents import initialize_agent, Tool, AgentType
-from langchain_community.tools.tavily_search import TavilySearchResults
-from langchain_experimental.tools.python.tool import PythonREPLTool
-from langchain.memory import ConversationBufferMemory
-from langchain_mistralai import ChatMistralAI
+from utils.lazy import Deferred
 
 # Load environment variables
 load_dotenv()
 
-# Initialize model
-model = ChatMistralAI(model="mistral-large-latest")
-
-# Define tools
-tools = [
-    Tool(
-        name="Search",
-        func=TavilySearchResults(max_results=1).run,
-        description="Useful for answering questions about current events or general world knowledge."
-    ),
-    Tool(
-        name="Python REPL",
-        func=PythonREPLTool().run,
-        description="Useful for performing Python calculations or code execution."
+
+def build_agent():
+    """Model, tools and executor; the heavy LangChain imports happen here, not at import time."""
+    from langchain.agents import AgentExecutor, create_tool_calling_agent
+    from langchain.memory import ConversationBufferMemory
+    from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+    from langchain_mistralai import ChatMistralAI
+    from utils.python_sandbox import PythonProcessPool
+    from utils.tool_execution import ToolRunner
+
+    # Initialize model
+    model = ChatMistralAI(model="mistral-large-latest")
+
+    # Tool execution layer: cached/coalesced search, Python in warm worker processes
+    runner = ToolRunner(cache_ttl=600)
+    python_pool = PythonProcessPool(workers=2, timeout=10.0, memory_mb=512)
+    python_pool.start()
+
+    if os.getenv("AGENT_OFFLINE") == "1":
+        from utils.fakes import FakeSearchTool
+        search = FakeSearchTool()
+    else:
+        from langchain_community.tools.tavily_search import TavilySearchResults
+        search = TavilySearchResults(max_results=1)
+
+    # Define tools
+    tools = [
+        runner.as_tool(
+            name="Search",
+            func=search.run,
+            description="Useful for answering questions about current events or general world knowledge.",
+            cache=True,
+        ),
+        runner.as_tool(
+            name="Python_REPL",
+            func=python_pool.run,
+            description="Useful for performing Python calculations or code execution. Print the values you need.",
+        ),
+    ]
+
+    # Set up memory
+    memory = ConversationBufferMemory(memory_key="chat_history", return_messages=True)
+
+    prompt = ChatPromptTemplate.from_messages([
+        ("system", "You are a helpful assistant. Call several tools at once when they do not depend on each other."),
+        MessagesPlaceholder("chat_history", optional=True),
+        ("human", "{input}"),
+        MessagesPlaceholder("agent_scratchpad"),
+    ])
+
+    # Create agent executor; with ainvoke, independent tool calls from one step run concurrently
+    agent_executor = AgentExecutor(
+        agent=create_tool_calling_agent(model, tools, prompt),
+        tools=tools,
+        memory=memory,
     )
-]
+    return agent_executor, runner
+
+
+# Built on first use (or in the background once the prompt is up)
+agent = Deferred(build_agent)
 
-# Set up memory
-memory = ConversationBufferMemory(memory_key="chat_history", return_messages=True)
+def chat(ask=input):
+    """Prompt loop. Every prompt runs on one event loop: the Mistral client's async HTTP session is bound to it."""
+    loop = asyncio.new_event_loop()
+    try:
+        while True:
+            user_prompt = ask("\n🧠 Enter prompt (type 'exit' to quit): ")
+            if user_prompt.lower() == 'exit':
+                print("👋 Exiting...")
+                if agent.ready:
+                    print(f"🔧 Tool stats: {agent.get()[1].report()}")
+                break
 
-# Create agent executor
-agent_executor = initialize_agent(
-    tools=tools,
-    llm=model,
-    agent=AgentType.CHAT_CONVERSATIONAL_REACT_DESCRIPTION,
-    memory=memory,
+            agent_executor, _ = agent.get()
+            response = loop.run_until_complete(agent_executor.ainvoke({"input": user_prompt}))["output"]
+            print(f"\n🤖 Response: {response}")
+    finally:
+        loop.close()
 
-)
 
 # Main interaction loop
 if __name__ == "__main__":
-    while True:
-        user_prompt = input("\n🧠 Enter prompt (type 'exit' to quit): ")
-        if user_prompt.lower() == 'exit':
-            print("👋 Exiting...")
-            break
-
-        response = agent_executor.run(user_prompt)
-        print(f"\n🤖 Response: {response}")
+    agent.prefetch()
+    chat()
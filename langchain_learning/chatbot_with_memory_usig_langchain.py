@@ -1,17 +1,43 @@
 from dotenv import load_dotenv
 import os
-from langgraph.graph import StateGraph, MessagesState
-from langchain_core.messages import HumanMessage
-from langgraph.checkpoint.memory import MemorySaver
-from langchain_mistralai.chat_models import ChatMistralAI
+import uuid
+import argparse
+from functools import lru_cache
+from utils.lazy import Deferred
+
+
+@lru_cache(maxsize=None)
+def chat_state():
+    """Graph state schema, created on first use so importing this module does not load langgraph."""
+    from langgraph.graph import MessagesState
+
+    class ChatState(MessagesState):
+        summary: str
+
+    return ChatState
+
 
 class ChatBot:
-    def __init__(self):
+    def __init__(self, session_id=None, checkpointer=None):
         load_dotenv()
         self.api_key = os.getenv("MISTRAL_API_KEY")
         if not self.api_key:
             raise ValueError("MISTRAL_API_KEY not found in .env file.")
         print("✅ MISTRAL_API_KEY loaded successfully.")
+        self._checkpointer = checkpointer
+
+        # Config for memory (threading): one thread per session
+        self.new_session(session_id)
+
+        # Model, graph and checkpointer load in the background while the prompt is shown
+        self._components = Deferred(self._build).prefetch()
+
+    def _build(self):
+        from langgraph.constants import TAG_NOSTREAM
+        from langgraph.graph import StateGraph
+        from langchain_mistralai.chat_models import ChatMistralAI
+        from utils.chat_history import HistoryManager, llm_summarizer
+        from utils.sqlite_checkpointer import SqliteCheckpointer
 
         # Initialize model
         self.model = ChatMistralAI(
@@ -19,34 +45,63 @@ class ChatBot:
             api_key=self.api_key,
         )
 
+        # Keeps the recent turns verbatim and folds older ones into a rolling summary.
+        # Tagged so the summary's tokens are not streamed to clients as part of the reply
+        self.history_manager = HistoryManager(
+            summarizer=llm_summarizer(
+                lambda prompt: self.model.invoke(prompt, config={"tags": [TAG_NOSTREAM, "summarizer"]}).content)
+        )
+
         # Setup workflow with memory
-        workflow = StateGraph(state_schema=MessagesState)
+        workflow = StateGraph(state_schema=chat_state())
         workflow.add_node("model", self.call_model)
         workflow.set_entry_point("model")
-        memory = MemorySaver()
-        self.workflow = workflow.compile(checkpointer=memory)
+        # Durable memory shared by all sessions, idle threads are evicted after a week
+        checkpointer = self._checkpointer or SqliteCheckpointer("chat_checkpoints.sqlite")
+        return workflow.compile(checkpointer=checkpointer), checkpointer
+
+    @property
+    def workflow(self):
+        return self._components.get()[0]
+
+    @property
+    def checkpointer(self):
+        return self._components.get()[1]
 
-        # Config for memory (threading)
-        self.thread_id = "unique-thread-id"
+    def new_session(self, session_id=None):
+        self.thread_id = session_id or uuid.uuid4().hex
         self.config_dict = {"configurable": {"thread_id": self.thread_id}}
+        return self.thread_id
 
     def start_conversation(self):
-        print("😎 Chatbot is ready! Type 'quit' to exit.")
+        print(f"😎 Chatbot is ready! Session: {self.thread_id} (type 'quit' to exit).")
         while True:
             user_input = input("YOU: ")
             if user_input.lower() == "quit":
+                self.checkpointer.flush()
                 print("👋 Exiting!")
                 break
 
+            from langchain_core.messages import HumanMessage
+
             input_messages = [HumanMessage(content=user_input)]
             response = self.workflow.invoke({"messages": input_messages}, self.config_dict)
             print("Chatbot:", response["messages"][-1].content)
 
-    def call_model(self, state: MessagesState):
-        response = self.model.invoke(state["messages"])
-        return {"messages": response}
+    def call_model(self, state):
+        from langchain_core.messages import RemoveMessage
+
+        compaction = self.history_manager.compact(state["messages"], state.get("summary", ""))
+        response = self.model.invoke(compaction.messages)
+        # Folded turns are removed from the checkpointed state as well
+        removed = [RemoveMessage(id=message.id) for message in compaction.folded]
+        return {"messages": removed + [response], "summary": compaction.summary}
 
 if __name__ == "__main__":
-    chatbot = ChatBot()
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--session", help="resume an earlier session by its id")
+    args = parser.parse_args()
+
+    chatbot = ChatBot(session_id=args.session)
     chatbot.start_conversation()
 
@@ -1,14 +1,23 @@
 import os
+import csv
+import json
+import time
+import asyncio
+import argparse
 from dotenv import load_dotenv
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_mistralai import ChatMistralAI
 from pydantic import BaseModel, Field
 from typing import Optional
+from utils.lazy import Deferred
+from utils.rate_limit import AsyncRateLimiter, retry_async
+from utils.response_cache import ResponseCache
 
 # Load environment variables from .env file
 load_dotenv()
 MISTRAL_API_KEY = os.getenv("MISTRAL_API_KEY")
 
+# Same input text -> same extraction, kept across runs; the cache file is only read on first use
+response_cache = Deferred(lambda: ResponseCache(path="extraction_cache.pkl"))
+
 # Define the schema for the extracted information
 class Person(BaseModel):
     name: Optional[str] = Field(default=None, description="The name of the person")
@@ -16,6 +25,7 @@ class Person(BaseModel):
     hair_color: Optional[str] = Field(default=None, description="The hair color of the person if known")
 
 def build_prompt():
+    from langchain_core.prompts import ChatPromptTemplate
     return ChatPromptTemplate.from_messages([
         (
             "system",
@@ -27,17 +37,137 @@ def build_prompt():
         ("human", "{input}")
     ])
 
+_structured_llm = None
+
+def get_structured_llm():
+    """One client and structured-output runnable for the whole process."""
+    global _structured_llm
+    if _structured_llm is None:
+        from langchain_mistralai import ChatMistralAI
+        llm = ChatMistralAI(temperature=0, model="mistral-large-latest")
+        _structured_llm = llm.with_structured_output(schema=Person)
+    return _structured_llm
+
 def extract_and_display_info(input_text: str):
-    llm = ChatMistralAI(temperature=0, model="mistral-large-latest")
     prompt = build_prompt().invoke({"input": input_text})
-    structured_llm = llm.with_structured_output(schema=Person)
+    structured_llm = get_structured_llm()
 
-    response = structured_llm.invoke(prompt)
+    response = response_cache.get().cached(
+        "mistral-large-latest",
+        prompt,
+        lambda: structured_llm.invoke(prompt),
+        params={"temperature": 0, "schema": Person.model_json_schema()},
+    )
 
     print("\n--- Extraction Result ---")
     print("Input:", input_text)
     print("Output:", response)
 
+def read_snippets(path: str, text_field: str = "text", id_field: str = "id"):
+    """Stream (id, text) pairs from a JSONL or CSV file; rows without an id use their row number."""
+    with open(path, encoding="utf-8", newline="") as f:
+        if path.lower().endswith(".csv"):
+            rows = csv.DictReader(f)
+        else:
+            rows = (json.loads(line) for line in f if line.strip())
+        for number, row in enumerate(rows):
+            yield str(row.get(id_field, number)), row[text_field]
+
+def completed_ids(output_path: str) -> set:
+    """
+    Ids already extracted by an earlier (possibly interrupted) run.
+
+    The file is compacted first: error rows (those ids are retried), repeated ids and a
+    half-written last line are dropped, so reruns leave one row per id instead of piling up errors.
+    """
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    kept, dropped = [], 0
+    with open(output_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError:
+                dropped += 1  # half-written last line
+                continue
+            if "person" not in row or row["id"] in done:
+                dropped += 1
+                continue
+            done.add(row["id"])
+            kept.append(line if line.endswith("\n") else line + "\n")
+    if dropped:
+        tmp_path = output_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.writelines(kept)
+        os.replace(tmp_path, output_path)
+    return done
+
+async def extract_bulk(input_path: str, output_path: str, structured_llm=None, concurrency: int = 16,
+                       rate: Optional[float] = None, max_retries: int = 5, flush_every: int = 100) -> dict:
+    """
+    Extract a Person from every snippet in input_path and append one JSON row per snippet to output_path.
+
+    Up to `concurrency` requests run at once (and at most `rate` per second); failed
+    requests are retried with backoff. Rows are flushed as they complete, so a rerun
+    resumes after the last extracted id.
+    """
+    structured_llm = structured_llm or get_structured_llm()
+    prompt_template = build_prompt()
+    limiter = AsyncRateLimiter(rate) if rate else None
+    done = completed_ids(output_path)
+    queue = asyncio.Queue(maxsize=concurrency * 4)
+    stats = {"extracted": 0, "failed": 0, "skipped": 0}
+    start = time.perf_counter()
+
+    with open(output_path, "a+", encoding="utf-8") as out:
+        if out.tell():
+            out.seek(out.tell() - 1)
+            if out.read(1) != "\n":
+                out.write("\n")
+
+        async def worker():
+            while (item := await queue.get()) is not None:
+                record_id, text = item
+                prompt = prompt_template.invoke({"input": text})
+                try:
+                    result = await retry_async(lambda: structured_llm.ainvoke(prompt), max_retries, limiter=limiter)
+                    person = result if isinstance(result, Person) else Person.model_validate(result)
+                    row = {"id": record_id, "person": person.model_dump()}
+                    stats["extracted"] += 1
+                except Exception as e:
+                    row = {"id": record_id, "error": str(e)}
+                    stats["failed"] += 1
+                out.write(json.dumps(row) + "\n")
+                if (stats["extracted"] + stats["failed"]) % flush_every == 0:
+                    out.flush()
+
+        workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+        for record_id, text in read_snippets(input_path):
+            if record_id in done:
+                stats["skipped"] += 1
+                continue
+            await queue.put((record_id, text))
+        for _ in workers:
+            await queue.put(None)
+        await asyncio.gather(*workers)
+
+    stats["seconds"] = time.perf_counter() - start
+    stats["records_per_sec"] = stats["extracted"] / stats["seconds"] if stats["seconds"] else 0.0
+    return stats
+
 if __name__ == "__main__":
-    user_input_text = input("Enter a person's name, height, and hair color: ")
-    extract_and_display_info(user_input_text)
\ No newline at end of file
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--input", help="JSONL (with a 'text' field) or CSV (with a 'text' column) of snippets")
+    parser.add_argument("--output", default="people.jsonl")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--rate", type=float, help="max requests per second")
+    args = parser.parse_args()
+
+    if args.input:
+        report = asyncio.run(extract_bulk(args.input, args.output, concurrency=args.concurrency, rate=args.rate))
+        print(f"Extracted {report['extracted']} records ({report['failed']} failed, {report['skipped']} already done) "
+              f"in {report['seconds']:.1f}s: {report['records_per_sec']:.1f} records/sec")
+    else:
+        user_input_text = input("Enter a person's name, height, and hair color: ")
+        extract_and_display_info(user_input_text)
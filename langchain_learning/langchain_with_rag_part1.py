@@ -1,13 +1,231 @@
+import operator
 import os
-import bs4
+from typing import Annotated, TypedDict
 from dotenv import load_dotenv
-from typing import List
-from langchain_core.documents import Document
-from langchain_mistralai import MistralAIEmbeddings
-from langchain_core.vectorstores import InMemoryVectorStore
-from langchain_community.document_loaders import WebBaseLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langgraph.graph import StateGraph
+from utils.lazy import Deferred
+
+# Comma-separated pages or sitemaps (*.xml); RAG_WEB_URLS overrides
+WEB_URLS = "https://lilianweng.github.io/posts/2023-06-23-agent/"
+RETRIEVER_TIMEOUTS = {"web": 3.0, "blogs": 3.0, "data": 5.0}
+
+
+def index_documents(docs, embeddings, log: list, persist_dir=None):
+    """
+    Split, deduplicate and index documents; returns the hybrid (BM25 + vector) search over them.
+    With `persist_dir` the vector store is saved there and, while the documents, model and
+    index type stay the same, loaded on the next start instead of being split and indexed again.
+    """
+    from typing import List
+    from langchain_core.documents import Document
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+    from utils.embedding_cache import model_name_of
+    from utils.hybrid_search import HybridSearch
+    from utils.ingestion_pipeline import ingest
+    from utils.near_dedup import NearDuplicateFilter
+    from utils.tracing import tracer
+    from utils.vector_stores import build_vector_store, fingerprint, load_vector_store, save_vector_store
+
+    source = fingerprint(model_name_of(embeddings), os.getenv("VECTOR_INDEX", "exact"), 1000, 200, 0.85,
+                         [(doc.metadata, doc.page_content) for doc in docs])
+    # HYBRID_SHORTLIST=1 vector-scores only BM25 hits
+    shortlist_only = os.getenv("HYBRID_SHORTLIST") == "1"
+    if persist_dir:
+        with tracer.span("open_store") as span:
+            vector_store = load_vector_store(persist_dir, source, tracer.embeddings(embeddings))
+            if vector_store is not None:
+                # The BM25 side is rebuilt from the saved texts, which needs no embedding calls
+                search = HybridSearch(vector_store, shortlist_only=shortlist_only)
+                stored = vector_store.documents()
+                search.index.add([doc.id for doc in stored], [doc.page_content for doc in stored])
+                span.add("items", len(stored))
+                log.append(f"✅ Loaded {len(stored)} chunks from {persist_dir}/ (sources unchanged)")
+                return search
+
+    # Exact search by default, VECTOR_INDEX=ivf for approximate search on large corpora,
+    # VECTOR_INDEX=quantized for int8 codes with exact rescoring (a quarter of the memory scanned)
+    vector_store = build_vector_store(tracer.embeddings(embeddings))
+    # BM25 next to the vectors, fused by reciprocal rank
+    search = HybridSearch(vector_store, shortlist_only=shortlist_only)
+
+    splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
+    with tracer.span("split") as span:
+        chunks: List[Document] = splitter.split_documents(docs)
+        span.add("items", len(chunks))
+    # Drop repeated boilerplate before it is embedded; kept chunks list the duplicates' sources
+    dedupe = NearDuplicateFilter(threshold=0.85)
+    with tracer.span("dedupe") as span:
+        chunks = dedupe.deduplicate(chunks)
+        span.add("items", len(chunks))
+    log.append(f"🧹 Skipped {dedupe.stats.dropped} near-duplicate chunks "
+               f"({dedupe.stats.embedding_calls_saved} embedding calls, ~{dedupe.stats.bytes_saved() / 1024:.0f} KiB)")
+    with tracer.span("store") as span:
+        report = ingest(search, chunks, batch_size=64, max_workers=4)
+        span.add("items", report.chunks)
+    log.append(f"✅ Indexed {report.chunks} chunks ({report.chunks_per_sec:.1f} chunks/sec)")
+    if persist_dir:
+        # Builds the IVF lists or quantized codes now, so the next start maps them instead
+        save_vector_store(vector_store, persist_dir, source)
+    return search
+
+
+class RagState(TypedDict, total=False):
+    question: str
+    # One RetrieverHits per retriever node; parallel nodes' updates are concatenated
+    hits: Annotated[list, operator.add]
+    context: list
+    answer: str
+
+
+def format_context(docs) -> str:
+    return "\n\n".join(f"[{', '.join(doc.metadata.get('retrievers', []))}] {doc.page_content}" for doc in docs)
+
+
+def compile_graph(retrievers, llm=None, k: int = 6):
+    """
+    The RAG graph: one node per retriever, all started at once, each bounded by its own
+    timeout; `merge` fuses and deduplicates their hits, and `generate` answers from the
+    merged context (left out when `llm` is None). `retrievers` maps a name to
+    (callable returning documents for a question, timeout in seconds).
+    """
+    from langchain_core.prompts import ChatPromptTemplate
+    from langgraph.graph import END, START, StateGraph
+    from utils.multi_retrieval import FanOutRetriever
+    from utils.tracing import tracer
+
+    fan_out = FanOutRetriever(retrievers)
+    graph_builder = StateGraph(RagState)
+
+    # ✅ Define graph steps: retrieval nodes in the same step run concurrently
+    retrieve_nodes = []
+    for name in fan_out.retrievers:
+        def retrieve(state: RagState, name=name):
+            return {"hits": [fan_out.retrieve(name, state["question"])]}
+
+        retrieve = tracer.wrap(retrieve, "retrieve", items=lambda result, state: len(result["hits"][0].documents),
+                               retriever=name)
+        graph_builder.add_node(f"retrieve_{name}", retrieve)
+        graph_builder.add_edge(START, f"retrieve_{name}")
+        retrieve_nodes.append(f"retrieve_{name}")
+
+    def merge(state: RagState):
+        return {"context": fan_out.merge(state["hits"], k=k)}
+
+    graph_builder.add_node("merge", tracer.wrap(merge, "merge", items=lambda result, state: len(result["context"])))
+    # Waits for every retrieval node, each of which returns by its deadline
+    graph_builder.add_edge(retrieve_nodes, "merge")
+    if llm is None:
+        graph_builder.add_edge("merge", END)
+        return graph_builder.compile()
+
+    prompt = ChatPromptTemplate.from_messages([
+        ("system", "Answer the question using only the context below. Say so if it does not contain the answer. "
+                   "Each passage starts with the sources it came from.\n\n{context}"),
+        ("human", "{question}"),
+    ])
+
+    def generate(state: RagState):
+        # Tokens reach graph.stream(stream_mode="messages") as the model produces them
+        message = llm.invoke(prompt.invoke({"question": state["question"],
+                                            "context": format_context(state["context"])}))
+        return {"answer": message.content}
+
+    graph_builder.add_node("generate", generate)
+    graph_builder.add_edge("merge", "generate")
+    graph_builder.add_edge("generate", END)
+    return graph_builder.compile()
+
+
+def to_documents(nodes):
+    """LlamaIndex retrieval results as LangChain documents."""
+    from langchain_core.documents import Document
+
+    return [Document(page_content=node.get_content(), metadata={**node.metadata, "score": node.score})
+            for node in nodes]
+
+
+def load_blog_retriever(embeddings, log: list):
+    """The Chroma blog store built by semantic_search_using_chroma_db.py, if it exists here."""
+    if not os.path.isdir("chroma_storage"):
+        log.append("⚠️ No chroma_storage/ here, blog retriever skipped (run semantic_search_using_chroma_db.py)")
+        return None
+    try:
+        from langchain_learning.semantic_search_using_chroma_db import open_blog_store
+        store = open_blog_store(embeddings)
+    except ImportError as e:
+        log.append(f"⚠️ Blog retriever skipped: {e}")
+        return None
+    log.append("✅ Blog retriever: chroma_storage/")
+    return lambda question: store.similarity_search(question, k=4)
+
+
+def load_data_retriever(log: list):
+    """The persisted LlamaIndex index over LlamaIndex/data/, refreshed like LlamaIndex.py does."""
+    llama_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "LlamaIndex")
+    if not os.getenv("OPENAI_API_KEY"):
+        log.append("⚠️ OPENAI_API_KEY not set, data/ retriever skipped (its index uses OpenAI embeddings)")
+        return None
+    try:
+        from llama_index.core import Settings
+        from llama_index.embeddings.openai import OpenAIEmbedding
+        from utils.llama_index_embedding_cache import CachedLlamaIndexEmbedding
+        from utils.llama_index_store import load_index
+    except ImportError as e:
+        log.append(f"⚠️ data/ retriever skipped: {e}")
+        return None
+
+    # Same embedding model and cache as LlamaIndex.py, so the persisted vectors match the queries
+    Settings.embed_model = CachedLlamaIndexEmbedding(OpenAIEmbedding(),
+                                                     cache_dir=os.path.join(llama_dir, "embedding_cache"))
+    index, report = load_index(os.path.join(llama_dir, "data"), os.path.join(llama_dir, "storage"))
+    log.append(f"✅ data/ retriever: {report.unchanged + len(report.added) + len(report.changed)} files")
+    retriever = index.as_retriever(similarity_top_k=4)
+    return lambda question: to_documents(retriever.retrieve(question))
+
+
+def build_graph():
+    """Load and index every source and compile the RAG graph. Returns the graph and a log of what was done."""
+    # Heavy stacks are imported here so the prompt shows up before they load
+    from concurrent.futures import ThreadPoolExecutor
+    from langchain_mistralai import ChatMistralAI, MistralAIEmbeddings
+    from utils.embedding_cache import CachedEmbeddings
+    from utils.tracing import tracer
+    from utils.web_ingestion import WebIngestor
+
+    log = []
+
+    # ✅ Init embeddings
+    embeddings = CachedEmbeddings(MistralAIEmbeddings(model="mistral-embed"))
+
+    # The blog and data/ stores open while the web page is fetched and indexed
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        blogs = pool.submit(load_blog_retriever, embeddings, log)
+        data = pool.submit(load_data_retriever, log)
+
+        # ✅ Load web content, then split and index it
+        # Pages are revalidated against web_cache/ (ETag / Last-Modified): unchanged ones are not
+        # downloaded or parsed again, and their chunks come out of the embedding cache
+        web = WebIngestor(cache_dir="web_cache", classes=("post-title", "post-header", "post-content"))
+        urls = []
+        # A sitemap that fails to load is reported with the page errors below instead of stopping the build
+        for url in map(str.strip, os.getenv("RAG_WEB_URLS", WEB_URLS).split(",")):
+            urls += web.sitemap_urls(url) if url.endswith(".xml") else [url]
+        with tracer.span("load") as span:
+            docs = web.load(urls)
+            span.add("items", len(docs))
+            span.add("cache_hits", web.stats.not_modified + web.stats.unchanged)
+        web.close()
+        log.append(f"🌐 {web.stats}")
+        log.extend(f"⚠️ {url}: {error}" for url, error in web.errors.items())
+        # Saved in vector_store/: an unchanged set of pages is loaded, not split and embedded again
+        search = index_documents(docs, embeddings, log, persist_dir="vector_store")
+
+    # Per-retriever deadlines in seconds; a late retriever is left out of that answer
+    retrievers = {"web": (search.search, RETRIEVER_TIMEOUTS["web"])}
+    for name, retrieve in (("blogs", blogs.result()), ("data", data.result())):
+        if retrieve is not None:
+            retrievers[name] = (retrieve, RETRIEVER_TIMEOUTS[name])
+    log.append(f"💾 Embedding cache: {embeddings.cache.stats()}")
+    return compile_graph(retrievers, ChatMistralAI(model="mistral-large-latest")), log
 
 
 def run():
@@ -18,31 +236,9 @@ def run():
         print("❌ You need to set your MISTRAL_API_KEY environment variable")
         return
 
-    # ✅ Init embeddings & vector store
-    embeddings = MistralAIEmbeddings(model="mistral-embed")
-    vector_store = InMemoryVectorStore(embeddings)
-
-    # ✅ Load and split web content
-    strainer = bs4.SoupStrainer(class_=("post-title", "post-header", "post-content"))
-    loader = WebBaseLoader(
-        web_paths=("https://lilianweng.github.io/posts/2023-06-23-agent/",),
-        bs_kwargs={"parse_only": strainer},
-    )
-    docs = loader.load()
-
-    splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
-    chunks: List[Document] = splitter.split_documents(docs)
-    vector_store.add_documents(chunks)
-
-    # ✅ Define graph step
-    def retrieve(state: dict):
-        retrieved_docs = vector_store.similarity_search(state["question"])
-        return {"context": retrieved_docs}
-
-    # ✅ Build LangGraph
-    graph_builder = StateGraph(dict).add_node("retrieve", retrieve)
-    graph_builder.set_entry_point("retrieve")
-    graph = graph_builder.compile()
+    # Indexing runs in the background while the first question is typed
+    graph = Deferred(build_graph).prefetch()
+    log_shown = False
 
     # ✅ Repeatedly accept input
     while True:
@@ -51,11 +247,33 @@ def run():
             print("👋 Exiting. Goodbye!")
             break
 
-        result = graph.invoke({"question": user_question})
-
-        print("\n📄 Retrieved Context:")
-        for i, doc in enumerate(result["context"], 1):
-            print(f"\n--- Document {i} ---\n{doc.page_content[:500]}...\n")
+        if not graph.ready:
+            print("⏳ Still indexing...")
+        compiled, log = graph.get()
+        if not log_shown:
+            print("\n".join(log))
+            log_shown = True
+        from utils.tracing import tracer
+        with tracer.span("query"):
+            # RAG_TRACE_SPANS / RAG_TRACE_METRICS enable per-stage spans and metrics
+            stream = compiled.stream({"question": user_question}, config={"callbacks": tracer.callbacks()},
+                                     stream_mode=["updates", "messages"])
+            for mode, chunk in stream:
+                if mode == "messages":
+                    # ✅ Answer tokens as they are generated
+                    message, metadata = chunk
+                    if metadata.get("langgraph_node") == "generate" and message.content:
+                        print(message.content, end="", flush=True)
+                    continue
+                for node, update in chunk.items():
+                    for hits in (update or {}).get("hits", []):
+                        print(f"🔎 {hits.name}: {len(hits.documents)} documents in {hits.seconds:.2f}s"
+                              + ("" if hits.status == "ok" else f" ({hits.status})"))
+                    if node == "merge":
+                        sources = ", ".join(sorted({name for doc in update["context"]
+                                                    for name in doc.metadata["retrievers"]}))
+                        print(f"📄 {len(update['context'])} passages from {sources or 'no source'}\n")
+        print()
 
 
 # 🔁 Run the app
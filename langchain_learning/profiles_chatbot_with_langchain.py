@@ -1,38 +1,85 @@
 import os
+import argparse
+import hashlib
 from dotenv import load_dotenv
-from pymongo import MongoClient
-from langchain.chat_models import init_chat_model
-from langchain_core.prompts import ChatPromptTemplate
+from utils.lazy import Deferred
 
 load_dotenv()
 
 
 class ProfilesChatBot:
-    def __init__(self, api_key, model_name):
+    def __init__(self, api_key, model_name, use_retrieval=True, k=5, token_budget=1500, profiles_collection=None,
+                 model=None, embeddings=None):
         os.environ["MISTRAL_API_KEY"] = api_key
-        self.model = init_chat_model(model_name, model_provider="mistralai")
+        self.model_name = model_name
         self.profiles_context = ""
+        self.profiles_collection = profiles_collection
+        # A chat model / embedder passed in (e.g. offline fakes for benchmarks) replaces the Mistral ones
+        self.model = model
+        self.embeddings = embeddings
+        # Clients, caches and the first profile load run in the background while the prompt is shown
+        self._setup = Deferred(lambda: self.setup(use_retrieval, k, token_budget)).prefetch()
+
+    def setup(self, use_retrieval, k, token_budget):
+        from utils.profile_retrieval import ProfileRetriever
+        from utils.response_cache import ResponseCache
+
+        if self.model is None:
+            from langchain.chat_models import init_chat_model
+            self.model = init_chat_model(self.model_name, model_provider="mistralai")
+        if self.embeddings is None:
+            from langchain_mistralai import MistralAIEmbeddings
+            from utils.embedding_cache import CachedEmbeddings
+            self.embeddings = CachedEmbeddings(MistralAIEmbeddings(model="mistral-embed"))
+        # Retrieval mode: only the top-k matching profiles go into each prompt
+        self.profile_retriever = None
+        if use_retrieval:
+            self.profile_retriever = ProfileRetriever(self.embeddings, k=k, token_budget=token_budget)
+        # Repeated and near-duplicate questions are answered from the cache
+        self.response_cache = ResponseCache(embeddings=self.embeddings, path="profiles_response_cache.pkl")
         self.profiles_from_db()
 
+    @property
+    def ready(self):
+        return self._setup.ready
+
     def profiles_from_db(self):
-        mongo_url = os.getenv("MONGO_URI")
-        client = MongoClient(mongo_url)
-        db = client["app-dev"]
-        collection = db["profiles"]
-        profiles = collection.find()
-
-        profile_strings = []
-        for profile in profiles:
-            profile_str = f"Name: {profile.get('firstName', '')} {profile.get('lastName', '')}\n" \
-                          f"Expertise: {profile.get('areaOfExpertise', '')}\n" \
-                          f"Location: {profile.get('currentLocation', '')}\n" \
-                          f"Member Since: {profile.get('businessMemberSince', '')}\n" \
-                          f"Summary: {profile.get('carrierSummary', '')}\n"
-            profile_strings.append(profile_str)
-
-        self.profiles_context = "\n\n".join(profile_strings)
-
-    def chat(self, user_question: str):
+        from utils.profiles import get_profile_loader
+
+        # Shared, pooled loader: fetched once, then refreshed incrementally
+        self.profile_loader = get_profile_loader(self.profiles_collection)
+        self.profiles_version = None
+        self.sync_profiles()
+
+    def sync_profiles(self):
+        self.profile_loader.refresh()
+        if self.profile_loader.version == self.profiles_version:
+            return
+        if self.profiles_version is not None:
+            self.response_cache.invalidate("profiles")
+        # Answers cached in earlier runs only match while the profiles are the same
+        self.profiles_fingerprint = hashlib.sha256(self.profile_loader.context().encode()).hexdigest()
+        if self.profile_retriever is not None:
+            self.profile_retriever.load(self.profile_loader.profiles())
+        else:
+            self.profiles_context = self.profile_loader.context()
+        self.profiles_version = self.profile_loader.version
+
+    def chat(self, user_question: str, location=None, expertise=None):
+        from langchain_core.prompts import ChatPromptTemplate
+        from utils.tracing import tracer
+
+        self._setup.get()
+        self.sync_profiles()
+        profiles_context = self.profiles_context
+        if self.profile_retriever is not None:
+            with tracer.span("retrieve") as span:
+                selection = self.profile_retriever.select(user_question, location=location, expertise=expertise)
+                span.add("items", selection.profiles)
+            profiles_context = selection.context
+            print(f"📉 Using {selection.profiles} profiles: {selection.prompt_tokens} prompt tokens "
+                  f"instead of {selection.full_tokens} ({selection.tokens_saved} saved)")
+
         system_template = (
             "Here are the profiles:\n\n{profiles_context}\n\n"
             "Answer the following question based on the profiles above."
@@ -44,26 +91,41 @@ class ProfilesChatBot:
 
         # Fill in the prompt
         prompt = prompt_template.invoke({
-            "profiles_context": self.profiles_context,
+            "profiles_context": profiles_context,
             "question": user_question
         })
 
-        # Send to model
-        response = self.model.invoke(prompt)
-        return response.content
+        # Send to model (unless the same question was already answered on the same profiles)
+        return self.response_cache.cached(
+            self.model_name,
+            prompt,
+            # Traced as a `generate` span with token usage when RAG_TRACE_SPANS / RAG_TRACE_METRICS is set
+            lambda: self.model.invoke(prompt, config={"callbacks": tracer.callbacks()}).content,
+            params={"location": location, "expertise": expertise, "profiles": self.profiles_fingerprint},
+            semantic_text=user_question,
+            tags=("profiles",),
+        )
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--full-context", action="store_true", help="send every profile with each question")
+    parser.add_argument("--location", help="only consider profiles whose currentLocation contains this")
+    parser.add_argument("--expertise", help="only consider profiles whose areaOfExpertise contains this")
+    args = parser.parse_args()
+
     api_key = os.getenv("MISTRAL_API_KEY")
     if not api_key:
         print("Please set MISTRAL_API_KEY in your environment")
         exit(1)
 
-    chatbot = ProfilesChatBot(api_key, "mistral-large-latest")
+    chatbot = ProfilesChatBot(api_key, "mistral-large-latest", use_retrieval=not args.full_context)
 
     while True:
         user_input = input("\nAsk about a profile (or type 'exit'): ")
         if user_input.lower() == "exit":
             break
-        answer = chatbot.chat(user_input)
+        answer = chatbot.chat(user_input, location=args.location, expertise=args.expertise)
         print(f"\n {answer}")
+    if chatbot.ready:
+        print(f"Response cache: {chatbot.response_cache.report()}")
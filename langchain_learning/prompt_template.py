@@ -3,10 +3,12 @@ import os
 from dotenv import load_dotenv
 
 load_dotenv()
-from langchain.chat_models import init_chat_model
-from langchain_core.prompts import ChatPromptTemplate
 
 if __name__ == "__main__":
+    from langchain.chat_models import init_chat_model
+    from langchain_core.prompts import ChatPromptTemplate
+    from utils.response_cache import ResponseCache
+
     if not os.environ.get("MISTRAL_API_KEY"):
         os.environ["MISTRAL_API_KEY"] = os.getenv("Enter API key for Mistral AI: ")
 
@@ -20,6 +22,10 @@ if __name__ == "__main__":
     prompt = prompt_template.invoke({"language": "Urdu", "text": "My name is Zubiya"})
     print(prompt)
     print(prompt.to_messages())
-    response = model.invoke(prompt)
+    response_cache = ResponseCache(path="prompt_template_cache.pkl")
+    content = response_cache.cached(
+        "mistral-large-latest", prompt, lambda: model.invoke(prompt).content
+    )
 
-    print(response.content)
\ No newline at end of file
+    print(content)
+    print(response_cache.report())
\ No newline at end of file
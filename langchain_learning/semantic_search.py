@@ -1,61 +1,96 @@
 import getpass
 import os
+from itertools import chain as chain_iter, islice
 from dotenv import load_dotenv
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_community.document_loaders import PyPDFLoader
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_core.vectorstores import InMemoryVectorStore
 from typing import List
-from langchain_core.documents import Document
-from langchain_core.runnables import chain
 
 load_dotenv()
 
 if __name__ == '__main__':
+    # Imported here: PDF workers re-import this module and only need utils.pdf_pipeline
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+    from langchain_core.documents import Document
+    from langchain_core.runnables import chain
+    from utils.embedding_cache import CachedEmbeddings, model_name_of
+    from utils.embedding_worker import connect_or_load
+    from utils.hybrid_search import HybridSearch
+    from utils.ingestion_pipeline import ingest
+    from utils.pdf_pipeline import PdfChunkStream, peak_rss_mb
+    from utils.tracing import tracer
+    from utils.vector_stores import build_vector_store, fingerprint, load_vector_store, save_vector_store
+
     # Set Mistral API key
     if not os.environ.get("MISTRAL_API_KEY"):
         print("mistral")
         os.environ["MISTRAL_API_KEY"] = getpass.getpass("Enter API key for Mistral AI: ")
 
-    # Load Pdf--------------------------------------------------------------------------
-    file_path = "example_file.pdf"
-    loader = PyPDFLoader(file_path)
-    docs = loader.load()
-    print(len(docs))
-    print(f"{docs[0].page_content[:200]}\n")
-    print(docs[0].metadata)
-
-    # Split into chunks------------------------------------------------------------
-    text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=1000, chunk_overlap=200, add_start_index=True
-    )
-    all_splits = text_splitter.split_documents(docs)
-    print(len(all_splits))
-
     # Set OpenAI API key--------------------------------------------------------------
     if not os.environ.get("OPENAI_API_KEY"):
         os.environ["OPENAI_API_KEY"] = getpass.getpass("Enter API key for OpenAI: ")
         print("API key set via prompt")
 
     # Embedding logic----------------------------------------------------------
-    embeddings = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
-    vector_1 = embeddings.embed_query(all_splits[0].page_content)
-    vector_2 = embeddings.embed_query(all_splits[1].page_content)
+    # Cached on disk: re-running over the same PDF skips the model entirely.
+    # With `python -m utils.embedding_worker` running, the warm model is shared instead of loaded here
+    # RAG_TRACE_SPANS / RAG_TRACE_METRICS time every stage (embed, store, retrieve) to local files
+    embeddings = tracer.embeddings(CachedEmbeddings(connect_or_load("sentence-transformers/all-MiniLM-L6-v2")))
+    # Load Pdf and split into chunks as pages arrive (a PDF file or a directory of PDFs)
+    file_path = "example_file.pdf"
+    text_splitter = RecursiveCharacterTextSplitter(
+        chunk_size=1000, chunk_overlap=200, add_start_index=True
+    )
+    pdf_stream = PdfChunkStream(file_path, text_splitter)
 
-    assert len(vector_1) == len(vector_2)
-    print(f"Generated vectors of length {len(vector_1)}\n")
-    print(vector_1[:10])
+    # Saved in vector_store/ and loaded on the next run while the PDFs, model and index type are unchanged;
+    # processes loading it share the memory-mapped vectors (and IVF lists or quantized codes)
+    store_dir = "vector_store"
+    source = fingerprint(model_name_of(embeddings), os.getenv("VECTOR_INDEX", "exact"), 1000, 200,
+                         [(path, os.stat(path).st_size, os.stat(path).st_mtime_ns) for path in pdf_stream.paths])
+    vector_store = load_vector_store(store_dir, source, embeddings)
+    if vector_store is not None:
+        # BM25 index kept next to the vectors, rebuilt from the saved texts without embedding anything
+        search = HybridSearch(vector_store, shortlist_only=os.getenv("HYBRID_SHORTLIST") == "1")
+        stored = vector_store.documents()
+        search.index.add([doc.id for doc in stored], [doc.page_content for doc in stored])
+        print(f"Loaded {len(stored)} chunks from {store_dir}/\n")
+    else:
+        # Exact search by default, VECTOR_INDEX=ivf for approximate search on large corpora,
+        # VECTOR_INDEX=quantized for int8 codes with exact rescoring (a quarter of the memory scanned)
+        vector_store = build_vector_store(embeddings)
+        # BM25 index kept next to the vectors; exact terms like "2023" or "Nike" rank by both
+        search = HybridSearch(vector_store, shortlist_only=os.getenv("HYBRID_SHORTLIST") == "1")
 
-    vector_store = InMemoryVectorStore(embeddings)
-    ids = vector_store.add_documents(documents=all_splits)
-    results = vector_store.similarity_search(
+        chunks = iter(pdf_stream)
+        first_splits = list(islice(chunks, 2))
+        if not first_splits:
+            raise SystemExit(f"No text found in {file_path}")
+        print(f"{first_splits[0].page_content[:200]}\n")
+        print(first_splits[0].metadata)
+
+        # A one-chunk PDF has no second chunk to compare with
+        vectors = [embeddings.embed_query(split.page_content) for split in first_splits]
+        assert len({len(vector) for vector in vectors}) == 1
+        print(f"Generated vectors of length {len(vectors[0])}\n")
+        print(vectors[0][:10])
+
+        # Chunks stream straight into embedding and storage, batch by batch
+        with tracer.span("load_split_store") as span:
+            report = ingest(search, chain_iter(first_splits, chunks))
+            stats = pdf_stream.stats
+            span.add("items", report.chunks)
+            span.set("pages", stats.pages)
+        print(f"{stats.pages} pages -> {report.chunks} chunks in {stats.seconds:.1f}s "
+              f"({stats.pages_per_sec:.1f} pages/sec, peak RSS {peak_rss_mb():.0f} MB)")
+        save_vector_store(vector_store, store_dir, source)
+    tracer.instrument(search, "search", "retrieve", items=lambda docs, *args, **kwargs: len(docs))
+    results = search.search(
         "How many countries does Nike operate in?"
     )
     print(results[0])
 
     @chain
     def retriever(query: str) -> List[Document]:
-        return vector_store.similarity_search(query, k=1)
+        return search.search(query, k=1)
 
 
     queries=[
@@ -66,4 +101,6 @@ if __name__ == '__main__':
     for i, result in enumerate(results):
      print(f"\nResult {i+1}:\n{result[0].page_content}")
 
+    print(f"\nEmbedding cache: {embeddings.cache.stats()}")
+
 
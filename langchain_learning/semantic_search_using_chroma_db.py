@@ -1,11 +1,5 @@
 import os
 from dotenv import load_dotenv
-from bson.json_util import dumps  # ✅ Proper JSON serializer for MongoDB
-from pymongo import MongoClient
-from langchain_mistralai import MistralAIEmbeddings
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain.schema import Document
-from langchain_community.vectorstores import Chroma
 
 # Load environment variables
 load_dotenv()
@@ -13,8 +7,20 @@ load_dotenv()
 MONGO_URI = os.getenv("MONGO_URI")
 MISTRAL_API_KEY = os.getenv("MISTRAL_API_KEY")
 
+def open_blog_store(embeddings, persist_directory="chroma_storage"):
+    """The persisted Chroma collection of blog chunks (also searched by langchain_with_rag_part1)."""
+    from langchain_community.vectorstores import Chroma
+
+    return Chroma(
+        collection_name="blog_vector_db",
+        embedding_function=embeddings,
+        persist_directory=persist_directory
+    )
+
+
 # Main function that handles all vector search operations
-def vector_search_app():
+# mongo_collection can be any pymongo-like collection (e.g. a mongomock one for local runs)
+def vector_search_app(mongo_collection=None, chunk_limit=None):
     # Validate environment variables
     if not MISTRAL_API_KEY:
         print("❌ MISTRAL_API_KEY not found in environment. Please check your .env file.")
@@ -22,22 +28,33 @@ def vector_search_app():
     if not MONGO_URI:
         print("❌ MONGO_URI not found in environment. Please check your .env file.")
 
-    # Initialize components
-    embeddings = MistralAIEmbeddings(model="mistral-embed")
+    # Heavy stacks load only when the app actually runs
+    from langchain_mistralai import MistralAIEmbeddings
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
+    from utils.blog_documents import BlogDocumentBuilder
+    from utils.blog_sync import sync_blogs
+    from utils.embedding_cache import CachedEmbeddings
+    from utils.near_dedup import NearDuplicateFilter
+    from utils.tracing import tracer
+
+    # Initialize components (RAG_TRACE_SPANS / RAG_TRACE_METRICS time each stage to local files)
+    embeddings = tracer.embeddings(CachedEmbeddings(MistralAIEmbeddings(model="mistral-embed")))
     splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=100)
+    # Only title/body text is embedded; _id, author, dates and tags become filterable metadata
+    builder = BlogDocumentBuilder()
 
     # Initialize Chroma collection
-    collection = Chroma(
-        collection_name="blog_vector_db",
-        embedding_function=embeddings,
-        persist_directory="chroma_storage"
-    )
+    collection = open_blog_store(embeddings)
+    tracer.instrument(collection, "add_documents", "store", items=lambda ids, documents, **kwargs: len(documents))
+    tracer.instrument(collection, "similarity_search", "retrieve", items=lambda docs, *args, **kwargs: len(docs))
 
 #mongo db connection to retrieve all documents of blog
     try:
-            print("🔄 Connecting to MongoDB...")
-            client = MongoClient(MONGO_URI)
-            mongo_collection = client["app-dev"]["blogs"]
+            if mongo_collection is None:
+                print("🔄 Connecting to MongoDB...")
+                from pymongo import MongoClient
+                client = MongoClient(MONGO_URI)
+                mongo_collection = client["app-dev"]["blogs"]
             blog_docs = list(mongo_collection.find({}))
             print(f"📄 Found {len(blog_docs)} blog documents.")
 
@@ -45,32 +62,27 @@ def vector_search_app():
                 print("❌ No documents retrieved from MongoDB.")
                 return False
 
-            # Prepare documents
-            documents = []
-            for blog in blog_docs:
-                full_text = dumps(blog, indent=2)
-                doc = Document(
-                    page_content=full_text,
-
-                )
-                documents.append(doc)
-            print(f"✅ Prepared {len(documents)} documents for embedding.")
-
-            # Split docs into chunks
-            print("✂️ Splitting documents into chunks...")
-            chunks = splitter.split_documents(documents)
-            print(f"🔨 Split into {len(chunks)} chunks.")
-
-            # Limit chunks if needed
-            chunk_limit = 100
-            limited_chunks = chunks[:chunk_limit]
-            print(f"🔨 Using the first {len(limited_chunks)} chunks.")
-
-            # Add documents to vector store
-            print(f"🚀 Adding {len(limited_chunks)} chunks to Chroma...")
-            collection.add_documents(limited_chunks)
-            collection.persist()
-            print(f"✅ Successfully stored {len(limited_chunks)} chunks in Chroma.")
+            # Sync chunks into Chroma: only new or changed chunks get embedded
+            print("🔄 Syncing blog chunks with Chroma...")
+            report = sync_blogs(
+                blog_docs,
+                collection,
+                splitter,
+                to_document=builder,
+                # Repeated boilerplate across blogs is embedded once
+                dedupe=NearDuplicateFilter(threshold=0.85),
+                chunk_limit=chunk_limit,
+            )
+            print(f"🔨 {report.chunks} chunks from {report.blogs} blogs, {report.unchanged_chunks} already indexed, "
+                  f"{report.duplicate_chunks} near-duplicates skipped.")
+            print(f"🚀 Added {report.added_chunks} chunks ({report.chunks_per_sec:.1f} chunks/sec), "
+                  f"deleted {report.deleted_chunks} stale chunks, "
+                  f"updated the metadata of {report.updated_chunks}.")
+            if report.deferred_chunks:
+                print(f"⏳ {report.deferred_chunks} chunks left for the next sync (limit {chunk_limit}).")
+            if report.added_chunks or report.deleted_chunks or report.updated_chunks:
+                collection.persist()
+            print(f"💾 Embedding cache: {embeddings.cache.stats()}")
 
     except Exception as e:
             print(f"❌ Error building vector database: {e}")
@@ -80,17 +92,22 @@ def vector_search_app():
     print("\n🔎 Vector database ready for searching!")
 
     while True:
-        query = input("\n🔎 Enter search query (or type 'exit'): ")
+        query = input("\n🔎 Enter search query, filters like tag:python author:\"Jane Doe\" since:2024-01-01 "
+                      "(or type 'exit'): ")
         if query.lower() == "exit":
             print("🚪 Exiting the semantic search...")
             break
 
         # Perform search
         try:
-            print(f"🔍 Performing semantic search for query: '{query}'...")
-
-            # Get results
-            results = collection.similarity_search(query, k=1)
+            errors = []
+            query, where = builder.parse_query(query, errors)
+            for error in errors:
+                print(f"⚠️ {error}")
+            print(f"🔍 Performing semantic search for query: '{query}'" + (f" where {where}..." if where else "..."))
+
+            # The where filter narrows candidates inside Chroma before vector scoring
+            results = collection.similarity_search(query, k=1, filter=where)
 
             if results:
                 print(f"\n📝 Found {len(results)} relevant documents:")
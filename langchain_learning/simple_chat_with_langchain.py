@@ -1,13 +1,14 @@
 import getpass
 import os
 from dotenv import load_dotenv
-from langchain.chat_models import init_chat_model
-from langchain_core.messages import HumanMessage, SystemMessage
 
 
 load_dotenv()
 
 if __name__ == '__main__':
+    from langchain.chat_models import init_chat_model
+    from langchain_core.messages import HumanMessage, SystemMessage
+
     if not os.environ.get("MISTRAL_API_KEY"):
         os.environ["MISTRAL_API_KEY"] = getpass.getpass("Enter API key for Mistral AI: ")
 
@@ -1,11 +1,12 @@
 import os
-from mistralai import Mistral
 
 from dotenv import load_dotenv
 
 load_dotenv()
 
 if __name__ == '__main__':
+    from mistralai import Mistral
+
     api_key = os.getenv('MISTRAL_API_KEY')
     if api_key is None:
         print('You need to set your MISTRAL_API_KEY environment variable')
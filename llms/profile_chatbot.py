@@ -1,15 +1,28 @@
 import os
-from mistralai import Mistral
+import argparse
 from dotenv import  load_dotenv
 load_dotenv()
-from pymongo import MongoClient
+from utils.chat_history import HistoryManager, llm_summarizer
 
 class ChatBot:
-    def __init__(self,api_key ,model):
+    def __init__(self,api_key ,model, profile_retriever=None, location=None, expertise=None, history_manager=None,
+                 client=None):
         self.api_key=api_key
         self.model= model
         self.conversation_history=[]
-        self.mistral_client=Mistral(api_key=api_key)
+        # Any client with Mistral's chat.complete/chat.stream (e.g. utils.fakes.FakeMistralClient) can be passed in
+        if client is None:
+            from mistralai import Mistral
+            client=Mistral(api_key=api_key)
+        self.mistral_client=client
+        # With a retriever, each request carries only the profiles relevant to the question
+        self.profile_retriever=profile_retriever
+        self.location=location
+        self.expertise=expertise
+        self.profile_loader=None
+        # Old turns are folded into a rolling summary so each request stays under the budget
+        self.history_manager=history_manager or HistoryManager(summarizer=llm_summarizer(self.complete))
+        self.summary=""
 
     def run(self):
         while True:
@@ -24,47 +37,84 @@ class ChatBot:
         self .conversation_history.append(user_message)
         return  user_message
 
+    def build_messages(self):
+        if self.profile_loader is None:
+            return self.conversation_history
+        return [self.profiles_system_message()] + self.conversation_history
+
+    def complete(self, prompt):
+        response = self.mistral_client.chat.complete(
+            model=self.model,
+            messages=[{"role": "user", "content": prompt}]
+        )
+        return response.choices[0].message.content
+
     def send_request(self):
+        messages = self.build_messages()
+        compaction = self.history_manager.compact(messages, self.summary)
+        self.summary = compaction.summary
+        # The profile message is rebuilt for every request, so keep only the conversation itself
+        self.conversation_history = compaction.history[len(messages) - len(self.conversation_history):]
+
         stream_response = self.mistral_client.chat.stream(
             model=self.model,
-            messages=self.conversation_history
+            messages=compaction.messages
         )
-        buffer = ""
+        parts = []
         for chunk in stream_response:
          content=chunk.data.choices[0].delta.content
          if content:
-             buffer += content
+             parts.append(content)
              print(content, end="")
+        self.conversation_history.append({
+            "role": "assistant",
+            "content": "".join(parts)
+        })
+        print(f"\n[{compaction.tokens} request tokens]")
 
 
-    def initialize_context_from_db(self):
-        mongo_url = os.getenv("MONGO_URI")
-        client = MongoClient(mongo_url)
-        db = client["app-dev"]
-        collection = db["profiles"]
-        profiles = collection.find()
-
-        profile_strings = []
-        for profile in profiles:
-            profile_str = f"Name: {profile.get('firstName', '')} {profile.get('lastName', '')}\n" \
-                      f"Expertise: {profile.get('areaOfExpertise', '')}\n" \
-                      f"Location: {profile.get('currentLocation', '')}\n" \
-                      f"Member Since: {profile.get('businessMemberSince', '')}\n" \
-                      f"Summary: {profile.get('carrierSummary', '')}\n"
-            profile_strings.append(profile_str)
+    def initialize_context_from_db(self, collection=None):
+        from utils.profiles import get_profile_loader
+        # Shared, pooled loader: fetched once, then refreshed incrementally before each request
+        self.profile_loader = get_profile_loader(collection)
+        self.profiles_version = None
 
-        full_context = "\n\n".join(profile_strings)
-        self.conversation_history.append({
-        "role": "system",
-        "content": f"The following are the details of professionals in the system:\n\n{full_context}"
-    })
+    def profiles_system_message(self):
+        self.profile_loader.refresh()
+        if self.profile_retriever is None:
+            context = self.profile_loader.context()
+        else:
+            if self.profile_loader.version != self.profiles_version:
+                self.profile_retriever.load(self.profile_loader.profiles())
+                self.profiles_version = self.profile_loader.version
+            question = self.conversation_history[-1]["content"]
+            selection = self.profile_retriever.select(question, location=self.location, expertise=self.expertise)
+            print(f"[{selection.profiles} profiles, {selection.prompt_tokens} prompt tokens, "
+                  f"{selection.tokens_saved} saved]")
+            context = selection.context
+        return {
+            "role": "system",
+            "content": f"The following are the details of professionals in the system:\n\n{context}"
+        }
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--full-context", action="store_true", help="send every profile with each request")
+    parser.add_argument("--location", help="only consider profiles whose currentLocation contains this")
+    parser.add_argument("--expertise", help="only consider profiles whose areaOfExpertise contains this")
+    args = parser.parse_args()
+
     api_key=os.getenv('MISTRAL_API_KEY')
     if api_key is None:
         print("please set environment variable key")
         exit(1)
 
-    chat_bot=ChatBot(api_key,"mistral-large-latest")
+    profile_retriever = None
+    if not args.full_context:
+        from langchain_mistralai import MistralAIEmbeddings
+        from utils.embedding_cache import CachedEmbeddings
+        from utils.profile_retrieval import ProfileRetriever
+        profile_retriever = ProfileRetriever(CachedEmbeddings(MistralAIEmbeddings(model="mistral-embed")))
+    chat_bot=ChatBot(api_key,"mistral-large-latest", profile_retriever, args.location, args.expertise)
     chat_bot.initialize_context_from_db()
-    chat_bot.run()
\ No newline at end of file
+    chat_bot.run()
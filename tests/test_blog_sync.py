@@ -0,0 +1,113 @@
+from datetime import datetime
+
+from bson import ObjectId
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from benchmarks.rag.stand_ins import ChromaLikeStore
+from utils.blog_documents import BlogDocumentBuilder
+from utils.blog_sync import sync_blogs
+from utils.fakes import FakeEmbeddings
+from utils.near_dedup import NearDuplicateFilter
+
+
+def make_blog(title: str, content: str, **fields) -> dict:
+    return {"_id": ObjectId(), "title": title, "content": content, "author": {"name": "Jane Doe"},
+            "tags": ["python", "rag"], "createdAt": datetime(2024, 1, 1), **fields}
+
+
+def sync(blogs, store, **kwargs):
+    splitter = RecursiveCharacterTextSplitter(chunk_size=200, chunk_overlap=0)
+    return sync_blogs(blogs, store, splitter, to_document=BlogDocumentBuilder(), max_workers=1, **kwargs)
+
+
+def test_second_sync_embeds_nothing():
+    embeddings = FakeEmbeddings(size=16)
+    store = ChromaLikeStore(embeddings)
+    blogs = [make_blog(f"Post {i}", " ".join(["words about vector search"] * 30)) for i in range(3)]
+    first = sync(blogs, store)
+    embedded = embeddings.texts_embedded
+
+    second = sync(blogs, store)
+    assert first.added_chunks == first.chunks > 0
+    assert second.added_chunks == second.deleted_chunks == 0
+    assert second.unchanged_chunks == second.chunks
+    assert embeddings.texts_embedded == embedded
+
+
+def test_edit_and_delete_only_touch_that_blog():
+    store = ChromaLikeStore(FakeEmbeddings(size=16))
+    blogs = [make_blog(f"Post {i}", f"Body of post {i}.") for i in range(3)]
+    sync(blogs, store)
+    kept = {chunk_id for chunk_id in store.get()["ids"] if chunk_id.startswith(str(blogs[2]["_id"]))}
+
+    blogs[0]["content"] = "Rewritten body."
+    report = sync(blogs[:1] + blogs[2:], store)
+    assert report.added_chunks == 1
+    assert report.deleted_chunks == 2
+    assert kept <= set(store.get()["ids"])
+    assert not any(chunk_id.startswith(str(blogs[1]["_id"])) for chunk_id in store.get()["ids"])
+
+
+def test_chunk_limit_defers_the_rest_to_the_next_sync():
+    store = ChromaLikeStore(FakeEmbeddings(size=16))
+    blogs = [make_blog(f"Post {i}", f"Body of post {i}.") for i in range(5)]
+    first = sync(blogs, store, chunk_limit=2)
+    second = sync(blogs, store)
+    assert (first.added_chunks, first.deferred_chunks) == (2, 3)
+    assert (second.added_chunks, second.unchanged_chunks) == (3, 2)
+
+
+def test_counter_changes_update_metadata_without_new_ids():
+    embeddings = FakeEmbeddings(size=16)
+    store = ChromaLikeStore(embeddings)
+    blogs = [make_blog(f"Post {i}", " ".join(["words about vector search"] * 30), views=10) for i in range(2)]
+    sync(blogs, store)
+    ids, embedded = set(store.get()["ids"]), embeddings.texts_embedded
+
+    blogs[0]["views"] = 11
+    blogs[0]["updatedAt"] = datetime(2024, 2, 1)
+    report = sync(blogs, store)
+    assert set(store.get()["ids"]) == ids
+    assert embeddings.texts_embedded == embedded
+    assert report.updated_chunks == sum(chunk_id.startswith(str(blogs[0]["_id"])) for chunk_id in ids)
+    assert {doc.metadata["views"] for doc in store.documents() if doc.metadata["blog_id"] == str(blogs[0]["_id"])} \
+        == {11}
+    assert sync(blogs, store).updated_chunks == 0
+
+
+def test_retagging_refreshes_the_filterable_fields():
+    store = ChromaLikeStore(FakeEmbeddings(size=16))
+    blog = make_blog("Post", "Body of the post.")
+    sync([blog], store)
+    blog["tags"] = ["python"]
+    report = sync([blog], store)
+    assert (report.added_chunks, report.deleted_chunks) == (1, 1)
+    assert store.similarity_search("post", filter={"tag:rag": True}) == []
+    assert len(store.similarity_search("post", filter={"tag:python": True})) == 1
+
+
+def test_parse_query_only_filters_on_known_keys():
+    builder = BlogDocumentBuilder()
+    errors = []
+    query, where = builder.parse_query('tag:Python author:"Jane Doe" ratio 16:9 see http://example.com/a:b '
+                                       'since:2024-13-01 until:2024-02-01', errors)
+    assert query == "ratio 16:9 see http://example.com/a:b"
+    assert where == {"$and": [{"tag:python": True}, {"author": "Jane Doe"}, {"createdAt_ts": {"$lt": 1706745600}}]}
+    assert errors == ["since:2024-13-01 ignored, expected a date like 2024-01-31"]
+    assert builder.parse_query("views:10 popular posts") == ("views:10 popular posts", None)
+
+
+def test_repeated_boilerplate_in_a_new_blog_keeps_other_ids():
+    boilerplate = "Subscribe to the newsletter for weekly posts about search, vectors and deployment."
+    store = ChromaLikeStore(FakeEmbeddings(size=16))
+    blogs = [make_blog("Post 0", f"First post body.\n\n{boilerplate}")]
+    sync(blogs, store, dedupe=NearDuplicateFilter(threshold=0.85))
+    ids = set(store.get()["ids"])
+
+    blogs.append(make_blog("Post 1", f"Second post body.\n\n{boilerplate}"))
+    report = sync(blogs, store, dedupe=NearDuplicateFilter(threshold=0.85))
+    assert ids <= set(store.get()["ids"])
+    assert (report.deleted_chunks, report.duplicate_chunks) == (0, 1)
+    assert report.updated_chunks >= 1
+    sources = [doc.metadata.get("duplicate_sources") for doc in store.documents()]
+    assert str(blogs[1]["_id"]) in sources
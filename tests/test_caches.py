@@ -0,0 +1,106 @@
+from utils.embedding_cache import CachedEmbeddings, EmbeddingCache
+from utils.fakes import BagOfWordsEmbeddings, FakeEmbeddings
+from utils.response_cache import ResponseCache
+
+
+def test_embedding_cache_only_embeds_misses_and_survives_a_restart(tmp_path):
+    inner = FakeEmbeddings(size=8)
+    embeddings = CachedEmbeddings(inner, cache_dir=str(tmp_path))
+    first = embeddings.embed_documents(["a", "b", "a"])
+    assert inner.texts_embedded == 2
+    embeddings.cache.flush()
+
+    restarted_inner = FakeEmbeddings(size=8)
+    restarted = CachedEmbeddings(restarted_inner, cache_dir=str(tmp_path))
+    assert restarted.embed_documents(["b", "a", "c"]) == [first[1], first[0], inner.embed_documents(["c"])[0]]
+    assert restarted_inner.texts_embedded == 1
+
+
+def test_evicted_rows_are_not_reused_before_the_index_drops_them(tmp_path):
+    vectors = {key: [float(i)] * 4 for i, key in enumerate("abcdefgh")}
+    cache = EmbeddingCache(str(tmp_path), "model", max_entries=4, flush_interval=3600)
+    cache.put_many({key: vectors[key] for key in "abcd"})
+    cache.flush()
+    for key in "efgh":
+        cache.put_many({key: vectors[key]})
+
+        # What a process starting after a crash right now would read
+        reopened = EmbeddingCache(str(tmp_path), "model", max_entries=4)
+        found = reopened.get_many(list(vectors))
+        assert found and all(vector == vectors[key] for key, vector in found.items())
+    assert cache.evictions == 4
+    assert sorted(cache.get_many(list(vectors))) == list("efgh")
+
+
+def test_response_cache_hits_after_normalising_the_prompt():
+    cache = ResponseCache()
+    cache.put("model", "What is  RAG?", "answer")
+    assert cache.get("model", "what is rag?") == "answer"
+    assert cache.get("model", "what is rag?", params={"temperature": 1}) is None
+
+
+def test_response_cache_invalidates_by_tag_and_persists(tmp_path):
+    path = str(tmp_path / "responses.pkl")
+    cache = ResponseCache(path=path)
+    cache.put("model", "profiles question", "old", tags=("profiles",))
+    cache.put("model", "blog question", "kept", tags=("blogs",))
+    assert cache.invalidate("profiles") == 1
+    cache.save()
+
+    restarted = ResponseCache(path=path)
+    assert restarted.get("model", "profiles question") is None
+    assert restarted.get("model", "blog question") == "kept"
+
+
+def test_response_cache_semantic_tier_serves_close_questions():
+    cache = ResponseCache(embeddings=FakeEmbeddings(size=8), similarity_threshold=0.99)
+    cache.put("model", "full prompt one", "answer", semantic_text="same question")
+    assert cache.get("model", "full prompt two", semantic_text="same question") == "answer"
+    assert cache.get("model", "full prompt three", semantic_text="other question") is None
+
+
+def test_response_cache_entries_expire(monkeypatch, tmp_path):
+    now = [1000.0]
+    monkeypatch.setattr("utils.response_cache.time.time", lambda: now[0])
+    path = str(tmp_path / "responses.pkl")
+    cache = ResponseCache(ttl=60, embeddings=FakeEmbeddings(size=8), similarity_threshold=0.99, path=path)
+    cache.put("model", "question", "answer", semantic_text="question")
+    cache.save()
+    now[0] += 59
+    assert cache.get("model", "question") == "answer"
+    now[0] += 2
+    assert cache.get("model", "question") is None
+    assert cache.get("model", "other prompt", semantic_text="question") is None
+    assert ResponseCache(ttl=60, path=path).get("model", "question") is None
+    assert cache.report()["expired"] == 1
+
+
+def test_response_cache_evicts_the_least_recently_used():
+    cache = ResponseCache(max_entries=2)
+    cache.put("model", "a", 1)
+    cache.put("model", "b", 2)
+    assert cache.get("model", "a") == 1
+    cache.put("model", "c", 3)
+    assert [cache.get("model", prompt) for prompt in "abc"] == [1, None, 3]
+    assert cache.report()["evictions"] == 1
+
+
+def test_response_cache_computes_once():
+    cache = ResponseCache()
+    calls = []
+    for _ in range(3):
+        assert cache.cached("model", "prompt", lambda: calls.append(1) or "answer") == "answer"
+    assert len(calls) == 1
+
+
+def test_semantic_tier_matches_paraphrases_within_one_model_and_params():
+    cache = ResponseCache(embeddings=BagOfWordsEmbeddings(size=256), similarity_threshold=0.9)
+    cache.put("model", "Who works on vector databases in Pune?", "Ada", tags=("profiles",))
+    assert cache.get("model", "Who works on vector databases in Pune today?") == "Ada"
+    assert cache.get("model", "Who designs payment systems in Berlin?") is None
+    assert cache.get("other-model", "Who works on vector databases in Pune today?") is None
+    assert cache.get("model", "Who works on vector databases in Pune today?", params={"temperature": 1}) is None
+    assert cache.report()["semantic_hits"] == 1
+
+    cache.invalidate("profiles")
+    assert cache.get("model", "Who works on vector databases in Pune today?") is None
@@ -0,0 +1,56 @@
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+from utils.chat_history import SUMMARY_PREFIX, HistoryManager, message_tokens
+
+
+def conversation(turns: int, system: str = "You answer questions about the profiles below.\n" + "Profile. " * 50):
+    messages = [{"role": "system", "content": system}]
+    for i in range(turns):
+        messages.append({"role": "user", "content": f"Question {i}: " + "words " * 40})
+        messages.append({"role": "assistant", "content": f"Answer {i}: " + "words " * 40})
+    return messages
+
+
+def test_compact_keeps_pinned_messages_and_the_budget():
+    messages = conversation(30)
+    compaction = HistoryManager(token_budget=800, keep_recent=4).compact(messages)
+    assert compaction.messages[0] == messages[0]
+    assert compaction.messages[1]["content"].startswith(SUMMARY_PREFIX)
+    assert compaction.messages[-4:] == messages[-4:]
+    assert compaction.folded == messages[1:len(messages) - len(compaction.messages) + 2]
+    assert compaction.tokens == sum(message_tokens(m) for m in compaction.messages)
+    assert compaction.tokens - message_tokens(compaction.messages[1]) <= 800
+
+
+def test_small_histories_are_sent_unchanged():
+    messages = conversation(2)
+    compaction = HistoryManager(token_budget=3000).compact(messages)
+    assert compaction.messages == messages
+    assert (compaction.folded, compaction.summary) == ([], "")
+
+
+def test_summary_rolls_forward_across_turns():
+    manager = HistoryManager(token_budget=600, keep_recent=2, summarizer=lambda previous, turns:
+                             " | ".join(filter(None, [previous] + [m["content"].split(":")[0] for m in turns])))
+    history, summary = conversation(0), ""
+    for i in range(10):
+        history.append({"role": "user", "content": f"Question {i}: " + "words " * 40})
+        compaction = manager.compact(history, summary)
+        history, summary = compaction.history, compaction.summary
+        history.append({"role": "assistant", "content": f"Answer {i}: " + "words " * 40})
+    assert summary.startswith("Question 0 | Answer 0 | Question 1")
+    # What was folded is gone from the kept history, so request size stays flat
+    assert len(history) < 10
+    assert history[0]["role"] == "system"
+
+
+def test_drop_policy_and_langchain_messages():
+    messages = [SystemMessage(content="Be brief.")]
+    for i in range(20):
+        messages += [HumanMessage(content=f"Question {i} " + "words " * 40),
+                     AIMessage(content=f"Answer {i} " + "words " * 40)]
+    compaction = HistoryManager(token_budget=300, keep_recent=2, policy="drop").compact(messages)
+    assert compaction.summary == ""
+    assert compaction.messages[0] == messages[0]
+    assert compaction.messages[-2:] == messages[-2:]
+    assert compaction.tokens <= 300
@@ -0,0 +1,96 @@
+import asyncio
+import json
+import threading
+
+from langchain_core.messages import AIMessage
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.constants import TAG_NOSTREAM
+from langgraph.graph import MessagesState, StateGraph
+
+from utils.chat_history import HistoryManager
+from utils.chat_server import ChatServer, GraphBackend, MessagesBackend, Session
+from utils.fakes import FakeChatModel, FakeStreamingModel
+
+
+def summarizing_graph(summarizer_tags):
+    model = FakeChatModel(reply_tokens=5)
+    summarizer = FakeChatModel(reply_tokens=5)
+
+    def call_model(state):
+        summary = summarizer.invoke("summarise the earlier turns", config={"tags": summarizer_tags}).content
+        reply = model.invoke(state["messages"])
+        return {"messages": [reply, AIMessage(content=summary, id="summary")]}
+
+    workflow = StateGraph(MessagesState)
+    workflow.add_node("model", call_model)
+    workflow.set_entry_point("model")
+    return workflow.compile(checkpointer=InMemorySaver())
+
+
+async def collect(backend, text: str) -> str:
+    return "".join([token async for token in backend.reply(Session("s1"), text)])
+
+
+def test_graph_backend_streams_only_the_reply():
+    for tags in ([TAG_NOSTREAM, "summarizer"], ["summarizer"]):
+        graph = summarizing_graph(tags)
+        streamed = asyncio.run(collect(GraphBackend(graph), "hello"))
+        state = graph.get_state({"configurable": {"thread_id": "s1"}}).values
+        assert streamed == state["messages"][1].content
+
+
+async def send(server: ChatServer, request: bytes) -> bytes:
+    listener = await server.start(port=0)
+    port = listener.sockets[0].getsockname()[1]
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(request)
+    response = await reader.read()
+    writer.close()
+    listener.close()
+    return response
+
+
+def post_chat(body: bytes) -> bytes:
+    return b"POST /chat HTTP/1.1\r\nContent-Length: %d\r\n\r\n%s" % (len(body), body)
+
+
+def test_error_before_the_first_token_gets_a_500():
+    async def failing_stream(messages):
+        raise RuntimeError("retrieval failed")
+        yield
+
+    server = ChatServer(MessagesBackend(failing_stream))
+    response = asyncio.run(send(server, post_chat(json.dumps({"message": "hi"}).encode())))
+    assert server.stats["errors"] == 1
+    assert response.startswith(b"HTTP/1.1 500")
+    assert b"retrieval failed" in response
+
+
+def test_bad_request_bodies_get_a_400():
+    server = ChatServer(MessagesBackend(FakeStreamingModel()))
+    for request in (post_chat(b"{not json"), post_chat(b'["hi"]'),
+                    b"POST /chat HTTP/1.1\r\nContent-Length: ten\r\n\r\n",
+                    b"POST /chat HTTP/1.1\r\nContent-Length: -5\r\n\r\n"):
+        assert asyncio.run(send(server, request)).startswith(b"HTTP/1.1 400")
+    assert server.stats["requests"] == 0
+
+
+def test_compaction_runs_off_the_event_loop():
+    threads = []
+
+    def summarizer(previous: str, messages: list) -> str:
+        threads.append(threading.get_ident())
+        return "summary"
+
+    history = HistoryManager(token_budget=10, keep_recent=1, summarizer=summarizer)
+    backend = MessagesBackend(FakeStreamingModel(tokens=3, first_token_latency=0), history)
+    session = Session("s1")
+
+    async def chat():
+        for text in ("first question", "second question"):
+            async for _ in backend.reply(session, text):
+                pass
+
+    asyncio.run(chat())
+    assert threads and threading.get_ident() not in threads
+    assert session.summary == "summary"
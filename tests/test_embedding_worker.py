@@ -0,0 +1,52 @@
+import asyncio
+import os
+import socket
+import threading
+import time
+
+import pytest
+
+from utils.embedding_worker import EmbeddingWorker, WorkerEmbeddings
+from utils.fakes import FakeEmbeddings
+
+
+def start_worker(path: str) -> EmbeddingWorker:
+    worker = EmbeddingWorker(FakeEmbeddings(size=8))
+    ready = threading.Event()
+    threading.Thread(target=lambda: asyncio.run(worker.serve(path, ready)), daemon=True).start()
+    assert ready.wait(5)
+    return worker
+
+
+def test_stale_socket_is_replaced_but_a_live_worker_is_not(tmp_path):
+    path = str(tmp_path / "worker.sock")
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(path)
+    stale.close()
+
+    start_worker(path)
+    client = WorkerEmbeddings(path)
+    assert client.embed_query("hello") == FakeEmbeddings(size=8).embed_query("hello")
+    assert os.stat(path).st_mode & 0o777 == 0o600
+
+    with pytest.raises(RuntimeError, match="already serving"):
+        asyncio.run(EmbeddingWorker(FakeEmbeddings(size=8)).serve(path))
+    assert client.embed_query("still there") == FakeEmbeddings(size=8).embed_query("still there")
+
+
+def test_requests_queued_during_a_pass_do_not_wait_for_the_window():
+    async def run() -> float:
+        worker = EmbeddingWorker(FakeEmbeddings(size=8, latency=0.1), max_batch=4, max_wait_ms=1000)
+        worker._queue = asyncio.Queue()
+        batcher = asyncio.create_task(worker._batcher())
+        full = asyncio.gather(*(worker.embed([f"text {i}"]) for i in range(4)))
+        await asyncio.sleep(0.02)
+        start = time.perf_counter()
+        await worker.embed(["queued during the first pass"])
+        waited = time.perf_counter() - start
+        await full
+        batcher.cancel()
+        return waited
+
+    # One pass in flight plus its own: about 0.2 s, not the 1 s window
+    assert asyncio.run(run()) < 0.5
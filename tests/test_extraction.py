@@ -0,0 +1,41 @@
+import asyncio
+import json
+
+from langchain_learning.extraction import extract_bulk
+
+
+class FlakyExtractor:
+    """Structured-output stand-in that fails for the given ids until `healed`."""
+
+    def __init__(self, failing):
+        self.failing = set(failing)
+        self.healed = False
+
+    async def ainvoke(self, prompt):
+        text = prompt.to_messages()[-1].content
+        if text in self.failing and not self.healed:
+            raise ValueError("bad output")
+        return {"name": text}
+
+
+def test_reruns_retry_errors_without_piling_up_rows(tmp_path):
+    input_path, output_path = tmp_path / "snippets.jsonl", tmp_path / "people.jsonl"
+    input_path.write_text("".join(json.dumps({"id": str(i), "text": f"person {i}"}) + "\n" for i in range(5)))
+    extractor = FlakyExtractor({"person 1", "person 3"})
+
+    def run():
+        stats = asyncio.run(extract_bulk(str(input_path), str(output_path), extractor, concurrency=2, max_retries=0))
+        rows = [json.loads(line) for line in output_path.read_text().splitlines()]
+        return stats, rows
+
+    stats, rows = run()
+    assert (stats["extracted"], stats["failed"]) == (3, 2)
+    stats, rows = run()
+    assert (stats["skipped"], stats["failed"]) == (3, 2)
+    assert sorted(row["id"] for row in rows) == ["0", "1", "2", "3", "4"]
+
+    extractor.healed = True
+    stats, rows = run()
+    assert (stats["skipped"], stats["extracted"]) == (3, 2)
+    assert sorted(row["id"] for row in rows) == ["0", "1", "2", "3", "4"]
+    assert all("person" in row for row in rows)
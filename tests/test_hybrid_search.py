@@ -0,0 +1,52 @@
+import pytest
+from langchain_core.documents import Document
+
+from utils.fakes import BagOfWordsEmbeddings
+from utils.hybrid_search import BM25Index, HybridSearch, reciprocal_rank_fusion, tokenize
+from utils.numpy_vector_store import NumpyVectorStore
+
+TEXTS = {
+    "revenue": "Nike reported annual revenue of 51.2 billion dollars in 2023.",
+    "shoes": "Running shoes use foam midsoles for cushioning.",
+    "stores": "Nike operates retail stores and a direct to consumer business.",
+    "weather": "The weather in Pune is warm in April.",
+}
+
+
+def test_rrf_rewards_ids_ranked_high_by_both_lists():
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["b", "d", "a"]], rrf_k=60)
+    assert [doc_id for doc_id, _ in fused] == ["b", "a", "d", "c"]
+    assert fused[0][1] == pytest.approx(1 / 62 + 1 / 61)
+    assert fused[-1][1] == pytest.approx(1 / 63)
+
+
+def test_rrf_k_flattens_the_rank_differences():
+    sharp = dict(reciprocal_rank_fusion([["a", "b"]], rrf_k=1))
+    flat = dict(reciprocal_rank_fusion([["a", "b"]], rrf_k=1000))
+    assert sharp["a"] / sharp["b"] > flat["a"] / flat["b"]
+
+
+def test_bm25_matches_exact_terms_and_numbers():
+    index = BM25Index()
+    index.add(list(TEXTS), list(TEXTS.values()))
+    assert tokenize("What was Nike's 2023 revenue?") == ["nike", "2023", "revenue"]
+    assert [doc_id for doc_id, _ in index.search("Nike 2023 revenue")][0] == "revenue"
+    assert index.search("51.2")[0][0] == "revenue"
+    assert index.search("unrelated words") == []
+
+    index.delete(["revenue"])
+    assert "revenue" not in [doc_id for doc_id, _ in index.search("Nike revenue")]
+    index.compact()
+    assert [doc_id for doc_id, _ in index.search("Nike")] == ["stores"]
+
+
+@pytest.mark.parametrize("shortlist_only", [False, True])
+def test_hybrid_search_fuses_lexical_and_vector_rankings(shortlist_only):
+    search = HybridSearch(NumpyVectorStore(BagOfWordsEmbeddings(size=256)), k=2, shortlist_only=shortlist_only)
+    search.add_documents([Document(page_content=text) for text in TEXTS.values()], ids=list(TEXTS))
+    assert [doc.id for doc in search.search("Nike annual revenue 2023")][0] == "revenue"
+    # No indexed term: pure vector search still answers
+    assert len(search.search("zzz qqq")) == 2
+
+    search.delete(["revenue"])
+    assert "revenue" not in [doc.id for doc in search.search("Nike annual revenue 2023")]
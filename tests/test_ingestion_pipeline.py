@@ -0,0 +1,71 @@
+import threading
+import time
+
+import pytest
+from langchain_core.documents import Document
+
+from utils.fakes import FakeEmbeddings
+from utils.ingestion_pipeline import ingest
+from utils.numpy_vector_store import NumpyVectorStore
+
+
+def documents(count: int):
+    return (Document(page_content=f"chunk {i}") for i in range(count))
+
+
+def test_every_chunk_is_stored_in_batches():
+    store = NumpyVectorStore(FakeEmbeddings(size=8))
+    report = ingest(store, documents(1000), ids=(str(i) for i in range(1000)), batch_size=64)
+    assert (report.chunks, report.batches) == (1000, 16)
+    assert len(store) == 1000
+    assert store.get_by_ids(["999"])[0].page_content == "chunk 999"
+
+
+def test_rate_limited_batches_are_retried():
+    embeddings = FakeEmbeddings(size=8, rate_limit_every=3)
+    store = NumpyVectorStore(embeddings)
+    report = ingest(store, documents(200), batch_size=10, max_workers=2, backoff=0)
+    assert report.chunks == len(store) == 200
+    assert report.retries > 0
+
+
+def test_other_errors_are_not_retried():
+    class BrokenStore:
+        calls = 0
+
+        def add_documents(self, documents, **kwargs):
+            self.calls += 1
+            raise ValueError("dimension mismatch")
+
+    store = BrokenStore()
+    with pytest.raises(ValueError):
+        ingest(store, documents(10), batch_size=10, backoff=0)
+    assert store.calls == 1
+
+
+def test_batches_run_concurrently_and_the_input_is_streamed():
+    produced = 0
+    ahead = []
+    lock = threading.Lock()
+    written = 0
+
+    def stream():
+        nonlocal produced
+        for doc in documents(400):
+            produced += 1
+            yield doc
+
+    class SlowStore:
+        def add_documents(self, docs, **kwargs):
+            nonlocal written
+            time.sleep(0.05)
+            with lock:
+                ahead.append(produced - written)
+                written += len(docs)
+
+    start = time.perf_counter()
+    report = ingest(SlowStore(), stream(), batch_size=10, max_workers=4)
+    assert report.chunks == 400
+    assert time.perf_counter() - start < 40 * 0.05 / 2
+    # Never more than 2 * max_workers batches (plus the one being read) in memory
+    assert max(ahead) <= (2 * 4 + 1) * 10
@@ -0,0 +1,46 @@
+import os
+import subprocess
+import sys
+import threading
+
+import pytest
+
+from benchmarks.bench_cold_start import ROOT, cold_start
+from utils.lazy import Deferred
+
+
+def test_deferred_builds_once_across_threads():
+    builds = []
+    deferred = Deferred(lambda: builds.append(1) or object()).prefetch()
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(deferred.get())) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(builds) == 1
+    assert len({id(result) for result in results}) == 1
+    assert deferred.ready
+
+
+def test_deferred_reraises_a_failed_build():
+    def fail():
+        raise RuntimeError("no API key")
+
+    deferred = Deferred(fail).prefetch()
+    with pytest.raises(RuntimeError, match="no API key"):
+        deferred.get()
+
+
+def test_importing_extraction_does_no_work(tmp_path):
+    code = "import sys, langchain_learning.extraction; print('langchain_core' in sys.modules)"
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    result = subprocess.run([sys.executable, "-c", code], cwd=tmp_path, env=env, capture_output=True, text=True)
+    assert result.stdout.strip() == "False", result.stderr
+    assert os.listdir(tmp_path) == []
+
+
+def test_cold_start_stops_at_the_first_prompt():
+    _, stopped, _, error = cold_start("extraction", "runpy.run_module('langchain_learning.extraction', "
+                                                           "run_name='__main__', alter_sys=True)")
+    assert (stopped, error) == ("input()", "")
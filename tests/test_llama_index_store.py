@@ -0,0 +1,47 @@
+import os
+
+import pytest
+from llama_index.core import Settings
+
+from benchmarks.rag.stand_ins import llama_index_fakes
+from utils.fakes import FakeEmbeddings
+from utils.llama_index_store import load_index
+
+
+@pytest.fixture
+def embeddings():
+    embeddings = FakeEmbeddings(size=16)
+    previous = Settings._embed_model
+    Settings.embed_model, _ = llama_index_fakes(embeddings)
+    yield embeddings
+    Settings._embed_model = previous
+
+
+def write(path, text: str):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+def test_reload_embeds_only_changed_files(embeddings, tmp_path):
+    data, storage = tmp_path / "data", str(tmp_path / "storage")
+    data.mkdir()
+    for name in ("a", "b", "c"):
+        write(data / f"{name}.txt", f"Notes about {name}.")
+    index, report = load_index(str(data), storage)
+    assert sorted(report.added) == ["a.txt", "b.txt", "c.txt"]
+    assert embeddings.texts_embedded == 3
+
+    index, report = load_index(str(data), storage)
+    assert (report.modified, report.unchanged) == (False, 3)
+    assert len(index.docstore.docs) == 3
+    assert embeddings.texts_embedded == 3
+
+    write(data / "a.txt", "Rewritten notes about a.")
+    os.remove(data / "b.txt")
+    stat = os.stat(data / "c.txt")
+    os.utime(data / "c.txt", (stat.st_atime, stat.st_mtime + 10))  # touched, same content
+    index, report = load_index(str(data), storage)
+    assert (report.changed, report.deleted, report.unchanged) == (["a.txt"], ["b.txt"], 1)
+    assert embeddings.texts_embedded == 4
+    texts = sorted(node.get_content() for node in index.docstore.docs.values())
+    assert texts == ["Notes about c.", "Rewritten notes about a."]
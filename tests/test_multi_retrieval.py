@@ -0,0 +1,49 @@
+import threading
+import time
+
+from langchain_core.documents import Document
+
+from utils.multi_retrieval import FanOutRetriever
+
+
+def test_slow_and_failing_retrievers_do_not_hold_up_the_rest():
+    release = threading.Event()
+
+    def slow(query):
+        release.wait(5)
+        return [Document(page_content="late")]
+
+    def broken(query):
+        raise ConnectionError("store down")
+
+    fan_out = FanOutRetriever({
+        "fast": (lambda query: [Document(page_content=f"hit for {query}")], 1.0),
+        "slow": (slow, 0.1),
+        "broken": (broken, 1.0),
+    })
+    try:
+        start = time.perf_counter()
+        hits = {result.name: result for result in fan_out.retrieve_all("q")}
+        elapsed = time.perf_counter() - start
+    finally:
+        release.set()
+
+    assert elapsed < 1.0
+    assert hits["fast"].status == "ok"
+    assert [doc.page_content for doc in hits["fast"].documents] == ["hit for q"]
+    assert hits["slow"].status == "timeout" and hits["slow"].documents == []
+    assert hits["slow"].seconds >= 0.1
+    assert hits["broken"].status == "error: ConnectionError: store down"
+    assert [doc.page_content for doc in FanOutRetriever.merge(hits.values())] == ["hit for q"]
+
+
+def test_merge_fuses_rankings_and_records_sources():
+    fan_out = FanOutRetriever({
+        "dense": (lambda query: [Document(page_content="alpha beta"), Document(page_content="gamma delta")], 1.0),
+        "sparse": (lambda query: [Document(page_content="gamma  delta"), Document(page_content="epsilon")], 1.0),
+    })
+    merged = FanOutRetriever.merge(fan_out.retrieve_all("q"))
+
+    assert [doc.page_content for doc in merged] == ["gamma delta", "alpha beta", "epsilon"]
+    assert merged[0].metadata["retrievers"] == ["dense", "sparse"]
+    assert merged[2].metadata["retrievers"] == ["sparse"]
@@ -0,0 +1,20 @@
+from pypdf import PdfWriter
+
+from utils import pdf_pipeline
+
+
+def blank_pdf(path, pages: int) -> str:
+    writer = PdfWriter()
+    for _ in range(pages):
+        writer.add_blank_page(width=200, height=200)
+    writer.write(str(path))
+    return str(path)
+
+
+def test_workers_only_keep_the_reader_of_the_current_file(tmp_path):
+    first, second = blank_pdf(tmp_path / "a.pdf", 3), blank_pdf(tmp_path / "b.pdf", 2)
+    assert [number for number, _ in pdf_pipeline._extract_pages(first, 0, 2)] == [0, 1]
+    pdf_pipeline._extract_pages(first, 2, 3)
+    assert list(pdf_pipeline._readers) == [first]
+    pdf_pipeline._extract_pages(second, 0, 2)
+    assert list(pdf_pipeline._readers) == [second]
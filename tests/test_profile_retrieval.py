@@ -0,0 +1,38 @@
+from utils.fakes import BagOfWordsEmbeddings
+from utils.profile_retrieval import ProfileRetriever
+from utils.tokens import estimate_tokens
+
+EXPERTISE = ["vector databases", "kubernetes operations", "react frontends", "payments compliance"]
+
+
+def profiles(count: int = 40):
+    return [{"_id": i, "firstName": f"User{i}", "lastName": "Doe", "areaOfExpertise": EXPERTISE[i % 4],
+             "currentLocation": "Pune" if i % 2 else "Berlin", "carrierSummary": f"Works on {EXPERTISE[i % 4]}."}
+            for i in range(count)]
+
+
+def test_select_returns_the_relevant_profiles_only():
+    retriever = ProfileRetriever(BagOfWordsEmbeddings(size=256), k=5)
+    retriever.load(profiles())
+    selection = retriever.select("Who knows about vector databases?")
+    assert selection.profiles == 5
+    assert selection.context.count("Expertise: vector databases") == 5
+    assert selection.tokens_saved > 0.8 * selection.full_tokens
+
+
+def test_select_stays_within_the_token_budget():
+    retriever = ProfileRetriever(BagOfWordsEmbeddings(size=256), k=10, token_budget=100)
+    retriever.load(profiles())
+    selection = retriever.select("kubernetes operations")
+    assert 1 <= selection.profiles < 10
+    assert selection.prompt_tokens <= 100 + estimate_tokens("\n\n") * selection.profiles
+
+
+def test_filters_narrow_the_candidates_first():
+    retriever = ProfileRetriever(BagOfWordsEmbeddings(size=256), k=5)
+    retriever.load(profiles())
+    selection = retriever.select("Who knows about vector databases?", location="pune")
+    # Vector database experts all live in Berlin: the filter wins over similarity
+    assert selection.profiles == 5
+    assert "Location: Berlin" not in selection.context
+    assert "Expertise: vector databases" not in selection.context
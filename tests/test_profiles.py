@@ -0,0 +1,104 @@
+from datetime import datetime
+
+import mongomock
+
+from utils.profiles import ProfileLoader
+
+
+def profiles_collection(count: int = 3):
+    collection = mongomock.MongoClient()["app-dev"]["profiles"]
+    collection.insert_many([{"firstName": f"User{i}", "lastName": "Doe", "areaOfExpertise": "RAG"}
+                            for i in range(count)])
+    return collection
+
+
+def test_first_refresh_loads_every_profile():
+    loader = ProfileLoader(profiles_collection())
+    assert loader.refresh() == 3
+    assert loader.version == 1
+    assert "Name: User2 Doe" in loader.context()
+
+
+def test_refresh_applies_inserts_updates_and_deletes():
+    collection = profiles_collection()
+    loader = ProfileLoader(collection, full_scan_interval=0)
+    loader.refresh()
+    collection.insert_one({"firstName": "New", "lastName": "Person"})
+    collection.update_one({"firstName": "User0"}, {"$set": {"areaOfExpertise": "Databases"}})
+    collection.delete_one({"firstName": "User1"})
+
+    assert loader.refresh()
+    context = loader.context()
+    assert "Name: New Person" in context
+    assert "Expertise: Databases" in context
+    assert "User1" not in context
+    assert len(loader.profiles()) == 3
+
+
+def test_refresh_without_changes_keeps_the_version():
+    # mongomock has no change streams and these profiles have no updatedAt: every refresh rescans
+    collection = profiles_collection()
+    loader = ProfileLoader(collection, full_scan_interval=0)
+    loader.refresh()
+    context = loader.context()
+    assert [loader.refresh() for _ in range(3)] == [0, 0, 0]
+    assert loader.version == 1
+    assert loader.context() is context
+
+    collection.update_one({"firstName": "User0"}, {"$set": {"unrelated": 1}})
+    assert loader.refresh() == 0
+    collection.update_one({"firstName": "User0"}, {"$set": {"lastName": "Smith"}})
+    assert loader.refresh() == 1
+    assert loader.version == 2
+
+
+def test_full_scans_wait_for_their_interval():
+    collection = profiles_collection()
+    loader = ProfileLoader(collection, full_scan_interval=3600)
+    loader.refresh()
+    collection.delete_one({"firstName": "User1"})
+    assert loader.refresh() == 0
+    assert len(loader.profiles()) == 3
+
+    loader.full_scan_interval = 0
+    assert loader.refresh() == 1
+    assert len(loader.profiles()) == 2
+
+
+def test_watermark_picks_up_updates_between_delete_scans():
+    collection = profiles_collection()
+    collection.update_many({}, {"$set": {"updatedAt": datetime(2024, 1, 1)}})
+    loader = ProfileLoader(collection, full_scan_interval=3600)
+    loader.refresh()
+    collection.update_one({"firstName": "User0"}, {"$set": {"areaOfExpertise": "Search",
+                                                            "updatedAt": datetime(2024, 1, 2)}})
+    assert loader.refresh() == 1
+    assert "Expertise: Search" in loader.context()
+    assert loader.refresh() == 0
+
+
+def test_periodic_scan_loads_profiles_the_watermark_misses():
+    collection = profiles_collection()
+    collection.update_many({}, {"$set": {"updatedAt": datetime(2024, 1, 2)}})
+    loader = ProfileLoader(collection, full_scan_interval=3600)
+    loader.refresh()
+    collection.insert_one({"firstName": "Undated", "lastName": "Person"})
+    collection.insert_one({"firstName": "Backdated", "lastName": "Person", "updatedAt": datetime(2024, 1, 1)})
+    assert loader.refresh() == 0
+
+    loader.full_scan_interval = 0
+    assert loader.refresh() == 2
+    assert "Name: Undated Person" in loader.context()
+    assert "Name: Backdated Person" in loader.context()
+
+
+def test_watermark_scan_includes_writes_with_the_same_timestamp():
+    collection = profiles_collection()
+    collection.update_many({}, {"$set": {"updatedAt": datetime(2024, 1, 1)}})
+    loader = ProfileLoader(collection, full_scan_interval=3600)
+    loader.refresh()
+    collection.update_one({"firstName": "User0"}, {"$set": {"areaOfExpertise": "Search"}})
+    collection.insert_one({"firstName": "Same", "lastName": "Second", "updatedAt": datetime(2024, 1, 1)})
+    assert loader.refresh() == 2
+    assert "Expertise: Search" in loader.context()
+    assert "Name: Same Second" in loader.context()
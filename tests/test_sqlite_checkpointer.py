@@ -0,0 +1,80 @@
+import asyncio
+import sqlite3
+
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.graph import MessagesState, StateGraph
+
+from utils.sqlite_checkpointer import SqliteCheckpointer
+
+
+def echo_graph(checkpointer):
+    def reply(state):
+        return {"messages": [AIMessage(content=f"reply {len(state['messages'])}")]}
+
+    workflow = StateGraph(MessagesState)
+    workflow.add_node("model", reply)
+    workflow.set_entry_point("model")
+    return workflow.compile(checkpointer=checkpointer)
+
+
+def say(graph, thread_id: str, text: str) -> str:
+    config = {"configurable": {"thread_id": thread_id}}
+    return graph.invoke({"messages": [HumanMessage(content=text)]}, config)["messages"][-1].content
+
+
+def stored_checkpoints(path) -> dict:
+    with sqlite3.connect(path) as conn:
+        return dict(conn.execute("SELECT thread_id, COUNT(*) FROM checkpoints GROUP BY thread_id"))
+
+
+def test_sessions_resume_after_reopening(tmp_path):
+    path = str(tmp_path / "chat.sqlite")
+    checkpointer = SqliteCheckpointer(path)
+    graph = echo_graph(checkpointer)
+    assert say(graph, "alice", "hi") == "reply 1"
+    assert say(graph, "alice", "again") == "reply 3"
+    assert say(graph, "bob", "hello") == "reply 1"
+    checkpointer.close()
+
+    reopened = echo_graph(SqliteCheckpointer(path))
+    state = reopened.get_state({"configurable": {"thread_id": "alice"}}).values
+    assert [message.content for message in state["messages"]] == ["hi", "reply 1", "again", "reply 3"]
+    assert say(reopened, "alice", "and again") == "reply 5"
+    assert say(reopened, "bob", "back") == "reply 3"
+
+
+def test_reads_see_unflushed_writes_and_async_works(tmp_path):
+    checkpointer = SqliteCheckpointer(str(tmp_path / "chat.sqlite"), flush_interval=3600)
+    graph = echo_graph(checkpointer)
+    say(graph, "alice", "hi")
+    assert stored_checkpoints(tmp_path / "chat.sqlite") == {}
+
+    async def turn():
+        config = {"configurable": {"thread_id": "alice"}}
+        return (await graph.ainvoke({"messages": [HumanMessage(content="again")]}, config))["messages"][-1].content
+
+    assert asyncio.run(turn()) == "reply 3"
+
+
+def test_only_the_last_checkpoints_are_kept(tmp_path):
+    path = str(tmp_path / "chat.sqlite")
+    checkpointer = SqliteCheckpointer(path, keep_last=2)
+    graph = echo_graph(checkpointer)
+    for i in range(10):
+        say(graph, "alice", f"message {i}")
+    checkpointer.flush()
+    assert stored_checkpoints(path) == {"alice": 2}
+    assert say(graph, "alice", "still there?") == "reply 21"
+
+
+def test_least_recently_used_threads_are_evicted(tmp_path):
+    path = str(tmp_path / "chat.sqlite")
+    checkpointer = SqliteCheckpointer(path, max_threads=2)
+    graph = echo_graph(checkpointer)
+    for thread_id in ("a", "b", "c"):
+        say(graph, thread_id, "hi")
+    say(graph, "a", "again")
+    checkpointer.flush()
+    assert checkpointer.evict() == 1
+    assert set(stored_checkpoints(path)) == {"a", "c"}
+    assert say(graph, "b", "hi") == "reply 1"
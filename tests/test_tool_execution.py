@@ -0,0 +1,83 @@
+import asyncio
+import time
+
+import pytest
+
+from langchain_learning import AI_agent_with_langchain
+from utils.fakes import FakeSearchTool
+from utils.lazy import Deferred
+from utils.tool_execution import ToolRunner
+
+
+def test_repeated_searches_are_served_from_the_cache():
+    search = FakeSearchTool(latency=0)
+    runner = ToolRunner()
+    tool = runner.wrap("Search", search.run, cache=True)
+    assert tool("What is RAG?") == tool("what is  rag?")
+    assert search.calls == 1
+    assert runner.report()["Search"]["cache_hits"] == 1
+
+
+def test_concurrent_identical_searches_run_once():
+    search = FakeSearchTool(latency=0.2)
+    runner = ToolRunner()
+    tool = runner.wrap("Search", search.run, cache=True)
+    results = runner.run_many([(tool, "same question")] * 4)
+    assert len(set(results)) == 1
+    assert search.calls == 1
+    assert runner.stats["Search"].coalesced == 3
+
+
+def test_independent_calls_run_in_parallel():
+    runner = ToolRunner()
+    tool = runner.wrap("Search", FakeSearchTool(latency=0.2).run, cache=True)
+    start = time.perf_counter()
+    runner.run_many([(tool, f"question {i}") for i in range(4)])
+    assert time.perf_counter() - start < 0.6
+
+
+def test_errors_are_counted_and_never_cached():
+    calls = []
+
+    def flaky(query: str) -> str:
+        calls.append(query)
+        if len(calls) == 1:
+            raise ConnectionError("search is down")
+        return "result"
+
+    runner = ToolRunner()
+    tool = runner.wrap("Search", flaky, cache=True)
+    with pytest.raises(ConnectionError):
+        tool("question")
+    assert tool("question") == "result"
+    assert runner.stats["Search"].errors == 1
+
+
+def test_timeouts_come_back_as_messages():
+    def hanging(code: str) -> str:
+        raise TimeoutError("no result after 2s")
+
+    runner = ToolRunner()
+    assert runner.wrap("Python_REPL", hanging)("while True: pass") == "TimeoutError: no result after 2s"
+    assert runner.stats["Python_REPL"].timeouts == 1
+
+
+def test_agent_prompts_share_one_event_loop(monkeypatch, capsys):
+    class LoopBoundExecutor:
+        """Like ChatMistralAI's httpx client: bound to the first loop it ran on."""
+
+        def __init__(self):
+            self.loop = None
+
+        async def ainvoke(self, inputs: dict) -> dict:
+            loop = asyncio.get_running_loop()
+            if self.loop not in (None, loop):
+                raise RuntimeError("Event loop is closed")
+            self.loop = loop
+            return {"output": f"answer to {inputs['input']}"}
+
+    monkeypatch.setattr(AI_agent_with_langchain, "agent", Deferred(lambda: (LoopBoundExecutor(), ToolRunner())))
+    prompts = iter(["first", "second", "third", "exit"])
+    AI_agent_with_langchain.chat(lambda _: next(prompts))
+    output = capsys.readouterr().out
+    assert all(f"answer to {prompt}" in output for prompt in ("first", "second", "third"))
@@ -0,0 +1,76 @@
+import json
+import re
+
+import pytest
+
+from utils.fakes import FakeEmbeddings
+from utils.tracing import NOOP_SPAN, Tracer
+
+# name{labels} value, as in the Prometheus text exposition format
+SAMPLE = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(\{(?:[a-zA-Z_][a-zA-Z0-9_]*="(?:[^"\\]|\\.)*",?)*\})? (\S+)$')
+
+
+def samples(text: str) -> dict:
+    found = {}
+    for line in text.splitlines():
+        if line.startswith("#"):
+            assert re.match(r"^# (HELP|TYPE) [a-zA-Z_:][a-zA-Z0-9_:]* \S", line), line
+            continue
+        match = SAMPLE.match(line)
+        assert match, line
+        found[match.group(1) + (match.group(2) or "")] = float(match.group(3))
+    return found
+
+
+def test_prometheus_text_format(tmp_path):
+    tracer = Tracer(metrics_path=str(tmp_path / "metrics.prom"))
+    for seconds in (0.002, 0.02, 0.2):
+        span = tracer.span("embed")
+        span.add("items", 10)
+        tracer._finish(span, seconds)
+    with pytest.raises(ValueError):
+        with tracer.span('retrieve "hybrid"'):
+            raise ValueError("no index")
+    tracer.flush()
+
+    text = (tmp_path / "metrics.prom").read_text()
+    values = samples(text)
+    assert values['rag_stage_seconds_bucket{stage="embed",le="0.001"}'] == 0
+    assert values['rag_stage_seconds_bucket{stage="embed",le="0.005"}'] == 1
+    assert values['rag_stage_seconds_bucket{stage="embed",le="0.025"}'] == 2
+    assert values['rag_stage_seconds_bucket{stage="embed",le="+Inf"}'] == 3
+    assert values['rag_stage_seconds_count{stage="embed"}'] == 3
+    assert values['rag_stage_seconds_sum{stage="embed"}'] == pytest.approx(0.222)
+    assert values['rag_stage_items_total{stage="embed"}'] == 30
+    assert values['rag_stage_errors_total{stage="retrieve \\"hybrid\\""}'] == 1
+    # Cumulative buckets never go down
+    embed = [value for key, value in values.items() if key.startswith('rag_stage_seconds_bucket{stage="embed"')]
+    assert embed == sorted(embed)
+    assert "# TYPE rag_stage_seconds histogram" in text
+
+
+def test_spans_nest_and_are_written_as_json_lines(tmp_path):
+    tracer = Tracer(spans_path=str(tmp_path / "spans.jsonl"))
+    embeddings = tracer.embeddings(FakeEmbeddings(size=8))
+    with tracer.span("query", question="q") as query:
+        embeddings.embed_documents(["a", "b"])
+    tracer.flush()
+
+    spans = [json.loads(line) for line in (tmp_path / "spans.jsonl").read_text().splitlines()]
+    embed, outer = spans
+    assert (embed["name"], outer["name"]) == ("embed", "query")
+    assert embed["parent_span_id"] == outer["span_id"] == query.span_id
+    assert embed["trace_id"] == outer["trace_id"]
+    assert embed["attributes"] == {"kind": "documents", "items": 2}
+    assert embed["end_time_unix_nano"] >= embed["start_time_unix_nano"]
+
+
+def test_disabled_tracer_hands_back_the_originals():
+    tracer = Tracer()
+    embeddings = FakeEmbeddings(size=8)
+    func = len
+    assert not tracer.enabled
+    assert tracer.span("embed") is NOOP_SPAN
+    assert tracer.embeddings(embeddings) is embeddings
+    assert tracer.wrap(func, "split") is func
+    assert tracer.callbacks() == []
@@ -0,0 +1,148 @@
+import numpy as np
+import pytest
+from langchain_core.documents import Document
+
+from utils.ann_index import IVF_FILES, IVFVectorStore
+from utils.fakes import FakeEmbeddings
+from utils.numpy_vector_store import NumpyVectorStore
+from utils.quantized_store import QuantizedVectorStore
+from utils.vector_stores import VECTOR_STORES, build_vector_store, load_vector_store, save_vector_store
+
+
+def fill(store, count: int, seed: int = 0):
+    vectors = np.random.default_rng(seed).standard_normal((count, store.embedding.size)).astype(np.float32)
+    store.add_embeddings([Document(page_content=f"doc {i}") for i in range(count)], vectors,
+                         [str(i) for i in range(count)])
+    return vectors
+
+
+def params(index: str) -> dict:
+    return {"min_size": 100} if index == "ivf" else {}
+
+
+def found(store, queries, k: int = 5, **kwargs):
+    return [[doc.id for doc, _ in hits] for hits in store.search_vectors(queries, k, **kwargs)]
+
+
+def clustered(count: int, seed: int = 0, size: int = 32, clusters: int = 50) -> np.ndarray:
+    """Vectors around a few centres, like real embeddings (uniform noise has no structure to index)."""
+    rng = np.random.default_rng(seed)
+    centres = np.random.default_rng(1234).standard_normal((clusters, size))
+    return (centres[rng.integers(clusters, size=count)] + 0.5 * rng.standard_normal((count, size))).astype(np.float32)
+
+
+def recall(store, queries, k: int = 10, **kwargs) -> float:
+    truth = found(store, queries, k, exact=True)
+    hits = found(store, queries, k, **kwargs)
+    return sum(len(set(a) & set(b)) for a, b in zip(hits, truth)) / (k * len(queries))
+
+
+@pytest.mark.parametrize("index", sorted(VECTOR_STORES))
+def test_loaded_store_answers_like_the_saved_one(index, tmp_path):
+    embeddings = FakeEmbeddings(size=32)
+    store = VECTOR_STORES[index](embeddings, **params(index))
+    vectors = fill(store, 500)
+    store.delete(["3", "7"])
+    store.save(str(tmp_path))
+
+    loaded = VECTOR_STORES[index].load(str(tmp_path), embeddings, **params(index))
+    assert len(loaded) == len(store) == 498
+    assert loaded.get_by_ids(["10"])[0].page_content == "doc 10"
+    assert found(loaded, vectors[:20]) == found(store, vectors[:20])
+
+
+@pytest.mark.parametrize("index", sorted(VECTOR_STORES))
+def test_every_store_finds_the_exact_neighbour(index):
+    store = VECTOR_STORES[index](FakeEmbeddings(size=32), **params(index))
+    vectors = fill(store, 500)
+    assert [hits[0] for hits in found(store, vectors[:20])] == [str(i) for i in range(20)]
+
+
+def test_ivf_index_of_an_earlier_save_is_not_loaded(tmp_path):
+    embeddings = FakeEmbeddings(size=32)
+    large = IVFVectorStore(embeddings, min_size=100)
+    fill(large, 500)
+    large.save(str(tmp_path))
+
+    small = IVFVectorStore(embeddings, min_size=100)
+    fill(small, 50, seed=1)
+    small.save(str(tmp_path))
+    assert not (tmp_path / "ivf.json").exists()
+
+    # Same row count, other vectors: the lists saved next to them belong to another save
+    other = IVFVectorStore(embeddings, min_size=100)
+    vectors = fill(other, 500, seed=2)
+    other.save(str(tmp_path))
+    large.save(str(tmp_path / "large"))
+    for name in IVF_FILES:
+        (tmp_path / name).write_bytes((tmp_path / "large" / name).read_bytes())
+    loaded = IVFVectorStore.load(str(tmp_path), embeddings, min_size=100)
+    assert loaded._order is None
+    assert found(loaded, vectors[:20], k=1) == [[str(i)] for i in range(20)]
+
+
+def test_saved_store_is_loaded_only_for_the_same_source(tmp_path):
+    embeddings = FakeEmbeddings(size=32)
+    store = build_vector_store(embeddings, "ivf", min_size=100)
+    vectors = fill(store, 500)
+    directory = str(tmp_path / "store")
+    assert load_vector_store(directory, "source-1", embeddings, "ivf") is None
+    save_vector_store(store, directory, "source-1")
+
+    loaded = load_vector_store(directory, "source-1", embeddings, "ivf", min_size=100)
+    assert loaded._order is not None
+    assert found(loaded, vectors[:20]) == found(store, vectors[:20])
+    assert load_vector_store(directory, "source-2", embeddings, "ivf") is None
+
+
+def test_quantized_codes_of_other_vectors_are_not_loaded(tmp_path):
+    embeddings = FakeEmbeddings(size=32)
+    quantized = QuantizedVectorStore(embeddings)
+    fill(quantized, 500)
+    quantized.save(str(tmp_path))
+    assert isinstance(QuantizedVectorStore.load(str(tmp_path), embeddings)._codes, np.memmap)
+
+    # A plain save of other vectors over the same directory leaves codes.npy behind
+    plain = NumpyVectorStore(embeddings)
+    vectors = fill(plain, 500, seed=1)
+    plain.save(str(tmp_path))
+    loaded = QuantizedVectorStore.load(str(tmp_path), embeddings)
+    assert loaded._codes is None
+    assert found(loaded, vectors[:20], k=1) == [[str(i)] for i in range(20)]
+
+
+def test_saved_quantized_store_maps_its_codes(tmp_path):
+    embeddings = FakeEmbeddings(size=32)
+    store = build_vector_store(embeddings, "quantized", dtype="float16")
+    vectors = fill(store, 500)
+    save_vector_store(store, str(tmp_path), "source")
+
+    loaded = load_vector_store(str(tmp_path), "source", embeddings, "quantized")
+    assert (loaded.dtype, loaded._codes.dtype) == ("float16", np.float16)
+    assert isinstance(loaded._codes, np.memmap)
+    assert found(loaded, vectors[:20]) == found(store, vectors[:20])
+
+
+def test_ivf_recall_grows_with_n_probe_and_probing_every_list_is_exact():
+    store = IVFVectorStore(FakeEmbeddings(size=32), n_lists=64, min_size=100)
+    vectors = clustered(5000)
+    store.add_embeddings([Document(page_content=f"doc {i}") for i in range(5000)], vectors)
+    queries = clustered(100, seed=1)
+    recalls = [recall(store, queries, n_probe=n_probe) for n_probe in (1, 8, 64)]
+    assert recalls[0] < recalls[1] <= recalls[2] == 1.0
+    assert recalls[1] >= 0.9
+
+
+@pytest.mark.parametrize("dtype", ["int8", "float16"])
+def test_quantized_search_with_rescoring_matches_exact_search(dtype):
+    store = QuantizedVectorStore(FakeEmbeddings(size=32), dtype=dtype)
+    vectors = clustered(5000)
+    store.add_embeddings([Document(page_content=f"doc {i}") for i in range(5000)], vectors)
+    queries = clustered(100, seed=1)
+    assert recall(store, queries) >= 0.99
+    assert recall(store, queries, rescore=1) <= recall(store, queries)
+    # Returned scores are the exact float32 ones
+    for (doc, score), (exact_doc, exact_score) in zip(store.search_vectors(queries[:1], 10)[0],
+                                                      store.search_vectors(queries[:1], 10, exact=True)[0]):
+        assert doc.id == exact_doc.id
+        assert score == pytest.approx(exact_score, abs=1e-6)
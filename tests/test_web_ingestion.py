@@ -0,0 +1,51 @@
+import gzip
+
+import pytest
+
+from benchmarks.rag.stand_ins import LocalSite
+from utils.web_ingestion import WebIngestor, gunzip, sitemap_locs
+
+BOMB = (b'<?xml version="1.0"?><!DOCTYPE lolz [<!ENTITY lol "lol"><!ENTITY lol2 "&lol;&lol;&lol;&lol;">]>'
+        b'<urlset><url><loc>&lol2;</loc></url></urlset>')
+
+
+def sitemap(*urls: str) -> str:
+    return '<?xml version="1.0"?><sitemapindex>' + "".join(f"<sitemap><loc>{url}</loc></sitemap>" for url in urls) \
+        + "</sitemapindex>"
+
+
+def test_sitemap_locs_refuses_dtds_and_oversized_bodies(monkeypatch):
+    assert sitemap_locs(b"<urlset><url><loc> https://a.test/x </loc></url></urlset>") == ["https://a.test/x"]
+    with pytest.raises(ValueError, match="DTD"):
+        sitemap_locs(BOMB)
+    monkeypatch.setattr("utils.web_ingestion.MAX_SITEMAP_BYTES", 10)
+    with pytest.raises(ValueError, match="larger"):
+        sitemap_locs(b"<urlset></urlset>")
+
+
+def test_gunzip_stops_at_the_limit():
+    body = b"<html>" + b" " * 2 ** 20 + b"</html>"
+    assert gunzip(gzip.compress(body), len(body)) == body
+    with pytest.raises(ValueError, match="inflates past"):
+        gunzip(gzip.compress(b"\0" * 2 ** 24), 2 ** 20)
+    with pytest.raises(ValueError, match="truncated"):
+        gunzip(gzip.compress(body)[:100], len(body))
+
+
+def test_bad_sitemaps_are_errors_not_exceptions(tmp_path):
+    pages = {"/post.html": '<html><title>Post</title><div class="post-content">Hello</div></html>'}
+    with LocalSite(pages) as site:
+        pages = {**pages, "/bomb.xml": BOMB.decode(),
+                 "/index.xml": sitemap(site.url("/index.xml"), site.url("/bomb.xml"), site.url("/missing.xml"),
+                                       site.url("/post.html"))}
+        site.pages.update(pages)
+        web = WebIngestor(str(tmp_path), ("post-content",), parse_workers=0)
+        urls = web.sitemap_urls(site.url("/index.xml"))
+        assert urls == [site.url("/post.html")]
+        assert sorted(web.errors) == [site.url("/bomb.xml"), site.url("/missing.xml")]
+
+        docs = web.load(urls)
+        web.close()
+    assert [doc.page_content for doc in docs] == ["Hello"]
+    assert web.stats.errors == 0
+    assert len(web.errors) == 2
@@ -0,0 +1,143 @@
+import json
+import os
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from utils.numpy_vector_store import NumpyVectorStore, normalise, top_k
+
+IVF_FILES = ("centroids.npy", "lists.npy", "offsets.npy", "ivf.json")
+
+
+def assign_lists(vectors: np.ndarray, centroids: np.ndarray, block: int = 65_536) -> np.ndarray:
+    """Nearest centroid (by inner product) of every row, computed block by block to bound memory."""
+    assignments = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), block):
+        assignments[start:start + block] = np.argmax(vectors[start:start + block] @ centroids.T, axis=1)
+    return assignments
+
+
+def spherical_kmeans(vectors: np.ndarray, n_clusters: int, iterations: int = 10,
+                     sample_size: int = 50_000, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    sample = vectors
+    if len(vectors) > sample_size:
+        sample = vectors[np.sort(rng.choice(len(vectors), sample_size, replace=False))]
+    sample = np.ascontiguousarray(sample, dtype=np.float32)
+    centroids = sample[rng.choice(len(sample), n_clusters, replace=False)].copy()
+    for _ in range(iterations):
+        assignments = assign_lists(sample, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignments, sample)
+        counts = np.bincount(assignments, minlength=n_clusters)
+        # Empty clusters keep their previous centroid
+        centroids[counts > 0] = normalise(sums[counts > 0])
+    return centroids
+
+
+class IVFVectorStore(NumpyVectorStore):
+    """
+    `NumpyVectorStore` with an inverted-file (IVF) index for approximate search.
+
+    Vectors are clustered with spherical k-means into `n_lists` lists; a query only
+    scores the vectors in its `n_probe` closest lists. Raising `n_probe` trades
+    latency for recall (n_probe == n_lists is exact search). The index is built
+    lazily on the first search after a change and is saved alongside the vectors.
+    """
+
+    def __init__(self, embedding: Embeddings, n_lists: Optional[int] = None, n_probe: int = 8,
+                 min_size: int = 2_000, **kwargs: Any):
+        super().__init__(embedding, **kwargs)
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.min_size = min_size
+        self._centroids: Optional[np.ndarray] = None
+        self._trained_on = 0
+        self._order: Optional[np.ndarray] = None
+        self._offsets: Optional[np.ndarray] = None
+
+    def add_embeddings(self, documents: Sequence[Document], vectors, ids: Optional[Sequence[str]] = None) -> List[str]:
+        with self._lock:
+            self._order = None
+            return super().add_embeddings(documents, vectors, ids)
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> Optional[bool]:
+        with self._lock:
+            self._order = None
+            return super().delete(ids, **kwargs)
+
+    def build_index(self, retrain: bool = False):
+        with self._lock:
+            vectors = self.vectors
+            if retrain or self._centroids is None or self._count > 4 * self._trained_on:
+                n_lists = self.n_lists or int(4 * np.sqrt(self._count))
+                self._centroids = spherical_kmeans(vectors, max(1, min(n_lists, self._count)))
+                self._trained_on = self._count
+            assignments = assign_lists(vectors, self._centroids)
+            self._set_lists(assignments)
+
+    def _set_lists(self, assignments: np.ndarray):
+        self._order = np.argsort(assignments, kind="stable").astype(np.int64)
+        counts = np.bincount(assignments, minlength=len(self._centroids))
+        self._offsets = np.concatenate([[0], np.cumsum(counts)])
+
+    def search_vectors(self, queries, k: int = 4, filter: Optional[Callable[[Document], bool]] = None,
+                       n_probe: Optional[int] = None, exact: bool = False,
+                       **kwargs: Any) -> List[List[Tuple[Document, float]]]:
+        if exact or self._count < self.min_size:
+            return super().search_vectors(queries, k, filter)
+        with self._lock:
+            if self._order is None:
+                self.build_index()
+            queries = normalise(np.atleast_2d(np.asarray(queries, dtype=np.float32)))
+            mask = self._filter_mask(filter) if filter is not None else None
+            probes = top_k(queries @ self._centroids.T, n_probe or self.n_probe)
+            results = []
+            for query, lists in zip(queries, probes):
+                rows = np.concatenate([self._order[self._offsets[i]:self._offsets[i + 1]] for i in lists])
+                if mask is not None:
+                    rows = rows[mask[rows]]
+                scores = self.vectors[rows] @ query
+                best = top_k(scores, k)
+                results.append([(self._docs[rows[i]], float(scores[i])) for i in best])
+            return results
+
+    def save(self, directory: str):
+        with self._lock:
+            super().save(directory)
+            if self._count < self.min_size:
+                # Searched exactly, so no index; drop one left over from an earlier, larger save
+                for name in IVF_FILES:
+                    if os.path.exists(os.path.join(directory, name)):
+                        os.remove(os.path.join(directory, name))
+                return
+            if self._order is None:
+                self.build_index()
+            np.save(os.path.join(directory, "centroids.npy"), self._centroids)
+            np.save(os.path.join(directory, "lists.npy"), self._order)
+            np.save(os.path.join(directory, "offsets.npy"), self._offsets)
+            with open(os.path.join(directory, "ivf.json"), "w", encoding="utf-8") as f:
+                json.dump({"n_lists": self.n_lists, "n_probe": self.n_probe, "trained_on": self._trained_on,
+                           "count": self._count, "generation": self._generation}, f)
+
+    @classmethod
+    def load(cls, directory: str, embedding: Embeddings, **kwargs: Any) -> "IVFVectorStore":
+        """Map a saved store; an index saved with other vectors than these is ignored and rebuilt on first search."""
+        store = super().load(directory, embedding, **kwargs)
+        meta_path = os.path.join(directory, "ivf.json")
+        if not os.path.exists(meta_path):
+            return store
+        with open(meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("count") != store._count or store._generation is None \
+                or meta.get("generation") != store._generation:
+            return store
+        store._centroids = np.load(os.path.join(directory, "centroids.npy"))
+        store._order = np.load(os.path.join(directory, "lists.npy"), mmap_mode="r")
+        store._offsets = np.load(os.path.join(directory, "offsets.npy"))
+        store._trained_on = meta["trained_on"]
+        store.n_lists = kwargs.get("n_lists", meta["n_lists"])
+        store.n_probe = kwargs.get("n_probe", meta["n_probe"])
+        return store
@@ -0,0 +1,150 @@
+import re
+from dataclasses import dataclass, field
+from datetime import date, datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from langchain_core.documents import Document
+
+Where = Dict[str, Any]
+
+# Only at the start of a word, so "a.b:c" or the "tag:" inside a URL is not a filter
+_FILTER_TOKEN = re.compile(r'(?<!\S)(\w+):("[^"]*"|\S+)')
+
+
+def _timestamp(value: datetime) -> int:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp())
+
+
+def _scalar(value: Any) -> Any:
+    """Chroma only stores str/int/float/bool metadata; everything else becomes a string."""
+    if isinstance(value, (str, bool, int, float)):
+        return value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+@dataclass
+class BlogDocumentBuilder:
+    """
+    Turns a Mongo blog into one compact `Document`.
+
+    Only `text_fields` are embedded (title first, each field as its own paragraph,
+    no keys, ObjectIds or `$date` wrappers). Every other field goes into metadata
+    so it can be filtered on instead of being embedded: datetimes are kept as ISO
+    strings plus a `<field>_ts` epoch for range filters, `author`-style dicts are
+    reduced to their `name`, and list fields in `flag_fields` (tags) become a
+    comma-joined string plus one `tag:<value>` flag per entry because Chroma
+    metadata cannot hold lists.
+
+    What queries filter on (`filterable`: the flags, `date_field` and `filter_fields`)
+    is part of a chunk's ID; the rest of the metadata (view counters, `updatedAt`)
+    is only refreshed on the stored chunk when it changes.
+    """
+    text_fields: Sequence[str] = ("title", "summary", "description", "content", "body")
+    flag_fields: Dict[str, str] = field(default_factory=lambda: {"tags": "tag"})
+    exclude_fields: Sequence[str] = ()
+    date_field: str = "createdAt"
+    filter_fields: Sequence[str] = ("author", "blog_id")
+
+    def text(self, blog: dict) -> str:
+        parts = [str(blog[name]).strip() for name in self.text_fields if blog.get(name)]
+        return "\n\n".join(part for part in parts if part)
+
+    def metadata(self, blog: dict) -> Dict[str, Any]:
+        metadata: Dict[str, Any] = {"blog_id": str(blog["_id"])}
+        for name, value in blog.items():
+            if name == "_id" or name in self.text_fields or name in self.exclude_fields or value is None:
+                continue
+            if isinstance(value, datetime):
+                metadata[name] = value.isoformat()
+                metadata[f"{name}_ts"] = _timestamp(value)
+            elif isinstance(value, dict):
+                if "name" in value:
+                    metadata[name] = _scalar(value["name"])
+                else:
+                    metadata.update({f"{name}.{key}": _scalar(item) for key, item in value.items()
+                                     if item is not None and not isinstance(item, (dict, list))})
+            elif isinstance(value, (list, tuple)):
+                items = [str(_scalar(item)) for item in value if item is not None]
+                metadata[name] = ",".join(items)
+                if name in self.flag_fields:
+                    metadata.update({f"{self.flag_fields[name]}:{item.lower()}": True for item in items})
+            else:
+                metadata[name] = _scalar(value)
+        return metadata
+
+    def __call__(self, blog: dict) -> Document:
+        return Document(page_content=self.text(blog), metadata=self.metadata(blog))
+
+    def filterable(self, metadata: Dict[str, Any]) -> Dict[str, Any]:
+        """The metadata `parse_query` filters can match on."""
+        flags = tuple(f"{flag}:" for flag in self.flag_fields.values())
+        keys = {*self.filter_fields, *self.flag_fields, self.date_field, f"{self.date_field}_ts"}
+        return {key: value for key, value in metadata.items() if key in keys or key.startswith(flags)}
+
+    def parse_query(self, text: str, errors: Optional[List[str]] = None) -> Tuple[str, Optional[Where]]:
+        """
+        Split `tag:python author:"Ada Lovelace" since:2024-01-01 how to deploy` into the
+        free-text query and a Chroma `where` filter. Only flag keys, since/until and
+        `filter_fields` are filters; any other `word:value` ("16:9", a URL) stays in the
+        query. A bad value is left out of the filter and reported in `errors`.
+        """
+        conditions = []
+
+        def take(match) -> str:
+            key, value = match.group(1), match.group(2).strip('"')
+            if key in self.flag_fields.values():
+                conditions.append({f"{key}:{value.lower()}": True})
+            elif key in ("since", "until"):
+                try:
+                    day = date.fromisoformat(value)
+                except ValueError:
+                    if errors is not None:
+                        errors.append(f"{key}:{value} ignored, expected a date like 2024-01-31")
+                    return ""
+                stamp = _timestamp(datetime.combine(day, datetime.min.time()))
+                conditions.append({f"{self.date_field}_ts": {"$gte" if key == "since" else "$lt": stamp}})
+            elif key in self.filter_fields:
+                conditions.append({key: value})
+            else:
+                return match.group(0)
+            return ""
+
+        query = " ".join(_FILTER_TOKEN.sub(take, text).split())
+        if not conditions:
+            return query, None
+        return query, conditions[0] if len(conditions) == 1 else {"$and": conditions}
+
+
+_OPERATORS = {
+    "$eq": lambda a, b: a == b,
+    "$ne": lambda a, b: a != b,
+    "$gt": lambda a, b: a is not None and a > b,
+    "$gte": lambda a, b: a is not None and a >= b,
+    "$lt": lambda a, b: a is not None and a < b,
+    "$lte": lambda a, b: a is not None and a <= b,
+    "$in": lambda a, b: a in b,
+    "$nin": lambda a, b: a not in b,
+}
+
+
+def where_matches(where: Optional[Where], metadata: Dict[str, Any]) -> bool:
+    """Evaluate a Chroma `where` filter in Python, for stores that take a callable filter instead."""
+    if not where:
+        return True
+    for key, condition in where.items():
+        if key == "$and":
+            if not all(where_matches(part, metadata) for part in condition):
+                return False
+        elif key == "$or":
+            if not any(where_matches(part, metadata) for part in condition):
+                return False
+        elif isinstance(condition, dict):
+            if not all(_OPERATORS[op](metadata.get(key), value) for op, value in condition.items()):
+                return False
+        elif metadata.get(key) != condition:
+            return False
+    return True
@@ -0,0 +1,147 @@
+import hashlib
+import json
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional
+
+from langchain_core.documents import Document
+
+from utils.ingestion_pipeline import ingest
+from utils.near_dedup import DUPLICATE_COUNT, DUPLICATE_SOURCES, NearDuplicateFilter
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def chunk_ids(blog_id: str, chunks: List[Document],
+              filterable: Optional[Callable[[dict], dict]] = None) -> List[str]:
+    """
+    Stable chunk IDs built from the Mongo _id and a hash of the chunk content plus the
+    metadata `filterable` picks (e.g. `BlogDocumentBuilder.filterable`: tags, author, date).
+    Other metadata, like view counters, is left out so it can change without a new ID,
+    and so is the near-dedup bookkeeping, which changes whenever another blog repeats a chunk.
+    """
+    seen: Dict[str, int] = {}
+    ids = []
+    for chunk in chunks:
+        metadata = filterable(chunk.metadata) if filterable else {}
+        metadata = {key: value for key, value in metadata.items() if key not in (DUPLICATE_COUNT, DUPLICATE_SOURCES)}
+        metadata = json.dumps(metadata, sort_keys=True, default=str)
+        digest = content_hash(chunk.page_content + "\0" + metadata)[:16]
+        # Identical chunks inside one blog still need distinct IDs
+        count = seen.get(digest, 0)
+        seen[digest] = count + 1
+        ids.append(f"{blog_id}:{digest}" if count == 0 else f"{blog_id}:{digest}:{count}")
+    return ids
+
+
+@dataclass
+class SyncReport:
+    blogs: int = 0
+    chunks: int = 0
+    unchanged_chunks: int = 0
+    added_chunks: int = 0
+    deleted_chunks: int = 0
+    updated_chunks: int = 0
+    deferred_chunks: int = 0
+    duplicate_chunks: int = 0
+    chunks_per_sec: float = 0.0
+
+
+def plan_chunks(blogs: Iterable[dict], splitter, to_text: Optional[Callable[[dict], str]] = None,
+                to_document: Optional[Callable[[dict], Document]] = None,
+                dedupe: Optional[NearDuplicateFilter] = None) -> Dict[str, Document]:
+    """
+    Split every blog and return the wanted index as {chunk_id: chunk}. No embedding happens here.
+
+    Pass either `to_text` (whole blog as one string) or `to_document` (e.g. a
+    `BlogDocumentBuilder`, which also fills the metadata; its `filterable` fields
+    go into the chunk IDs). With `dedupe`, chunks that
+    near-duplicate an earlier one (shared boilerplate) are dropped and the kept chunk
+    lists their blogs in `duplicate_sources`.
+    """
+    if (to_text is None) == (to_document is None):
+        raise ValueError("Pass exactly one of to_text or to_document")
+    split = []
+    for blog in blogs:
+        blog_id = str(blog["_id"])
+        if to_document is not None:
+            doc = to_document(blog)
+            doc.metadata.setdefault("blog_id", blog_id)
+        else:
+            doc = Document(page_content=to_text(blog), metadata={"blog_id": blog_id})
+        split.append((blog_id, splitter.split_documents([doc])))
+
+    if dedupe is not None:
+        kept = {id(chunk) for chunk in dedupe.deduplicate(chunk for _, chunks in split for chunk in chunks)}
+        split = [(blog_id, [chunk for chunk in chunks if id(chunk) in kept]) for blog_id, chunks in split]
+
+    # duplicate_sources is not part of the IDs: when it changes, sync_blogs updates it in place
+    filterable = getattr(to_document, "filterable", None)
+    wanted: Dict[str, Document] = {}
+    for blog_id, chunks in split:
+        wanted.update(zip(chunk_ids(blog_id, chunks, filterable), chunks))
+    return wanted
+
+
+def update_metadata(store, ids: List[str], metadatas: List[dict]):
+    """Set the metadata of stored chunks without re-embedding them; a None value removes that key."""
+    if hasattr(store, "update_metadata"):
+        store.update_metadata(ids, metadatas)
+    else:
+        # LangChain Chroma wrapper: its update_documents would embed the texts again
+        store._collection.update(ids=ids, metadatas=metadatas)
+
+
+def sync_blogs(blogs: Iterable[dict], store, splitter, to_text: Optional[Callable[[dict], str]] = None,
+               to_document: Optional[Callable[[dict], Document]] = None,
+               dedupe: Optional[NearDuplicateFilter] = None, chunk_limit: Optional[int] = None,
+               batch_size: int = 64, max_workers: int = 4) -> SyncReport:
+    """
+    Bring a vector store in line with the blog collection.
+
+    Only chunks whose ID is not in the store yet are embedded; chunks of changed or
+    removed blogs (and any chunk without a stable ID from older runs) are deleted,
+    and kept chunks whose other metadata changed (views, updatedAt) are updated in
+    place. `store` needs `get`, `add_documents(documents, ids=...)` and
+    `delete(ids=...)` like the LangChain Chroma wrapper, plus `update_metadata` or a
+    Chroma `_collection`. New chunks go through the batched ingestion
+    pipeline. With `chunk_limit` only that many new chunks are added per run, the
+    rest are picked up by the next sync. `dedupe` drops near-duplicate chunks before
+    anything is embedded.
+    """
+    report = SyncReport()
+    blogs = list(blogs)
+    report.blogs = len(blogs)
+
+    wanted = plan_chunks(blogs, splitter, to_text, to_document, dedupe)
+    report.chunks = len(wanted)
+    if dedupe is not None:
+        report.duplicate_chunks = dedupe.stats.dropped
+
+    existing = store.get(include=["metadatas"])
+    stored = dict(zip(existing["ids"], existing["metadatas"]))
+    stale = [chunk_id for chunk_id in stored if chunk_id not in wanted]
+    new_ids = [chunk_id for chunk_id in wanted if chunk_id not in stored]
+    report.unchanged_chunks = len(wanted) - len(new_ids)
+    changed = [chunk_id for chunk_id in wanted
+               if chunk_id in stored and (stored[chunk_id] or {}) != wanted[chunk_id].metadata]
+
+    if chunk_limit is not None and len(new_ids) > chunk_limit:
+        report.deferred_chunks = len(new_ids) - chunk_limit
+        new_ids = new_ids[:chunk_limit]
+
+    if stale:
+        store.delete(ids=stale)
+        report.deleted_chunks = len(stale)
+    if changed:
+        update_metadata(store, changed, [{**dict.fromkeys(stored[chunk_id] or {}), **wanted[chunk_id].metadata}
+                                         for chunk_id in changed])
+        report.updated_chunks = len(changed)
+    if new_ids:
+        ingested = ingest(store, (wanted[chunk_id] for chunk_id in new_ids), ids=new_ids,
+                          batch_size=batch_size, max_workers=max_workers)
+        report.added_chunks = ingested.chunks
+        report.chunks_per_sec = ingested.chunks_per_sec
+
+    return report
@@ -0,0 +1,106 @@
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional
+
+from utils.tokens import estimate_tokens
+
+SUMMARY_PREFIX = "Summary of the earlier conversation:\n"
+
+
+def role_of(message) -> str:
+    """Role of a Mistral-style dict message or a LangChain message."""
+    if isinstance(message, dict):
+        return message["role"]
+    return {"human": "user", "ai": "assistant"}.get(message.type, message.type)
+
+
+def content_of(message) -> str:
+    content = message["content"] if isinstance(message, dict) else message.content
+    return content if isinstance(content, str) else str(content)
+
+
+def message_tokens(message) -> int:
+    return estimate_tokens(content_of(message)) + 4  # role and framing overhead
+
+
+def summary_message(summary: str, like):
+    """System message carrying the rolling summary, in the same format as `like`."""
+    if isinstance(like, dict):
+        return {"role": "system", "content": SUMMARY_PREFIX + summary}
+    from langchain_core.messages import SystemMessage
+    return SystemMessage(content=SUMMARY_PREFIX + summary)
+
+
+def transcript(messages) -> str:
+    return "\n".join(f"{role_of(message)}: {content_of(message)}" for message in messages)
+
+
+def truncating_summarizer(max_chars: int = 1500) -> Callable[[str, list], str]:
+    """Offline summarizer: keeps the start of every folded turn, capped at max_chars overall."""
+    def summarize(previous: str, messages: list) -> str:
+        lines = [previous] if previous else []
+        lines += [f"{role_of(message)}: {content_of(message)[:200]}" for message in messages]
+        return "\n".join(lines)[-max_chars:]
+    return summarize
+
+
+def llm_summarizer(complete: Callable[[str], str], max_words: int = 200) -> Callable[[str, list], str]:
+    """Summarizer that asks a model (`complete(prompt) -> text`) to fold turns into the running summary."""
+    def summarize(previous: str, messages: list) -> str:
+        prompt = (
+            f"Update the running summary of a conversation with the new turns below. "
+            f"Keep names, facts and open questions. Answer with the summary only, at most {max_words} words.\n\n"
+            f"Current summary:\n{previous or '(empty)'}\n\nNew turns:\n{transcript(messages)}"
+        )
+        return complete(prompt).strip()
+    return summarize
+
+
+@dataclass
+class Compaction:
+    messages: list
+    history: list
+    folded: list = field(default_factory=list)
+    summary: str = ""
+    tokens: int = 0
+
+
+class HistoryManager:
+    """
+    Keeps each request under `token_budget` tokens.
+
+    System messages (instructions, profile context) are always kept, and so are the
+    last `keep_recent` turns. Older turns are kept newest-first while they fit; the
+    rest are folded into a rolling summary (`policy="summarize"`) or dropped
+    (`policy="drop"`), so request size stays flat over long sessions.
+    """
+
+    def __init__(self, token_budget: int = 3000, keep_recent: int = 6, policy: str = "summarize",
+                 summarizer: Optional[Callable[[str, list], str]] = None):
+        if policy not in ("summarize", "drop"):
+            raise ValueError(f"Unknown history policy {policy!r}")
+        self.token_budget = token_budget
+        self.keep_recent = keep_recent
+        self.policy = policy
+        self.summarizer = summarizer or truncating_summarizer()
+
+    def compact(self, messages: list, summary: str = "") -> Compaction:
+        pinned = [m for m in messages if role_of(m) == "system" and not content_of(m).startswith(SUMMARY_PREFIX)]
+        turns = [m for m in messages if role_of(m) != "system"]
+
+        budget = self.token_budget - sum(message_tokens(m) for m in pinned)
+        if summary:
+            budget -= estimate_tokens(summary) + 4
+        kept = turns[-self.keep_recent:] if self.keep_recent else []
+        budget -= sum(message_tokens(m) for m in kept)
+        older = turns[:len(turns) - len(kept)]
+        while older and message_tokens(older[-1]) <= budget:
+            budget -= message_tokens(older[-1])
+            kept.insert(0, older.pop())
+
+        if older and self.policy == "summarize":
+            summary = self.summarizer(summary, older)
+
+        history = pinned + kept
+        sent = pinned + ([summary_message(summary, messages[0])] if summary else []) + kept
+        return Compaction(messages=sent, history=history, folded=older, summary=summary,
+                          tokens=sum(message_tokens(m) for m in sent))
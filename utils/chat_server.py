@@ -0,0 +1,290 @@
+import argparse
+import asyncio
+import json
+import uuid
+from collections import OrderedDict
+from typing import AsyncIterator, Callable, Optional
+from urllib.parse import parse_qs, urlparse
+
+from utils.chat_history import HistoryManager
+
+StreamFn = Callable[[list], AsyncIterator[str]]
+
+
+class Overloaded(Exception):
+    pass
+
+
+class Session:
+    def __init__(self, session_id: str):
+        self.id = session_id
+        self.history = []
+        self.summary = ""
+        self.lock = asyncio.Lock()  # one turn at a time per session
+
+
+class MessagesBackend:
+    """
+    Keeps a Mistral-style message history per session and streams replies from `stream_fn`.
+
+    `system_prompt(question)` can supply per-question context, e.g. the selected profiles.
+    """
+
+    def __init__(self, stream_fn: StreamFn, history_manager: Optional[HistoryManager] = None,
+                 system_prompt: Optional[Callable[[str], str]] = None):
+        self.stream_fn = stream_fn
+        self.history_manager = history_manager or HistoryManager(policy="drop")
+        self.system_prompt = system_prompt
+
+    async def reply(self, session: Session, text: str) -> AsyncIterator[str]:
+        session.history.append({"role": "user", "content": text})
+        messages = list(session.history)
+        if self.system_prompt is not None:
+            context = await asyncio.to_thread(self.system_prompt, text)
+            messages.insert(0, {"role": "system", "content": context})
+        # The summarizer may call an LLM synchronously; keep it off the event loop
+        compaction = await asyncio.to_thread(self.history_manager.compact, messages, session.summary)
+        session.summary = compaction.summary
+        session.history = compaction.history[len(messages) - len(session.history):]
+
+        parts = []
+        async for token in self.stream_fn(compaction.messages):
+            parts.append(token)
+            yield token
+        session.history.append({"role": "assistant", "content": "".join(parts)})
+
+
+class GraphBackend:
+    """
+    Streams from a compiled LangGraph chatbot; the graph's checkpointer holds the history per session.
+
+    Only AI tokens from the `reply_nodes` are sent, and none from model calls tagged
+    `summarizer`, so other LLM calls inside the graph (the history summary) stay internal.
+    """
+
+    def __init__(self, workflow, reply_nodes=("model",)):
+        self.workflow = workflow
+        self.reply_nodes = reply_nodes
+
+    async def reply(self, session: Session, text: str) -> AsyncIterator[str]:
+        from langchain_core.messages import HumanMessage
+
+        config = {"configurable": {"thread_id": session.id}}
+        async for chunk, metadata in self.workflow.astream({"messages": [HumanMessage(content=text)]}, config,
+                                                           stream_mode="messages"):
+            if metadata.get("langgraph_node") not in self.reply_nodes or "summarizer" in metadata.get("tags", ()):
+                continue
+            if chunk.content and chunk.type.startswith("AI"):
+                yield chunk.content if isinstance(chunk.content, str) else str(chunk.content)
+
+
+def mistral_stream(client, model: str) -> StreamFn:
+    """`StreamFn` over `mistral_client.chat.stream_async`."""
+    async def stream(messages: list):
+        response = await client.chat.stream_async(model=model, messages=messages)
+        async for chunk in response:
+            content = chunk.data.choices[0].delta.content
+            if content:
+                yield content
+    return stream
+
+
+def langchain_stream(model) -> StreamFn:
+    """`StreamFn` over a LangChain chat model's `astream`."""
+    async def stream(messages: list):
+        async for chunk in model.astream([(m["role"], m["content"]) for m in messages]):
+            if chunk.content:
+                yield chunk.content
+    return stream
+
+
+class ChatServer:
+    """
+    Asyncio HTTP server streaming chat replies as Server-Sent Events.
+
+    POST /chat with {"message": ..., "session_id": optional} answers with
+    `data: {"token": ...}` events and a final `event: done` carrying the session id.
+    At most `max_concurrent` replies talk to the LLM at once and at most
+    `max_waiting` more may queue; beyond that requests get 503. Every token is
+    drained to the socket before the next one is read, so a slow client slows its
+    own stream instead of piling up tokens in memory.
+    """
+
+    def __init__(self, backend, max_concurrent: int = 16, max_waiting: int = 256, max_sessions: int = 10_000):
+        self.backend = backend
+        self.max_sessions = max_sessions
+        self.max_waiting = max_waiting
+        self.sessions: "OrderedDict[str, Session]" = OrderedDict()
+        self.llm_slots = asyncio.Semaphore(max_concurrent)
+        self.waiting = 0
+        self.stats = {"requests": 0, "rejected": 0, "errors": 0}
+
+    def session(self, session_id: Optional[str]) -> Session:
+        session_id = session_id or uuid.uuid4().hex
+        session = self.sessions.pop(session_id, None) or Session(session_id)
+        self.sessions[session_id] = session
+        while len(self.sessions) > self.max_sessions:
+            self.sessions.popitem(last=False)
+        return session
+
+    async def stream_reply(self, session: Session, text: str) -> AsyncIterator[str]:
+        if self.waiting >= self.max_waiting:
+            self.stats["rejected"] += 1
+            raise Overloaded()
+        self.waiting += 1
+        try:
+            await self.llm_slots.acquire()
+        finally:
+            self.waiting -= 1
+        try:
+            async with session.lock:
+                async for token in self.backend.reply(session, text):
+                    yield token
+        finally:
+            self.llm_slots.release()
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request_line = (await reader.readline()).decode("latin-1").split()
+            headers = {}
+            while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+            if len(request_line) < 2:
+                return
+            method, target = request_line[0], urlparse(request_line[1])
+            try:
+                length = int(headers.get("content-length", 0))
+            except ValueError:
+                length = -1
+            if length < 0:
+                await self.respond(writer, 400, {"error": "invalid Content-Length"})
+                return
+            body = await reader.readexactly(length)
+
+            if method == "GET" and target.path == "/health":
+                await self.respond(writer, 200, {"sessions": len(self.sessions), "waiting": self.waiting, **self.stats})
+            elif method == "POST" and target.path == "/chat":
+                try:
+                    payload = json.loads(body or b"{}")
+                except ValueError:
+                    payload = None
+                if not isinstance(payload, dict):
+                    await self.respond(writer, 400, {"error": "body must be a JSON object"})
+                    return
+                session_id = payload.get("session_id") or parse_qs(target.query).get("session_id", [None])[0]
+                await self.chat(writer, self.session(session_id), payload.get("message", ""))
+            else:
+                await self.respond(writer, 404, {"error": "not found"})
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def chat(self, writer: asyncio.StreamWriter, session: Session, text: str):
+        self.stats["requests"] += 1
+        tokens = self.stream_reply(session, text)
+        try:
+            first = await tokens.__anext__()
+        except Overloaded:
+            await self.respond(writer, 503, {"error": "too many requests waiting"})
+            return
+        except StopAsyncIteration:
+            first = None
+        except Exception as e:
+            # Failed before anything was sent (backend or retrieval error): still answer the request
+            self.stats["errors"] += 1
+            await self.respond(writer, 500, {"error": str(e)})
+            return
+
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\n"
+                     b"Cache-Control: no-cache\r\nConnection: close\r\n\r\n")
+        try:
+            if first is not None:
+                await self.send_event(writer, {"token": first})
+                async for token in tokens:
+                    await self.send_event(writer, {"token": token})
+            await self.send_event(writer, {"session_id": session.id}, event="done")
+        except ConnectionError:
+            await tokens.aclose()
+        except Exception as e:
+            self.stats["errors"] += 1
+            await self.send_event(writer, {"error": str(e)}, event="error")
+
+    @staticmethod
+    async def send_event(writer: asyncio.StreamWriter, data: dict, event: Optional[str] = None):
+        message = (f"event: {event}\n" if event else "") + f"data: {json.dumps(data)}\n\n"
+        writer.write(message.encode("utf-8"))
+        await writer.drain()
+
+    @staticmethod
+    async def respond(writer: asyncio.StreamWriter, status: int, data: dict):
+        body = json.dumps(data).encode("utf-8")
+        reason = {200: "OK", 400: "Bad Request", 404: "Not Found", 500: "Internal Server Error",
+                  503: "Service Unavailable"}[status]
+        writer.write(f"HTTP/1.1 {status} {reason}\r\nContent-Type: application/json\r\n"
+                     f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode("latin-1") + body)
+        await writer.drain()
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8000) -> asyncio.AbstractServer:
+        return await asyncio.start_server(self.handle, host, port, limit=2 ** 20, backlog=1024)
+
+
+def build_backend(bot: str):
+    """Backend for one of the project's bots (imports only what that bot needs)."""
+    import os
+
+    if bot == "fake":
+        from utils.fakes import FakeStreamingModel
+        return MessagesBackend(FakeStreamingModel())
+    if bot in ("mistral", "profiles"):
+        from mistralai import Mistral
+        from utils.chat_history import llm_summarizer
+        client = Mistral(api_key=os.getenv("MISTRAL_API_KEY"))
+        system_prompt = None
+        if bot == "profiles":
+            from langchain_mistralai import MistralAIEmbeddings
+            from utils.embedding_cache import CachedEmbeddings
+            from utils.profile_retrieval import ProfileRetriever
+            from utils.profiles import get_profile_loader
+            loader = get_profile_loader()
+            retriever = ProfileRetriever(CachedEmbeddings(MistralAIEmbeddings(model="mistral-embed")))
+            retriever.load(loader.profiles())
+
+            def system_prompt(question: str) -> str:
+                if loader.refresh():
+                    retriever.load(loader.profiles())
+                context = retriever.select(question).context
+                return f"The following are the details of professionals in the system:\n\n{context}"
+
+        def complete(prompt: str) -> str:
+            response = client.chat.complete(model="mistral-large-latest", messages=[{"role": "user", "content": prompt}])
+            return response.choices[0].message.content
+
+        return MessagesBackend(mistral_stream(client, "mistral-large-latest"),
+                               HistoryManager(summarizer=llm_summarizer(complete)), system_prompt)
+    if bot == "langgraph":
+        from langchain_learning.chatbot_with_memory_usig_langchain import ChatBot
+        return GraphBackend(ChatBot().workflow)
+    raise ValueError(f"Unknown bot {bot!r}")
+
+
+async def serve(args):
+    server = ChatServer(build_backend(args.bot), max_concurrent=args.max_concurrent, max_waiting=args.max_waiting)
+    listener = await server.start(args.host, args.port)
+    print(f"Serving {args.bot} bot on http://{args.host}:{args.port} (POST /chat, GET /health)")
+    async with listener:
+        await listener.serve_forever()
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Multi-session streaming chat server")
+    parser.add_argument("--bot", choices=["profiles", "mistral", "langgraph", "fake"], default="profiles")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--max-concurrent", type=int, default=16, help="replies streaming from the LLM at once")
+    parser.add_argument("--max-waiting", type=int, default=256, help="queued requests before answering 503")
+    asyncio.run(serve(parser.parse_args()))
@@ -0,0 +1,192 @@
+import atexit
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+
+def model_name_of(embeddings) -> str:
+    """Model name of a LangChain or LlamaIndex embedder (they do not agree on the attribute)."""
+    for attr in ("model_name", "model"):
+        name = getattr(embeddings, attr, None)
+        if isinstance(name, str) and name and name != "unknown":
+            return name
+    return type(embeddings).__name__
+
+
+def text_key(text: str, kind: str = "doc") -> str:
+    # Query and document embeddings differ for some models, so they never share an entry
+    return hashlib.sha256(f"{kind}\0{text}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    On-disk LRU cache of float32 vectors for a single embedding model.
+
+    Vectors live in a memory-mapped `<model>.f32` file that grows up to `max_entries`
+    rows. The key -> row index is kept in memory in LRU order and written to
+    `<model>.json` by `flush()`, which also runs at interpreter exit. When the file
+    is full, about 1% of the rows are evicted at once and the index is written
+    before any of them is reused, so the index on disk never maps a key to a row
+    that already holds another text's vector.
+    """
+
+    def __init__(self, directory: str, model: str, max_entries: int = 100_000, flush_interval: float = 5.0):
+        os.makedirs(directory, exist_ok=True)
+        slug = re.sub(r"[^A-Za-z0-9_.-]+", "_", model)
+        self.model = model
+        self.max_entries = max_entries
+        self.flush_interval = flush_interval
+        self.vectors_path = os.path.join(directory, f"{slug}.f32")
+        self.index_path = os.path.join(directory, f"{slug}.json")
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._lock = threading.Lock()
+        self._index: "OrderedDict[str, int]" = OrderedDict()
+        self._free: List[int] = []
+        self._dim: Optional[int] = None
+        self._rows = 0
+        self._vectors: Optional[np.memmap] = None
+        self._dirty = False
+        self._last_flush = time.monotonic()
+        self._load()
+        atexit.register(self.flush)
+
+    def _load(self):
+        if not (os.path.exists(self.index_path) and os.path.exists(self.vectors_path)):
+            return
+        with open(self.index_path, encoding="utf-8") as f:
+            meta = json.load(f)
+        self._dim, self._rows = meta["dim"], meta["rows"]
+        if os.path.getsize(self.vectors_path) < self._rows * self._dim * 4:
+            # Vectors file is behind the index (e.g. crash mid-write): start over
+            self._dim, self._rows = None, 0
+            return
+        self._vectors = np.memmap(self.vectors_path, dtype=np.float32, mode="r+", shape=(self._rows, self._dim))
+        for key, row in meta["entries"]:
+            self._index[key] = row
+        used = set(self._index.values())
+        self._free = [row for row in range(self._rows) if row not in used]
+
+    def _grow(self, needed: int):
+        rows = min(self.max_entries, max(needed, self._rows * 2, 1024))
+        if self._vectors is not None:
+            self._vectors.flush()
+            self._vectors = None  # the file cannot be resized while mapped on Windows
+        with open(self.vectors_path, "ab") as f:
+            f.truncate(rows * self._dim * 4)
+        self._free.extend(range(self._rows, rows))
+        self._rows = rows
+        self._vectors = np.memmap(self.vectors_path, dtype=np.float32, mode="r+", shape=(rows, self._dim))
+
+    def get_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        found = {}
+        with self._lock:
+            for key in keys:
+                row = self._index.get(key)
+                if row is None:
+                    self.misses += 1
+                    continue
+                self._index.move_to_end(key)
+                found[key] = self._vectors[row].tolist()
+                self.hits += 1
+        return found
+
+    def put_many(self, items: Dict[str, List[float]]):
+        with self._lock:
+            for key, vector in items.items():
+                if self._dim is None:
+                    self._dim = len(vector)
+                row = self._index.get(key)
+                if row is None:
+                    if not self._free and self._rows < self.max_entries:
+                        self._grow(self._rows + 1)
+                    if not self._free:
+                        self._evict(max(1, self.max_entries // 100))
+                    row = self._free.pop()
+                self._vectors[row] = np.asarray(vector, dtype=np.float32)
+                self._index[key] = row
+                self._index.move_to_end(key)
+            self._dirty = True
+        if time.monotonic() - self._last_flush > self.flush_interval:
+            self.flush()
+
+    def _evict(self, count: int):
+        """Free the `count` least recently used rows and write an index without them."""
+        for _ in range(min(count, len(self._index))):
+            _, row = self._index.popitem(last=False)
+            self._free.append(row)
+            self.evictions += 1
+        self._write_index()
+
+    def _write_index(self):
+        self._vectors.flush()
+        meta = {"model": self.model, "dim": self._dim, "rows": self._rows, "entries": list(self._index.items())}
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, self.index_path)
+        self._dirty = False
+        self._last_flush = time.monotonic()
+
+    def flush(self):
+        with self._lock:
+            if self._dirty:
+                self._write_index()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "model": self.model,
+            "entries": len(self._index),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+def embed_with_cache(cache: EmbeddingCache, texts: List[str], embed_fn, kind: str = "doc") -> List[List[float]]:
+    """Look texts up in the cache and send only the misses (deduplicated) to `embed_fn` in one call."""
+    keys = [text_key(text, kind) for text in texts]
+    found = cache.get_many(keys)
+    missing = {}
+    for key, text in zip(keys, texts):
+        if key not in found:
+            missing.setdefault(key, text)
+    if missing:
+        vectors = embed_fn(list(missing.values()))
+        computed = dict(zip(missing.keys(), vectors))
+        cache.put_many(computed)
+        found.update(computed)
+    return [found[key] for key in keys]
+
+
+class CachedEmbeddings(Embeddings):
+    """Wraps any LangChain `Embeddings` (HuggingFace, Mistral, ...) with an `EmbeddingCache`."""
+
+    def __init__(self, embeddings: Embeddings, cache_dir: str = "embedding_cache", max_entries: int = 100_000):
+        self.embeddings = embeddings
+        self.model = model_name_of(embeddings)
+        self.cache = EmbeddingCache(cache_dir, self.model, max_entries=max_entries)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return embed_with_cache(self.cache, texts, self.embeddings.embed_documents)
+
+    def embed_query(self, text: str) -> List[float]:
+        return embed_with_cache(self.cache, [text], lambda texts: [self.embeddings.embed_query(texts[0])], "query")[0]
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embed_documents(texts)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return self.embed_query(text)
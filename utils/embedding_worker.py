@@ -0,0 +1,305 @@
+import argparse
+import asyncio
+import json
+import os
+import socket
+import stat
+import struct
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from utils.embedding_cache import model_name_of
+
+DEFAULT_SOCKET = os.path.join(tempfile.gettempdir(), "embedding-worker.sock")
+# Frame: header length, payload length, JSON header, raw little-endian float32 vectors
+_FRAME = struct.Struct(">II")
+
+
+def _pack(header: dict, payload: bytes = b"") -> bytes:
+    data = json.dumps(header).encode("utf-8")
+    return _FRAME.pack(len(data), len(payload)) + data + payload
+
+
+def _check_owner(path: str):
+    """The default socket lives in the shared temp dir: only trust a socket this user created."""
+    info = os.lstat(path)
+    if not stat.S_ISSOCK(info.st_mode) or info.st_uid != os.getuid():
+        raise PermissionError(f"{path} is not a socket owned by this user")
+
+
+def _remove_stale_socket(path: str):
+    """Unlink a socket left by a worker that did not shut down cleanly; a live worker's socket is left alone."""
+    _check_owner(path)
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+    except ConnectionRefusedError:
+        os.unlink(path)
+        return
+    finally:
+        probe.close()
+    raise RuntimeError(f"An embedding worker is already serving on {path}")
+
+
+@dataclass
+class WorkerStats:
+    requests: int = 0
+    texts: int = 0
+    batches: int = 0
+    busy_seconds: float = 0.0
+
+    @property
+    def mean_batch(self) -> float:
+        return self.texts / self.batches if self.batches else 0.0
+
+
+class EmbeddingWorker:
+    """
+    Keeps one embedding model warm for every script on the machine, over a Unix socket.
+
+    Requests from concurrent clients are queued and merged into one
+    `embed_documents` call: a batch closes when it holds `max_batch` texts or
+    `max_wait_ms` after its first request arrived, whichever is first. Requests
+    that arrive while a batch is running are picked up by the next one without
+    waiting. Forward passes run one at a time on a single thread, since the
+    model already uses every core. Queries go through the same batches, which
+    matches `embed_query` for sentence-transformers models. The socket is only
+    open to the user running the worker, and clients refuse one owned by anyone else.
+    """
+
+    def __init__(self, embeddings: Embeddings, max_batch: int = 64, max_wait_ms: float = 5.0):
+        self.embeddings = embeddings
+        self.model = model_name_of(embeddings)
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.stats = WorkerStats()
+        self._queue: Optional[asyncio.Queue] = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="embed")
+
+    async def embed(self, texts: List[str]) -> np.ndarray:
+        future = asyncio.get_running_loop().create_future()
+        self.stats.requests += 1
+        await self._queue.put((texts, future))
+        return await future
+
+    async def _next_batch(self) -> List[Tuple[List[str], asyncio.Future]]:
+        loop = asyncio.get_running_loop()
+        # Requests that queued up during the last forward pass have waited already: take them and go.
+        # Only a batch opened by a request reaching an idle worker waits for more
+        backlog = not self._queue.empty()
+        pending = [await self._queue.get()]
+        size = len(pending[0][0])
+        deadline = loop.time() + self.max_wait
+        while size < self.max_batch:
+            if self._queue.empty():
+                timeout = deadline - loop.time()
+                if backlog or timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+            else:
+                item = self._queue.get_nowait()
+            pending.append(item)
+            size += len(item[0])
+        return pending
+
+    async def _batcher(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            pending = await self._next_batch()
+            texts = [text for request, _ in pending for text in request]
+            start = time.perf_counter()
+            try:
+                vectors = await loop.run_in_executor(self._executor, self.embeddings.embed_documents, texts)
+                vectors = np.asarray(vectors, dtype=np.float32).reshape(len(texts), -1)
+            except Exception as e:
+                for _, future in pending:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            self.stats.batches += 1
+            self.stats.texts += len(texts)
+            self.stats.busy_seconds += time.perf_counter() - start
+            offset = 0
+            for request, future in pending:
+                if not future.done():
+                    future.set_result(vectors[offset:offset + len(request)])
+                offset += len(request)
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                header_size, payload_size = _FRAME.unpack(await reader.readexactly(_FRAME.size))
+                request = json.loads(await reader.readexactly(header_size))
+                await reader.readexactly(payload_size)
+                op = request.get("op", "embed")
+                if op == "info":
+                    writer.write(_pack({"model": self.model}))
+                elif op == "stats":
+                    writer.write(_pack({**self.stats.__dict__, "mean_batch": round(self.stats.mean_batch, 2)}))
+                else:
+                    try:
+                        vectors = await self.embed(request["texts"])
+                    except Exception as e:
+                        writer.write(_pack({"error": f"{type(e).__name__}: {e}"}))
+                    else:
+                        writer.write(_pack({"count": vectors.shape[0], "dim": vectors.shape[1]},
+                                           vectors.astype("<f4").tobytes()))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, path: str = DEFAULT_SOCKET, ready: Optional[threading.Event] = None):
+        if os.path.lexists(path):
+            _remove_stale_socket(path)
+        self._queue = asyncio.Queue()
+        batcher = asyncio.create_task(self._batcher())
+        server = await asyncio.start_unix_server(self.handle, path, limit=2 ** 20)
+        os.chmod(path, 0o600)
+        if ready is not None:
+            ready.set()
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            batcher.cancel()
+            if os.path.exists(path):
+                os.unlink(path)
+
+
+def run_worker(embeddings: Embeddings, path: str = DEFAULT_SOCKET, max_batch: int = 64, max_wait_ms: float = 5.0):
+    """Blocking entry point, e.g. as a `multiprocessing.Process` target."""
+    try:
+        asyncio.run(EmbeddingWorker(embeddings, max_batch, max_wait_ms).serve(path))
+    except KeyboardInterrupt:
+        pass
+
+
+class WorkerUnavailable(ConnectionError):
+    pass
+
+
+class WorkerEmbeddings(Embeddings):
+    """
+    LangChain `Embeddings` client of an `EmbeddingWorker`.
+
+    Each thread keeps its own connection, so a threaded ingestion pipeline sends
+    requests concurrently and the worker batches them together. Long document
+    lists are sent `max_request` texts at a time. `model` is the worker's model
+    name, so `CachedEmbeddings` shares entries with the same model loaded in-process.
+    """
+
+    def __init__(self, path: str = DEFAULT_SOCKET, timeout: float = 120.0, max_request: int = 256):
+        self.path = path
+        self.timeout = timeout
+        self.max_request = max_request
+        self._local = threading.local()
+        self._model: Optional[str] = None
+
+    def _connect(self) -> socket.socket:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            _check_owner(self.path)
+            sock.connect(self.path)
+        except OSError as e:
+            sock.close()
+            raise WorkerUnavailable(f"No embedding worker at {self.path}: {e}") from e
+        return sock
+
+    @staticmethod
+    def _recv(sock: socket.socket, size: int) -> bytes:
+        buffer = bytearray(size)
+        view = memoryview(buffer)
+        while view:
+            read = sock.recv_into(view)
+            if not read:
+                raise ConnectionError("Embedding worker closed the connection")
+            view = view[read:]
+        return bytes(buffer)
+
+    def _exchange(self, sock: socket.socket, request: dict) -> Tuple[dict, bytes]:
+        sock.sendall(_pack(request))
+        header_size, payload_size = _FRAME.unpack(self._recv(sock, _FRAME.size))
+        header = json.loads(self._recv(sock, header_size))
+        return header, self._recv(sock, payload_size)
+
+    def _request(self, request: dict) -> Tuple[dict, bytes]:
+        sock = getattr(self._local, "sock", None)
+        if sock is not None:
+            try:
+                return self._exchange(sock, request)
+            except (ConnectionError, BrokenPipeError):
+                sock.close()  # the worker restarted; reconnect once
+        sock = self._local.sock = self._connect()
+        return self._exchange(sock, request)
+
+    @property
+    def model(self) -> str:
+        if self._model is None:
+            self._model = self._request({"op": "info"})[0]["model"]
+        return self._model
+
+    def stats(self) -> dict:
+        return self._request({"op": "stats"})[0]
+
+    def _embed(self, texts: List[str]) -> List[List[float]]:
+        header, payload = self._request({"texts": texts})
+        if "error" in header:
+            raise RuntimeError(f"Embedding worker failed: {header['error']}")
+        return np.frombuffer(payload, dtype="<f4").reshape(header["count"], header["dim"]).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        vectors = []
+        for start in range(0, len(texts), self.max_request):
+            vectors.extend(self._embed(texts[start:start + self.max_request]))
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed([text])[0]
+
+
+def connect_or_load(model_name: str, path: Optional[str] = None) -> Embeddings:
+    """
+    The running worker for `model_name` if there is one (socket from `path` or
+    EMBEDDING_SOCKET), otherwise the model loaded in this process.
+    """
+    path = path or os.getenv("EMBEDDING_SOCKET", DEFAULT_SOCKET)
+    if os.path.exists(path):
+        client = WorkerEmbeddings(path)
+        try:
+            if client.model == model_name:
+                return client
+            print(f"Embedding worker at {path} serves {client.model}, loading {model_name} locally")
+        except (OSError, ConnectionError):
+            pass
+    from langchain_huggingface import HuggingFaceEmbeddings
+
+    return HuggingFaceEmbeddings(model_name=model_name)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Long-lived local embedding worker on a Unix socket")
+    parser.add_argument("--model", default="sentence-transformers/all-MiniLM-L6-v2")
+    parser.add_argument("--socket", default=os.getenv("EMBEDDING_SOCKET", DEFAULT_SOCKET))
+    parser.add_argument("--max-batch", type=int, default=64, help="texts per forward pass")
+    parser.add_argument("--max-wait-ms", type=float, default=5.0, help="how long a batch waits to fill up")
+    args = parser.parse_args()
+
+    from langchain_huggingface import HuggingFaceEmbeddings
+
+    start = time.perf_counter()
+    model = HuggingFaceEmbeddings(model_name=args.model, model_kwargs={"device": "cpu"})
+    print(f"Loaded {args.model} in {time.perf_counter() - start:.1f}s, serving on {args.socket}")
+    run_worker(model, args.socket, args.max_batch, args.max_wait_ms)
@@ -0,0 +1,257 @@
+import hashlib
+import threading
+import time
+from typing import List
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+
+
+class RateLimitError(Exception):
+    status_code = 429
+
+
+class FakeEmbeddings(Embeddings):
+    """
+    Deterministic offline embedder for benchmarks and local runs.
+
+    The same text always gives the same unit vector. `latency` is paid once per call
+    plus `text_latency` per text (a forward pass: fixed overhead, then per-row cost),
+    and with `rate_limit_every=n` every n-th call fails with a 429 error.
+    """
+
+    def __init__(self, size: int = 384, latency: float = 0.0, rate_limit_every: int = 0,
+                 model: str = "fake-embed", text_latency: float = 0.0):
+        self.size = size
+        self.latency = latency
+        self.text_latency = text_latency
+        self.rate_limit_every = rate_limit_every
+        self.model = model
+        self.calls = 0
+        self.texts_embedded = 0
+        self._lock = threading.Lock()
+
+    def _vector(self, text: str) -> List[float]:
+        seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+        vector = np.random.default_rng(seed).standard_normal(self.size).astype(np.float32)
+        return (vector / np.linalg.norm(vector)).tolist()
+
+    def _call(self, count: int):
+        with self._lock:
+            self.calls += 1
+            call = self.calls
+        if self.latency or self.text_latency:
+            time.sleep(self.latency + self.text_latency * count)
+        if self.rate_limit_every and call % self.rate_limit_every == 0:
+            raise RateLimitError("429 Too Many Requests")
+        with self._lock:
+            self.texts_embedded += count
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self._call(len(texts))
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        self._call(1)
+        return self._vector(text)
+
+
+class BagOfWordsEmbeddings(FakeEmbeddings):
+    """
+    Feature-hashed bag of words: texts sharing words get similar vectors.
+
+    Unlike `FakeEmbeddings` this gives retrieval benchmarks a meaningful recall
+    number while staying offline and deterministic.
+    """
+
+    def _vector(self, text: str) -> List[float]:
+        import re
+
+        vector = np.zeros(self.size, dtype=np.float32)
+        for word in re.findall(r"\w+", text.lower()):
+            digest = int.from_bytes(hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest(), "little")
+            vector[digest % self.size] += 1.0 if digest >> 63 else -1.0
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+
+class FakeSearchTool:
+    """Offline stand-in for `TavilySearchResults(...)`: `.run(query)` sleeps `latency` and returns a canned hit."""
+
+    def __init__(self, latency: float = 0.3):
+        self.latency = latency
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def run(self, query: str) -> str:
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.latency)
+        return str([{"url": "https://example.com/search", "content": f"Top result for {query!r}"}])
+
+
+class FakeStreamingModel:
+    """
+    Streams a canned reply token by token, for load tests without an LLM.
+
+    Waits `first_token_latency` before the first token and `token_latency` between tokens.
+    """
+
+    def __init__(self, tokens: int = 50, first_token_latency: float = 0.2, token_latency: float = 0.01):
+        self.tokens = tokens
+        self.first_token_latency = first_token_latency
+        self.token_latency = token_latency
+        self.calls = 0
+
+    async def __call__(self, messages: list):
+        import asyncio
+
+        self.calls += 1
+        await asyncio.sleep(self.first_token_latency)
+        for i in range(self.tokens):
+            if i:
+                await asyncio.sleep(self.token_latency)
+            yield f"tok{i} "
+
+
+class FakeStructuredModel:
+    """
+    Stand-in for `ChatMistralAI(...).with_structured_output(schema)` with a fixed latency.
+
+    The "extraction" fills the first string field of the schema with the first
+    capitalised word of the input, which is enough to check plumbing and throughput.
+    """
+
+    def __init__(self, latency: float = 0.2):
+        self.latency = latency
+        self.calls = 0
+
+    def with_structured_output(self, schema):
+        import asyncio
+        import re
+
+        from langchain_core.runnables import RunnableLambda
+
+        field = next(iter(schema.model_fields))
+
+        def extract(prompt):
+            self.calls += 1
+            text = prompt.to_string() if hasattr(prompt, "to_string") else str(prompt)
+            words = re.findall(r"\b[A-Z][a-z]+\b", text.split("Human:")[-1])
+            return schema(**{field: words[0] if words else None})
+
+        def invoke(prompt):
+            time.sleep(self.latency)
+            return extract(prompt)
+
+        async def ainvoke(prompt):
+            await asyncio.sleep(self.latency)
+            return extract(prompt)
+
+        return RunnableLambda(invoke, afunc=ainvoke)
+
+
+def fake_reply(prompt_text: str, tokens: int) -> List[str]:
+    """Deterministic reply tokens that depend on the prompt, so cached and fresh answers can be told apart."""
+    digest = hashlib.sha256(prompt_text.encode("utf-8")).hexdigest()
+    return [f"{digest[i % 32:i % 32 + 4]} " for i in range(tokens)]
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    Offline LangChain chat model: waits `latency` seconds, then answers with `reply_tokens` tokens.
+
+    Works with `invoke`, `stream` and chains. Prompt and reply token counts are
+    tallied (`estimate_tokens`) so benchmarks can report what a real LLM would be sent.
+    """
+
+    latency: float = 0.0
+    token_latency: float = 0.0
+    reply_tokens: int = 20
+    calls: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    def _prompt(self, messages):
+        """Prompt text and its usage metadata (reported like a provider would, for tracing)."""
+        from utils.tokens import estimate_tokens
+
+        text = "\n".join(f"{message.type}: {message.content}" for message in messages)
+        tokens = estimate_tokens(text)
+        self.calls += 1
+        self.prompt_tokens += tokens
+        self.completion_tokens += self.reply_tokens
+        if self.latency:
+            time.sleep(self.latency)
+        return text, {"input_tokens": tokens, "output_tokens": self.reply_tokens,
+                      "total_tokens": tokens + self.reply_tokens}
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        from langchain_core.messages import AIMessage
+        from langchain_core.outputs import ChatGeneration, ChatResult
+
+        text, usage = self._prompt(messages)
+        reply = "".join(fake_reply(text, self.reply_tokens))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=reply, usage_metadata=usage))])
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        from langchain_core.messages import AIMessageChunk
+        from langchain_core.outputs import ChatGenerationChunk
+
+        text, usage = self._prompt(messages)
+        for i, token in enumerate(fake_reply(text, self.reply_tokens)):
+            if i and self.token_latency:
+                time.sleep(self.token_latency)
+            # Usage rides on the first chunk; chunks are summed when merged
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token, usage_metadata=None if i else usage))
+            if run_manager:
+                run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+
+
+class FakeMistralClient:
+    """
+    Stand-in for `mistralai.Mistral` with the `chat.complete` / `chat.stream` calls the bots use.
+
+    Replies come from a `FakeChatModel`-like tally: `latency` before the reply,
+    `reply_tokens` tokens, prompt and reply tokens counted.
+    """
+
+    def __init__(self, latency: float = 0.0, reply_tokens: int = 20):
+        from types import SimpleNamespace
+
+        self.latency = latency
+        self.reply_tokens = reply_tokens
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.chat = SimpleNamespace(complete=self._complete, stream=self._stream)
+
+    def _reply(self, messages: list) -> List[str]:
+        from utils.tokens import estimate_tokens
+
+        text = "\n".join(f"{m['role']}: {m['content']}" for m in messages)
+        self.calls += 1
+        self.prompt_tokens += estimate_tokens(text)
+        self.completion_tokens += self.reply_tokens
+        if self.latency:
+            time.sleep(self.latency)
+        return fake_reply(text, self.reply_tokens)
+
+    def _complete(self, model: str, messages: list):
+        from types import SimpleNamespace
+
+        content = "".join(self._reply(messages))
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+    def _stream(self, model: str, messages: list):
+        from types import SimpleNamespace
+
+        for token in self._reply(messages):
+            delta = SimpleNamespace(content=token)
+            yield SimpleNamespace(data=SimpleNamespace(choices=[SimpleNamespace(delta=delta)]))
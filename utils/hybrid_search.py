@@ -0,0 +1,193 @@
+import math
+import re
+import threading
+from array import array
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+
+from utils.numpy_vector_store import top_k
+
+_TOKEN = re.compile(r"[a-z0-9]+(?:\.[0-9]+)*")
+STOPWORDS = frozenset(
+    "a an and are as at be by did do does for from has have how in is it its of on or s "
+    "that the their this to was were what when where which who why will with".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase words and numbers ("2023", "51.2"); possessive 's and stopwords are dropped."""
+    return [token for token in _TOKEN.findall(text.lower()) if token not in STOPWORDS]
+
+
+class BM25Index:
+    """
+    Compact in-memory BM25 inverted index.
+
+    Each term keeps two flat arrays (row numbers and term frequencies) instead of
+    per-document dicts, so a query only touches the postings of its own terms and
+    scores them with a few vectorised NumPy operations. Deletes leave tombstones
+    that `compact()` squeezes out once they pile up.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._rows: Dict[str, array] = {}
+        self._tfs: Dict[str, array] = {}
+        self._lengths = array("I")
+        self._ids: List[Optional[str]] = []
+        self._alive = bytearray()
+        self._row_of: Dict[str, int] = {}
+        self._total_length = 0
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._row_of)
+
+    def add(self, ids: Sequence[str], texts: Sequence[str]):
+        with self._lock:
+            self.delete(ids)
+            for doc_id, text in zip(ids, texts):
+                row = len(self._ids)
+                tokens = tokenize(text)
+                counts: Dict[str, int] = {}
+                for token in tokens:
+                    counts[token] = counts.get(token, 0) + 1
+                for token, count in counts.items():
+                    if token not in self._rows:
+                        self._rows[token] = array("I")
+                        self._tfs[token] = array("H")
+                    self._rows[token].append(row)
+                    self._tfs[token].append(min(count, 0xFFFF))
+                self._ids.append(doc_id)
+                self._alive.append(1)
+                self._row_of[doc_id] = row
+                self._lengths.append(len(tokens))
+                self._total_length += len(tokens)
+
+    def delete(self, ids: Iterable[str]):
+        with self._lock:
+            for doc_id in ids:
+                row = self._row_of.pop(doc_id, None)
+                if row is not None:
+                    self._ids[row] = None
+                    self._alive[row] = 0
+                    self._total_length -= self._lengths[row]
+            if len(self._ids) > 1024 and len(self._row_of) < len(self._ids) * 0.75:
+                self.compact()
+
+    def compact(self):
+        """Drop tombstoned rows from every postings list and renumber the rest."""
+        with self._lock:
+            alive = np.frombuffer(self._alive, dtype=np.uint8).astype(bool)
+            new_row = np.cumsum(alive, dtype=np.int64) - 1
+            for token in list(self._rows):
+                rows = np.frombuffer(self._rows[token], dtype=np.uint32)
+                keep = alive[rows]
+                if not keep.any():
+                    del self._rows[token], self._tfs[token]
+                    continue
+                self._rows[token] = array("I", new_row[rows[keep]].astype(np.uint32).tobytes())
+                self._tfs[token] = array("H", np.frombuffer(self._tfs[token], dtype=np.uint16)[keep].tobytes())
+            self._lengths = array("I", np.frombuffer(self._lengths, dtype=np.uint32)[alive].tobytes())
+            self._ids = [doc_id for doc_id in self._ids if doc_id is not None]
+            self._alive = bytearray(b"\x01" * len(self._ids))
+            self._row_of = {doc_id: row for row, doc_id in enumerate(self._ids)}
+
+    def search(self, query: str, k: int = 50) -> List[Tuple[str, float]]:
+        """Top-k (id, BM25 score) for documents sharing at least one term with the query."""
+        with self._lock:
+            live = len(self._row_of)
+            if not live:
+                return []
+            lengths = np.frombuffer(self._lengths, dtype=np.uint32)
+            norm = self.k1 * (1 - self.b + self.b * lengths / (self._total_length / live or 1.0))
+            scores = np.zeros(len(self._ids), dtype=np.float32)
+            for token in set(tokenize(query)):
+                if token not in self._rows:
+                    continue
+                rows = np.frombuffer(self._rows[token], dtype=np.uint32)
+                tfs = np.frombuffer(self._tfs[token], dtype=np.uint16).astype(np.float32)
+                idf = math.log(1 + (live - len(rows) + 0.5) / (len(rows) + 0.5))
+                scores[rows] += idf * tfs * (self.k1 + 1) / (tfs + norm[rows])
+            if live < len(self._ids):
+                scores *= np.frombuffer(self._alive, dtype=np.uint8)
+            hits = np.flatnonzero(scores > 0)
+            best = hits[top_k(scores[hits], k)]
+            return [(self._ids[row], float(scores[row])) for row in best]
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[str]], rrf_k: int = 60) -> List[Tuple[str, float]]:
+    """Fuse ranked id lists: each id scores sum(1 / (rrf_k + rank)) over the lists it appears in."""
+    fused: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, 1):
+            fused[doc_id] = fused.get(doc_id, 0.0) + 1.0 / (rrf_k + rank)
+    return sorted(fused.items(), key=lambda item: item[1], reverse=True)
+
+
+class HybridSearch:
+    """
+    BM25 next to a vector store, fused by reciprocal rank fusion.
+
+    Use it in place of the store when ingesting (`add_documents`/`delete` write to
+    both) and call `search` from a retriever. With `shortlist_only=True` only the
+    `lexical_k` BM25 candidates are vector-scored, which is much cheaper than a
+    full scan on large stores (stores without `score_ids` fall back to a normal
+    vector search intersected with the shortlist). Queries without any indexed term
+    fall back to pure vector search. Anything else is delegated to the vector store.
+    """
+
+    def __init__(self, vector_store, k: int = 4, lexical_k: int = 50, rrf_k: int = 60,
+                 shortlist_only: bool = False, index: Optional[BM25Index] = None):
+        self.vector_store = vector_store
+        self.k = k
+        self.lexical_k = lexical_k
+        self.rrf_k = rrf_k
+        self.shortlist_only = shortlist_only
+        self.index = index or BM25Index()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.vector_store, name)
+
+    def add_documents(self, documents: List[Document], ids: Optional[List[str]] = None, **kwargs: Any) -> List[str]:
+        ids = self.vector_store.add_documents(documents, ids=ids, **kwargs)
+        self.index.add(ids, [doc.page_content for doc in documents])
+        return ids
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> Optional[bool]:
+        self.index.delete(ids or [])
+        return self.vector_store.delete(ids=ids, **kwargs)
+
+    def _vector_ranking(self, query: str, shortlist: List[str]) -> List[Tuple[Document, float]]:
+        if shortlist and hasattr(self.vector_store, "score_ids"):
+            embedding = self.vector_store.embeddings.embed_query(query)
+            return self.vector_store.score_ids(embedding, shortlist)
+        hits = self.vector_store.similarity_search_with_score(query, k=self.lexical_k)
+        if shortlist:
+            allowed = set(shortlist)
+            hits = [(doc, score) for doc, score in hits if doc.id in allowed]
+        return hits
+
+    def search_with_scores(self, query: str, k: Optional[int] = None,
+                           shortlist_only: Optional[bool] = None) -> List[Tuple[Document, float]]:
+        """Top-k (document, RRF score) for the query."""
+        k = k or self.k
+        shortlist_only = self.shortlist_only if shortlist_only is None else shortlist_only
+        lexical = [doc_id for doc_id, _ in self.index.search(query, self.lexical_k)]
+        if not lexical:
+            return self.vector_store.similarity_search_with_score(query, k=k)
+
+        vector_hits = self._vector_ranking(query, lexical if shortlist_only else [])
+        vector_hits.sort(key=lambda hit: hit[1], reverse=True)
+        docs = {doc.id: doc for doc, _ in vector_hits}
+        fused = reciprocal_rank_fusion([lexical, [doc.id for doc, _ in vector_hits]], self.rrf_k)[:k]
+        missing = [doc_id for doc_id, _ in fused if doc_id not in docs]
+        if missing:
+            docs.update((doc.id, doc) for doc in self.vector_store.get_by_ids(missing))
+        return [(docs[doc_id], score) for doc_id, score in fused if doc_id in docs]
+
+    def search(self, query: str, k: Optional[int] = None, shortlist_only: Optional[bool] = None) -> List[Document]:
+        return [doc for doc, _ in self.search_with_scores(query, k, shortlist_only)]
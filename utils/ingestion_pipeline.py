@@ -0,0 +1,85 @@
+import random
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from itertools import islice
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from langchain_core.documents import Document
+
+
+@dataclass
+class IngestReport:
+    chunks: int = 0
+    batches: int = 0
+    retries: int = 0
+    seconds: float = 0.0
+
+    @property
+    def chunks_per_sec(self) -> float:
+        return self.chunks / self.seconds if self.seconds else 0.0
+
+
+def batched(items: Iterable, size: int) -> Iterator[list]:
+    iterator = iter(items)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def is_rate_limited(error: Exception) -> bool:
+    status = getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+    if status == 429:
+        return True
+    message = str(error).lower()
+    return "429" in message or "rate limit" in message or "too many requests" in message
+
+
+def _write_batch(store, batch: List[Tuple[Optional[str], Document]], max_retries: int, backoff: float) -> int:
+    """Embed and store one batch, backing off on rate limits. Returns the number of retries."""
+    documents = [doc for _, doc in batch]
+    ids = [chunk_id for chunk_id, _ in batch]
+    kwargs = {"ids": ids} if all(chunk_id is not None for chunk_id in ids) else {}
+    for attempt in range(max_retries + 1):
+        try:
+            store.add_documents(documents, **kwargs)
+            return attempt
+        except Exception as e:
+            if attempt == max_retries or not is_rate_limited(e):
+                raise
+            # Exponential backoff with jitter so the workers do not retry in lockstep
+            time.sleep(backoff * (2 ** attempt) * (0.5 + random.random()))
+
+
+def ingest(store, documents: Iterable[Document], ids: Optional[Iterable[str]] = None,
+           batch_size: int = 64, max_workers: int = 4, max_retries: int = 5,
+           backoff: float = 1.0) -> IngestReport:
+    """
+    Stream documents into `store` in fixed-size batches.
+
+    Up to `max_workers` batches are embedded at once and each batch is written as
+    soon as its embeddings are back, so only about 2 * max_workers batches are ever
+    held in memory no matter how large the corpus is.
+    """
+    report = IngestReport()
+    pairs = zip(ids, documents) if ids is not None else ((None, doc) for doc in documents)
+    start = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        pending = {}
+        for batch in batched(pairs, batch_size):
+            if len(pending) >= 2 * max_workers:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    report.retries += future.result()
+                    report.chunks += pending.pop(future)
+                    report.batches += 1
+            pending[pool.submit(_write_batch, store, batch, max_retries, backoff)] = len(batch)
+
+        for future in list(pending):
+            report.retries += future.result()
+            report.chunks += pending.pop(future)
+            report.batches += 1
+
+    report.seconds = time.perf_counter() - start
+    return report
+
@@ -0,0 +1,51 @@
+import threading
+from concurrent.futures import Future
+from typing import Callable, Generic, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class Deferred(Generic[T]):
+    """
+    An expensive object (client, index, agent) built on first use.
+
+    `get()` builds it once, thread-safe, and returns the same instance afterwards.
+    `prefetch()` starts building on a daemon thread so an interactive script can show
+    its prompt immediately and have the object ready by the time the user hits enter.
+    A failed build is re-raised from `get()`.
+    """
+
+    def __init__(self, factory: Callable[[], T]):
+        self._factory = factory
+        self._future: Optional[Future] = None
+        self._lock = threading.Lock()
+
+    def _claim(self):
+        """Returns the future, plus True if the caller has to run the factory."""
+        with self._lock:
+            if self._future is not None:
+                return self._future, False
+            self._future = Future()
+            return self._future, True
+
+    def _build(self, future: "Future[T]"):
+        try:
+            future.set_result(self._factory())
+        except BaseException as e:
+            future.set_exception(e)
+
+    def prefetch(self) -> "Deferred[T]":
+        future, owner = self._claim()
+        if owner:
+            threading.Thread(target=self._build, args=(future,), daemon=True).start()
+        return self
+
+    def get(self) -> T:
+        future, owner = self._claim()
+        if owner:
+            self._build(future)
+        return future.result()
+
+    @property
+    def ready(self) -> bool:
+        return self._future is not None and self._future.done()
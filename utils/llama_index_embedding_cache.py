@@ -0,0 +1,36 @@
+from typing import Any, List
+
+from llama_index.core.base.embeddings.base import BaseEmbedding
+from pydantic import PrivateAttr
+
+from utils.embedding_cache import EmbeddingCache, embed_with_cache, model_name_of
+
+
+class CachedLlamaIndexEmbedding(BaseEmbedding):
+    """LlamaIndex counterpart of `CachedEmbeddings`, e.g. around `OpenAIEmbedding()`."""
+
+    _embed_model: BaseEmbedding = PrivateAttr()
+    _cache: EmbeddingCache = PrivateAttr()
+
+    def __init__(self, embed_model: BaseEmbedding, cache_dir: str = "embedding_cache",
+                 max_entries: int = 100_000, **kwargs: Any):
+        super().__init__(model_name=model_name_of(embed_model), embed_batch_size=embed_model.embed_batch_size, **kwargs)
+        self._embed_model = embed_model
+        self._cache = EmbeddingCache(cache_dir, self.model_name, max_entries=max_entries)
+
+    @property
+    def cache(self) -> EmbeddingCache:
+        return self._cache
+
+    def _get_query_embedding(self, query: str) -> List[float]:
+        return embed_with_cache(self._cache, [query], lambda texts: [self._embed_model.get_query_embedding(texts[0])],
+                                "query")[0]
+
+    async def _aget_query_embedding(self, query: str) -> List[float]:
+        return self._get_query_embedding(query)
+
+    def _get_text_embedding(self, text: str) -> List[float]:
+        return self._get_text_embeddings([text])[0]
+
+    def _get_text_embeddings(self, texts: List[str]) -> List[List[float]]:
+        return embed_with_cache(self._cache, texts, self._embed_model.get_text_embedding_batch)
@@ -0,0 +1,111 @@
+import hashlib
+import json
+import os
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
+
+from llama_index.core import SimpleDirectoryReader, StorageContext, VectorStoreIndex, load_index_from_storage
+
+MANIFEST_FILE = "file_manifest.json"
+
+
+@dataclass
+class RefreshReport:
+    added: List[str] = field(default_factory=list)
+    changed: List[str] = field(default_factory=list)
+    deleted: List[str] = field(default_factory=list)
+    unchanged: int = 0
+
+    @property
+    def modified(self) -> bool:
+        return bool(self.added or self.changed or self.deleted)
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def list_files(data_dir: str) -> List[str]:
+    files = []
+    for root, dirs, names in os.walk(data_dir):
+        dirs[:] = [d for d in dirs if not d.startswith(".")]
+        files.extend(os.path.join(root, name) for name in names if not name.startswith("."))
+    return sorted(files)
+
+
+def _read_manifest(persist_dir: str) -> Dict[str, dict]:
+    path = os.path.join(persist_dir, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _write_manifest(persist_dir: str, manifest: Dict[str, dict]):
+    path = os.path.join(persist_dir, MANIFEST_FILE)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(path + ".tmp", path)
+
+
+def refresh_index(index: VectorStoreIndex, data_dir: str, persist_dir: str) -> RefreshReport:
+    """
+    Re-embed only the files under data_dir that were added, changed or deleted since the last run.
+
+    A file whose mtime and size match the manifest is not even read; otherwise its
+    sha256 decides whether it really changed (a touched-but-identical file is kept).
+    """
+    report = RefreshReport()
+    manifest = _read_manifest(persist_dir)
+    seen = set()
+
+    for path in list_files(data_dir):
+        key = os.path.relpath(path, data_dir).replace(os.sep, "/")
+        seen.add(key)
+        stat = os.stat(path)
+        entry = manifest.get(key)
+        if entry and entry["mtime"] == stat.st_mtime and entry["size"] == stat.st_size:
+            report.unchanged += 1
+            continue
+
+        sha256 = file_sha256(path)
+        if entry and entry["sha256"] == sha256:
+            entry.update(mtime=stat.st_mtime, size=stat.st_size)
+            report.unchanged += 1
+            continue
+
+        if entry:
+            for doc_id in entry["doc_ids"]:
+                index.delete_ref_doc(doc_id, delete_from_docstore=True)
+            report.changed.append(key)
+        else:
+            report.added.append(key)
+        documents = SimpleDirectoryReader(input_files=[path], filename_as_id=True).load_data()
+        for document in documents:
+            index.insert(document)
+        manifest[key] = {"mtime": stat.st_mtime, "size": stat.st_size, "sha256": sha256,
+                         "doc_ids": [document.doc_id for document in documents]}
+
+    for key in sorted(set(manifest) - seen):
+        for doc_id in manifest.pop(key)["doc_ids"]:
+            index.delete_ref_doc(doc_id, delete_from_docstore=True)
+        report.deleted.append(key)
+
+    os.makedirs(persist_dir, exist_ok=True)
+    if report.modified or not os.path.exists(os.path.join(persist_dir, "docstore.json")):
+        index.storage_context.persist(persist_dir=persist_dir)
+    _write_manifest(persist_dir, manifest)
+    return report
+
+
+def load_index(data_dir: str = "data", persist_dir: str = "storage") -> Tuple[VectorStoreIndex, RefreshReport]:
+    """Load the persisted index (or start an empty one) and refresh it from data_dir."""
+    if os.path.exists(os.path.join(persist_dir, "docstore.json")):
+        index = load_index_from_storage(StorageContext.from_defaults(persist_dir=persist_dir))
+    else:
+        index = VectorStoreIndex.from_documents([])
+    return index, refresh_index(index, data_dir, persist_dir)
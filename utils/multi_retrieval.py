@@ -0,0 +1,90 @@
+import hashlib
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Sequence, Tuple
+
+from langchain_core.documents import Document
+
+from utils.hybrid_search import reciprocal_rank_fusion
+from utils.near_dedup import NearDuplicateFilter, normalise_text
+
+Retriever = Callable[[str], List[Document]]
+
+
+@dataclass
+class RetrieverHits:
+    name: str
+    documents: List[Document] = field(default_factory=list)
+    seconds: float = 0.0
+    # "ok", "timeout" or "error: <message>"
+    status: str = "ok"
+
+
+class FanOutRetriever:
+    """
+    Several retrievers queried at once, each with its own deadline.
+
+    `retrieve(name, query)` runs one retriever on a shared pool and waits at most
+    its timeout, so a caller fanning out (LangGraph runs parallel nodes in threads)
+    returns after the slowest retriever that meets its deadline. A late retriever
+    keeps its pool thread until it finishes and its result is dropped; a failing
+    one comes back empty with the error as status. `merge` fuses the per-retriever
+    rankings by reciprocal rank, drops exact and near-duplicate chunks, and records
+    which retrievers found each kept chunk in `metadata["retrievers"]`.
+    """
+
+    def __init__(self, retrievers: Dict[str, Tuple[Retriever, float]], max_workers: int = 16):
+        self.retrievers = dict(retrievers)
+        # Room for late retrievers still running next to the next query's
+        self._pool = ThreadPoolExecutor(max_workers=max(max_workers, 2 * len(self.retrievers)),
+                                        thread_name_prefix="retriever")
+
+    def retrieve(self, name: str, query: str) -> RetrieverHits:
+        func, timeout = self.retrievers[name]
+        start = time.perf_counter()
+        future = self._pool.submit(func, query)
+        try:
+            documents = future.result(timeout=timeout)
+        except FutureTimeout:
+            future.cancel()
+            return RetrieverHits(name, seconds=time.perf_counter() - start, status="timeout")
+        except Exception as e:
+            return RetrieverHits(name, seconds=time.perf_counter() - start, status=f"error: {type(e).__name__}: {e}")
+        return RetrieverHits(name, list(documents), time.perf_counter() - start)
+
+    def retrieve_all(self, query: str) -> List[RetrieverHits]:
+        """Every retriever at once, outside a graph; the calls themselves wait on the pool."""
+        with ThreadPoolExecutor(max_workers=len(self.retrievers)) as waiters:
+            return list(waiters.map(lambda name: self.retrieve(name, query), self.retrievers))
+
+    @staticmethod
+    def merge(hits: Sequence[RetrieverHits], k: int = 6, rrf_k: int = 60, threshold: float = 0.85) -> List[Document]:
+        rankings, merged = [], {}
+        for result in hits:
+            ranking = []
+            for doc in result.documents:
+                key = hashlib.blake2b(normalise_text(doc.page_content).encode("utf-8"), digest_size=16).hexdigest()
+                if key not in merged:
+                    # A copy, so the stores' own documents are not tagged
+                    merged[key] = Document(page_content=doc.page_content, metadata={**doc.metadata, "retrievers": []})
+                if result.name not in merged[key].metadata["retrievers"]:
+                    merged[key].metadata["retrievers"].append(result.name)
+                if key not in ranking:
+                    ranking.append(key)
+            rankings.append(ranking)
+
+        # Overlapping chunks of the same text from two stores are near- not exact duplicates
+        dedupe = NearDuplicateFilter(threshold=threshold)
+        documents = []
+        for key, _ in reciprocal_rank_fusion(rankings, rrf_k):
+            doc = merged[key]
+            duplicate, index = dedupe.check(doc.page_content)
+            if duplicate:
+                kept = documents[index].metadata["retrievers"]
+                kept.extend(name for name in doc.metadata["retrievers"] if name not in kept)
+                continue
+            documents.append(doc)
+            if len(documents) == k:
+                break
+        return documents
@@ -0,0 +1,185 @@
+import hashlib
+import re
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Tuple, Union
+
+import numpy as np
+from langchain_core.documents import Document
+
+# Metadata `deduplicate` sets on kept chunks
+DUPLICATE_COUNT = "duplicate_count"
+DUPLICATE_SOURCES = "duplicate_sources"
+
+_SPACES = re.compile(r"\s+")
+
+
+def lsh_bands(threshold: float, num_perm: int) -> Tuple[int, int]:
+    """
+    (bands, rows) for the banding scheme: the fewest bands whose LSH threshold
+    (1/bands)^(1/rows) is at or below `threshold`, so candidates are found
+    generously and then verified on the full signature.
+    """
+    for bands in range(1, num_perm + 1):
+        if num_perm % bands == 0 and (1 / bands) ** (bands / num_perm) <= threshold:
+            return bands, num_perm // bands
+    return num_perm, 1
+
+
+def normalise_text(text: str) -> str:
+    return _SPACES.sub(" ", text.lower()).strip()
+
+
+@dataclass
+class DedupStats:
+    chunks: int = 0
+    kept: int = 0
+    exact_duplicates: int = 0
+    near_duplicates: int = 0
+    dropped_chars: int = 0
+
+    @property
+    def dropped(self) -> int:
+        return self.exact_duplicates + self.near_duplicates
+
+    @property
+    def embedding_calls_saved(self) -> int:
+        """Texts that never reach the embedder (one per dropped chunk)."""
+        return self.dropped
+
+    def bytes_saved(self, dim: int = 1024) -> int:
+        """Vector store bytes not written: one float32 vector plus the chunk text per dropped chunk."""
+        return self.dropped * dim * 4 + self.dropped_chars
+
+
+class NearDuplicateFilter:
+    """
+    MinHash/LSH near-duplicate removal between splitting and embedding.
+
+    Each chunk is reduced to `num_perm` MinHash values over 8-byte character
+    shingles, computed with vectorised NumPy (no per-shingle Python work). Banded
+    LSH buckets find earlier chunks that probably match, and the full signature
+    confirms the estimated Jaccard similarity is at least `threshold`. Exact
+    repeats are caught by a content hash first. Only kept chunks are indexed, and a
+    chunk is checked against at most `max_candidates` chunks per band. Cost per
+    chunk is therefore constant and the filter scales linearly. Memory is
+    `num_perm` uint32 values, a 16-byte digest and `bands` integer bucket
+    entries per kept chunk (about 1 KB, so a few GB per million unique chunks).
+
+    Dropped chunks are not lost: `references[kept_index]` lists their sources, and
+    `deduplicate` copies them into the kept chunk's metadata.
+    """
+
+    def __init__(self, threshold: float = 0.85, num_perm: int = 64, max_candidates: int = 4, seed: int = 1):
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.max_candidates = max_candidates
+        self.bands, self.rows = lsh_bands(threshold, num_perm)
+        rng = np.random.default_rng(seed)
+        # Odd multipliers make each (a * x + b) mod 2^32 a permutation of the 32-bit shingle hashes
+        self._a = rng.integers(0, 1 << 32, size=(num_perm, 1), dtype=np.uint32) | np.uint32(1)
+        self._b = rng.integers(0, 1 << 32, size=(num_perm, 1), dtype=np.uint32)
+        self._band_mix = rng.integers(0, 1 << 63, size=self.rows, dtype=np.uint64) | np.uint64(1)
+        # One dict per band: band key -> kept index, or a short list of them on collisions
+        self._buckets: List[Dict[int, Union[int, List[int]]]] = [{} for _ in range(self.bands)]
+        self._exact: Dict[bytes, int] = {}
+        self._signatures = np.empty((1024, num_perm), dtype=np.uint32)
+        self.references: Dict[int, List[str]] = {}
+        self.stats = DedupStats()
+
+    def signature(self, text: str) -> np.ndarray:
+        return self._signature(normalise_text(text).encode("utf-8"))
+
+    def _signature(self, data: bytes) -> np.ndarray:
+        padded = np.zeros(max(len(data), 8) + 8, dtype=np.uint8)
+        padded[:len(data)] = np.frombuffer(data, dtype=np.uint8)
+        # Every 8-byte window read as one little-endian uint64 (overlapping strides, no copy per shingle)
+        count = max(len(data) - 7, 1)
+        shingles = np.ndarray((count,), dtype="<u8", buffer=padded.data, strides=(1,)).copy()
+        shingles ^= shingles >> np.uint64(29)
+        shingles *= np.uint64(0xBF58476D1CE4E5B9)
+        shingles ^= shingles >> np.uint64(32)
+        hashed = self._a * shingles.astype(np.uint32)
+        hashed += self._b
+        return hashed.min(axis=1)
+
+    def _band_keys(self, signature: np.ndarray) -> List[int]:
+        """One 64-bit key per band, mixed from that band's rows of the signature."""
+        return (signature.reshape(self.bands, self.rows).astype(np.uint64) * self._band_mix).sum(axis=1).tolist()
+
+    def _register(self, signature: np.ndarray) -> int:
+        index = self.stats.kept
+        if index == len(self._signatures):
+            grown = np.empty((2 * index, self.num_perm), dtype=np.uint32)
+            grown[:index] = self._signatures
+            self._signatures = grown
+        self._signatures[index] = signature
+        for buckets, key in zip(self._buckets, self._band_keys(signature)):
+            members = buckets.get(key)
+            if members is None:
+                buckets[key] = index
+            elif isinstance(members, int):
+                buckets[key] = [members, index]
+            elif len(members) < self.max_candidates:
+                members.append(index)
+        self.stats.kept += 1
+        return index
+
+    def check(self, text: str) -> Tuple[bool, int]:
+        """(is_duplicate, index of the kept chunk it matches or of this newly kept chunk)."""
+        self.stats.chunks += 1
+        data = normalise_text(text).encode("utf-8")
+        digest = hashlib.blake2b(data, digest_size=16).digest()
+        if digest in self._exact:
+            self.stats.exact_duplicates += 1
+            return True, self._exact[digest]
+
+        signature = self._signature(data)
+        seen = set()
+        for buckets, key in zip(self._buckets, self._band_keys(signature)):
+            members = buckets.get(key, ())
+            for index in ((members,) if isinstance(members, int) else members):
+                if index in seen:
+                    continue
+                seen.add(index)
+                if np.mean(self._signatures[index] == signature) >= self.threshold:
+                    self.stats.near_duplicates += 1
+                    return True, index
+
+        index = self._register(signature)
+        self._exact[digest] = index
+        return False, index
+
+    @staticmethod
+    def reference(doc: Document) -> str:
+        """Where a chunk came from: its source/blog id, plus page and offset when known."""
+        metadata = doc.metadata
+        ref = str(metadata.get("source") or metadata.get("blog_id") or doc.id or "?")
+        for key in ("page", "start_index"):
+            if key in metadata:
+                ref += f"#{key}={metadata[key]}"
+        return ref
+
+    def filter(self, documents: Iterable[Document]) -> Iterator[Document]:
+        """Yield only chunks that are not (near-)duplicates of an earlier one. Streams."""
+        for doc in documents:
+            duplicate, index = self.check(doc.page_content)
+            if duplicate:
+                self.stats.dropped_chars += len(doc.page_content)
+                self.references.setdefault(index, []).append(self.reference(doc))
+            else:
+                yield doc
+
+    def deduplicate(self, documents: Iterable[Document]) -> List[Document]:
+        """
+        Like `filter`, but for a finite batch: each kept chunk that absorbed duplicates
+        gets `duplicate_count` and `duplicate_sources` (comma-joined) in its metadata.
+        """
+        first = self.stats.kept
+        kept = list(self.filter(documents))
+        for index, refs in self.references.items():
+            if index >= first:
+                doc = kept[index - first]
+                unique = list(dict.fromkeys(refs))
+                doc.metadata[DUPLICATE_COUNT] = len(refs)
+                doc.metadata[DUPLICATE_SOURCES] = ",".join(unique)
+        return kept
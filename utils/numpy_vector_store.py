@@ -0,0 +1,247 @@
+import json
+import os
+import threading
+import uuid
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+
+def normalise(vectors) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k best scores along the last axis, best first (argpartition + sort of k)."""
+    k = min(k, scores.shape[-1])
+    if k <= 0:
+        return np.empty(scores.shape[:-1] + (0,), dtype=np.int64)
+    candidates = np.argpartition(-scores, k - 1, axis=-1)[..., :k]
+    order = np.argsort(-np.take_along_axis(scores, candidates, axis=-1), axis=-1)
+    return np.take_along_axis(candidates, order, axis=-1)
+
+
+class NumpyVectorStore(VectorStore):
+    """
+    Drop-in replacement for `InMemoryVectorStore` backed by one float32 matrix.
+
+    Rows are normalised on insert so cosine similarity is a single matrix multiply,
+    for one query or a whole batch. The matrix grows by doubling and deletes move the
+    last row into the freed slot, so neither copies the whole matrix per call.
+    """
+
+    def __init__(self, embedding: Embeddings, initial_capacity: int = 1024):
+        self.embedding = embedding
+        self.initial_capacity = initial_capacity
+        self._matrix: Optional[np.ndarray] = None
+        self._count = 0
+        self._ids: List[str] = []
+        self._docs: List[Document] = []
+        self._row_of: Dict[str, int] = {}
+        self._generation: Optional[str] = None
+        self._lock = threading.RLock()
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self.embedding
+
+    @property
+    def vectors(self) -> np.ndarray:
+        """View of the stored (normalised) vectors, one row per document."""
+        if self._matrix is None:
+            return np.empty((0, 0), dtype=np.float32)
+        return self._matrix[:self._count]
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _reserve(self, rows: int, dim: int):
+        if self._matrix is None:
+            self._matrix = np.empty((max(rows, self.initial_capacity), dim), dtype=np.float32)
+        elif rows > self._matrix.shape[0]:
+            grown = np.empty((max(rows, 2 * self._matrix.shape[0]), dim), dtype=np.float32)
+            grown[:self._count] = self._matrix[:self._count]
+            self._matrix = grown
+        elif dim != self._matrix.shape[1]:
+            raise ValueError(f"Expected vectors of size {self._matrix.shape[1]}, got {dim}")
+
+    def add_embeddings(self, documents: Sequence[Document], vectors, ids: Optional[Sequence[str]] = None) -> List[str]:
+        vectors = normalise(vectors)
+        if ids is None:
+            ids = [doc.id or str(uuid.uuid4()) for doc in documents]
+        if not (len(ids) == len(documents) == len(vectors)):
+            raise ValueError("documents, vectors and ids must have the same length")
+        if not len(ids):
+            return []
+
+        with self._lock:
+            self._reserve(self._count + len(ids), vectors.shape[1])
+            for doc_id, doc, vector in zip(ids, documents, vectors):
+                doc = Document(id=doc_id, page_content=doc.page_content, metadata=doc.metadata)
+                row = self._row_of.get(doc_id)
+                if row is None:
+                    row = self._count
+                    self._count += 1
+                    self._row_of[doc_id] = row
+                    self._ids.append(doc_id)
+                    self._docs.append(doc)
+                else:
+                    self._docs[row] = doc
+                self._matrix[row] = vector
+        return list(ids)
+
+    def add_documents(self, documents: List[Document], ids: Optional[List[str]] = None, **kwargs: Any) -> List[str]:
+        vectors = self.embedding.embed_documents([doc.page_content for doc in documents])
+        return self.add_embeddings(documents, vectors, ids)
+
+    def add_texts(self, texts: Iterable[str], metadatas: Optional[List[dict]] = None,
+                  ids: Optional[List[str]] = None, **kwargs: Any) -> List[str]:
+        texts = list(texts)
+        metadatas = metadatas or [{} for _ in texts]
+        documents = [Document(page_content=text, metadata=metadata) for text, metadata in zip(texts, metadatas)]
+        return self.add_documents(documents, ids=ids)
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> Optional[bool]:
+        if ids is None:
+            return False
+        with self._lock:
+            for doc_id in ids:
+                row = self._row_of.pop(doc_id, None)
+                if row is None:
+                    continue
+                last = self._count - 1
+                if row != last:
+                    # Move the last row into the hole instead of shifting everything after it
+                    self._matrix[row] = self._matrix[last]
+                    self._ids[row] = self._ids[last]
+                    self._docs[row] = self._docs[last]
+                    self._row_of[self._ids[row]] = row
+                self._ids.pop()
+                self._docs.pop()
+                self._count -= 1
+        return True
+
+    def documents(self) -> List[Document]:
+        """Every stored document, in row order."""
+        with self._lock:
+            return list(self._docs)
+
+    def update_metadata(self, ids: Sequence[str], metadatas: Sequence[dict]):
+        """Replace the metadata of stored documents, keeping their vectors; keys set to None are dropped."""
+        with self._lock:
+            for doc_id, metadata in zip(ids, metadatas):
+                row = self._row_of.get(doc_id)
+                if row is not None:
+                    doc = self._docs[row]
+                    self._docs[row] = Document(id=doc.id, page_content=doc.page_content,
+                                               metadata={key: value for key, value in metadata.items()
+                                                         if value is not None})
+
+    def get_by_ids(self, ids: Sequence[str], /) -> List[Document]:
+        return [self._docs[self._row_of[doc_id]] for doc_id in ids if doc_id in self._row_of]
+
+    def _filter_mask(self, filter: Callable[[Document], bool]) -> np.ndarray:
+        return np.fromiter((filter(doc) for doc in self._docs), dtype=bool, count=self._count)
+
+    def search_vectors(self, queries, k: int = 4, filter: Optional[Callable[[Document], bool]] = None,
+                       **kwargs: Any) -> List[List[Tuple[Document, float]]]:
+        """Top-k (document, cosine score) for each row of `queries`, all scored in one matrix multiply."""
+        queries = normalise(np.atleast_2d(np.asarray(queries, dtype=np.float32)))
+        with self._lock:
+            if not self._count:
+                return [[] for _ in queries]
+            if filter is None:
+                scores = queries @ self.vectors.T
+                best = top_k(scores, k)
+                return [[(self._docs[row], float(row_scores[row])) for row in rows]
+                        for rows, row_scores in zip(best, scores)]
+            # Narrow to the matching rows first so only those are scored
+            candidates = np.flatnonzero(self._filter_mask(filter))
+            scores = queries @ self.vectors[candidates].T
+            best = top_k(scores, k)
+            return [[(self._docs[candidates[i]], float(row_scores[i])) for i in rows]
+                    for rows, row_scores in zip(best, scores)]
+
+    def score_ids(self, embedding: List[float], ids: Sequence[str]) -> List[Tuple[Document, float]]:
+        """Cosine score of one query against just these documents (e.g. a lexical shortlist), in `ids` order."""
+        query = normalise(np.asarray(embedding, dtype=np.float32))
+        with self._lock:
+            rows = [self._row_of[doc_id] for doc_id in ids if doc_id in self._row_of]
+            if not rows:
+                return []
+            scores = self.vectors[rows] @ query
+            return [(self._docs[row], float(score)) for row, score in zip(rows, scores)]
+
+    def similarity_search_with_score_by_vector(self, embedding: List[float], k: int = 4,
+                                               filter: Optional[Callable[[Document], bool]] = None,
+                                               **kwargs: Any) -> List[Tuple[Document, float]]:
+        return self.search_vectors([embedding], k, filter, **kwargs)[0]
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score_by_vector(embedding, k, **kwargs)]
+
+    def similarity_search_with_score(self, query: str, k: int = 4, **kwargs: Any) -> List[Tuple[Document, float]]:
+        return self.similarity_search_with_score_by_vector(self.embedding.embed_query(query), k, **kwargs)
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k, **kwargs)]
+
+    def similarity_search_batch(self, queries: List[str], k: int = 4, **kwargs: Any) -> List[List[Document]]:
+        """Answer many queries with one matrix multiply instead of one full scan per query."""
+        vectors = [self.embedding.embed_query(query) for query in queries]
+        return [[doc for doc, _ in hits] for hits in self.search_vectors(vectors, k, **kwargs)]
+
+    def _select_relevance_score_fn(self) -> Callable[[float], float]:
+        return self._cosine_relevance_score_fn
+
+    def save(self, directory: str):
+        """
+        Write vectors (.npy) and documents (.jsonl) so the store can be loaded without re-embedding.
+
+        Every save gets a new generation id in `store.json`; index files written next to
+        the vectors record it, so they are never loaded against rows of another save.
+        """
+        os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            # Written first: a save interrupted after this point leaves no index file matching the new id
+            self._generation = uuid.uuid4().hex
+            with open(os.path.join(directory, "store.json"), "w", encoding="utf-8") as f:
+                json.dump({"generation": self._generation, "count": self._count}, f)
+            np.save(os.path.join(directory, "vectors.npy"), self.vectors)
+            with open(os.path.join(directory, "documents.jsonl"), "w", encoding="utf-8") as f:
+                for doc in self._docs:
+                    f.write(json.dumps({"id": doc.id, "page_content": doc.page_content, "metadata": doc.metadata},
+                                       default=str) + "\n")
+
+    @classmethod
+    def load(cls, directory: str, embedding: Embeddings, **kwargs: Any) -> "NumpyVectorStore":
+        store = cls(embedding, **kwargs)
+        # Copy-on-write map: pages are read lazily and the file on disk is never modified
+        matrix = np.load(os.path.join(directory, "vectors.npy"), mmap_mode="c")
+        with open(os.path.join(directory, "documents.jsonl"), encoding="utf-8") as f:
+            documents = [Document(**json.loads(line)) for line in f]
+        store._matrix = matrix if len(matrix) else None
+        store._count = len(documents)
+        store._docs = documents
+        store._ids = [doc.id for doc in documents]
+        store._row_of = {doc_id: row for row, doc_id in enumerate(store._ids)}
+        meta_path = os.path.join(directory, "store.json")
+        if os.path.exists(meta_path):
+            with open(meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta["count"] == store._count:
+                store._generation = meta["generation"]
+        return store
+
+    @classmethod
+    def from_texts(cls, texts: List[str], embedding: Embeddings, metadatas: Optional[List[dict]] = None,
+                   ids: Optional[List[str]] = None, **kwargs: Any) -> "NumpyVectorStore":
+        store = cls(embedding, **kwargs)
+        store.add_texts(texts, metadatas=metadatas, ids=ids)
+        return store
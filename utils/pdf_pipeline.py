@@ -0,0 +1,103 @@
+import os
+import resource
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Iterator, List, Optional, Tuple
+
+from langchain_core.documents import Document
+
+_readers = {}
+
+
+def _page_count(path: str) -> int:
+    from pypdf import PdfReader
+    return len(PdfReader(path).pages)
+
+
+def _extract_pages(path: str, start: int, stop: int) -> List[Tuple[int, str]]:
+    """Runs in a worker process; each worker keeps the reader of the PDF it is on (ranges come in file order)."""
+    from pypdf import PdfReader
+    reader = _readers.get(path)
+    if reader is None:
+        # A new file means the previous one is done: drop its reader and everything it parsed
+        _readers.clear()
+        reader = _readers[path] = PdfReader(path)
+    return [(number, reader.pages[number].extract_text() or "") for number in range(start, stop)]
+
+
+def peak_rss_mb() -> float:
+    """Peak RSS of this process plus its finished children (ru_maxrss is KiB on Linux, bytes on macOS)."""
+    scale = 1 if sys.platform == "darwin" else 1024
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return (own + children) * scale / 2 ** 20
+
+
+@dataclass
+class PdfStats:
+    files: int = 0
+    pages: int = 0
+    chunks: int = 0
+    seconds: float = 0.0
+
+    @property
+    def pages_per_sec(self) -> float:
+        return self.pages / self.seconds if self.seconds else 0.0
+
+
+class PdfChunkStream:
+    """
+    Iterates over the chunks of one or more PDFs while they are being extracted.
+
+    Page ranges are extracted in a process pool with at most `2 * workers` ranges in
+    flight, each page is split as soon as it arrives (metadata and `start_index`
+    match `PyPDFLoader` + `split_documents`), and chunks are yielded in page order.
+    Extracted text in flight is bounded by the window; each worker also keeps the
+    reader of the file it is on, which pypdf fills as pages are read, so memory grows
+    with the largest single PDF rather than with the total over all files.
+    """
+
+    def __init__(self, paths, splitter, workers: Optional[int] = None, pages_per_task: int = 16):
+        self.paths = []
+        for path in [paths] if isinstance(paths, str) else paths:
+            if os.path.isdir(path):
+                self.paths += [os.path.join(path, name) for name in sorted(os.listdir(path))
+                               if name.lower().endswith(".pdf")]
+            else:
+                self.paths.append(path)
+        self.splitter = splitter
+        self.workers = workers or os.cpu_count() or 1
+        self.pages_per_task = pages_per_task
+        self.stats = PdfStats()
+
+    def _tasks(self) -> Iterator[Tuple[str, int, int]]:
+        for path in self.paths:
+            self.stats.files += 1
+            pages = _page_count(path)
+            for start in range(0, pages, self.pages_per_task):
+                yield path, start, min(start + self.pages_per_task, pages)
+
+    def _split(self, path: str, pages: List[Tuple[int, str]]) -> Iterator[Document]:
+        for number, text in pages:
+            self.stats.pages += 1
+            page = Document(page_content=text, metadata={"source": path, "page": number})
+            for chunk in self.splitter.split_documents([page]):
+                self.stats.chunks += 1
+                yield chunk
+
+    def __iter__(self) -> Iterator[Document]:
+        start = time.perf_counter()
+        tasks = self._tasks()
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            window = []
+            for task in tasks:
+                window.append((task[0], pool.submit(_extract_pages, *task)))
+                if len(window) >= 2 * self.workers:
+                    path, future = window.pop(0)
+                    yield from self._split(path, future.result())
+                    self.stats.seconds = time.perf_counter() - start
+            for path, future in window:
+                yield from self._split(path, future.result())
+        self.stats.seconds = time.perf_counter() - start
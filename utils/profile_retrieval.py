@@ -0,0 +1,81 @@
+from dataclasses import dataclass
+from typing import Iterable, List, Optional
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from utils.numpy_vector_store import NumpyVectorStore
+from utils.profiles import format_profile
+from utils.tokens import estimate_tokens
+
+
+@dataclass
+class ProfileSelection:
+    context: str
+    profiles: int
+    prompt_tokens: int
+    full_tokens: int
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.full_tokens - self.prompt_tokens
+
+
+def _matches(value, needle: Optional[str]) -> bool:
+    if not needle:
+        return True
+    values = value if isinstance(value, (list, tuple)) else [value]
+    return any(needle.lower() in str(v).lower() for v in values)
+
+
+class ProfileRetriever:
+    """
+    Picks the profiles relevant to a question instead of sending the whole collection.
+
+    Every profile is embedded once when loaded. Per question the top `k` profiles are
+    taken in similarity order until `token_budget` is used up, optionally narrowed
+    first by `currentLocation` / `areaOfExpertise`.
+    """
+
+    def __init__(self, embeddings: Embeddings, k: int = 5, token_budget: int = 1500):
+        self.k = k
+        self.token_budget = token_budget
+        self.store = NumpyVectorStore(embeddings)
+        self.full_tokens = 0
+
+    def load(self, profiles: Iterable[dict]):
+        documents, ids = [], []
+        for profile in profiles:
+            text = format_profile(profile)
+            documents.append(Document(page_content=text, metadata={
+                "currentLocation": profile.get("currentLocation", ""),
+                "areaOfExpertise": profile.get("areaOfExpertise", ""),
+                "tokens": estimate_tokens(text),
+            }))
+            ids.append(str(profile.get("_id", len(ids))))
+        self.store = NumpyVectorStore(self.store.embedding)
+        if documents:
+            self.store.add_documents(documents, ids=ids)
+        # Same join as the full-context prompt, so the savings are comparable
+        self.full_tokens = estimate_tokens("\n\n".join(doc.page_content for doc in documents))
+
+    def select(self, question: str, location: Optional[str] = None,
+               expertise: Optional[str] = None) -> ProfileSelection:
+        filter = None
+        if location or expertise:
+            def filter(doc: Document) -> bool:
+                return (_matches(doc.metadata["currentLocation"], location)
+                        and _matches(doc.metadata["areaOfExpertise"], expertise))
+
+        chosen: List[str] = []
+        used = 0
+        for doc in self.store.similarity_search(question, k=self.k, filter=filter):
+            tokens = doc.metadata["tokens"]
+            if chosen and used + tokens > self.token_budget:
+                break
+            chosen.append(doc.page_content)
+            used += tokens
+
+        context = "\n\n".join(chosen)
+        return ProfileSelection(context=context, profiles=len(chosen),
+                                prompt_tokens=estimate_tokens(context), full_tokens=self.full_tokens)
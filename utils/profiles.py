@@ -0,0 +1,176 @@
+import os
+import threading
+import time
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+if TYPE_CHECKING:
+    from pymongo import MongoClient
+
+PROFILE_FIELDS = ("firstName", "lastName", "areaOfExpertise", "currentLocation", "businessMemberSince",
+                  "carrierSummary")
+# Only what the prompts use, plus the watermark field
+PROFILE_PROJECTION = {field: 1 for field in PROFILE_FIELDS + ("updatedAt",)}
+
+_clients: Dict[str, "MongoClient"] = {}
+_loaders: Dict[str, "ProfileLoader"] = {}
+_lock = threading.Lock()
+
+
+def format_profile(profile: dict) -> str:
+    return f"Name: {profile.get('firstName', '')} {profile.get('lastName', '')}\n" \
+           f"Expertise: {profile.get('areaOfExpertise', '')}\n" \
+           f"Location: {profile.get('currentLocation', '')}\n" \
+           f"Member Since: {profile.get('businessMemberSince', '')}\n" \
+           f"Summary: {profile.get('carrierSummary', '')}\n"
+
+
+def format_profiles(profiles) -> str:
+    return "\n\n".join(format_profile(profile) for profile in profiles)
+
+
+def get_mongo_client(uri: Optional[str] = None) -> "MongoClient":
+    """One pooled MongoClient per URI for the whole process."""
+    uri = uri or os.getenv("MONGO_URI")
+    with _lock:
+        if uri not in _clients:
+            from pymongo import MongoClient
+
+            _clients[uri] = MongoClient(uri)
+        return _clients[uri]
+
+
+class ProfileLoader:
+    """
+    Cached, formatted view of the `profiles` collection.
+
+    The first `refresh()` streams the collection with a projection; later calls only
+    apply what changed, from a change stream when the server supports one, otherwise
+    from documents whose `updatedAt` is at or past the last seen value. Deletes and
+    inserts without a newer `updatedAt` need an `_id`-only scan, and without
+    `updatedAt` only a full rescan shows updates; those run at most every
+    `full_scan_interval` seconds. `version` only goes up when a
+    formatted profile actually changed, so callers can key their caches on it.
+    """
+
+    def __init__(self, collection, batch_size: int = 500, use_change_stream: bool = True,
+                 full_scan_interval: float = 30.0):
+        self.collection = collection
+        self.batch_size = batch_size
+        self.use_change_stream = use_change_stream
+        self.full_scan_interval = full_scan_interval
+        self.version = 0
+        self._profiles: Dict[object, dict] = {}
+        self._formatted: Dict[object, str] = {}
+        self._context: Optional[str] = None
+        self._watermark = None
+        self._stream = None
+        self._loaded = False
+        self._last_full_scan = 0.0
+        self._lock = threading.RLock()
+
+    def _upsert(self, profile: dict) -> bool:
+        """Store the profile; True if its formatted text changed (or it is new)."""
+        profile = {key: profile[key] for key in ("_id",) + tuple(PROFILE_PROJECTION) if key in profile}
+        formatted = format_profile(profile)
+        changed = self._formatted.get(profile["_id"]) != formatted
+        self._profiles[profile["_id"]] = profile
+        self._formatted[profile["_id"]] = formatted
+        updated_at = profile.get("updatedAt")
+        if updated_at is not None and (self._watermark is None or updated_at > self._watermark):
+            self._watermark = updated_at
+        return changed
+
+    def _remove(self, profile_id) -> bool:
+        self._formatted.pop(profile_id, None)
+        return self._profiles.pop(profile_id, None) is not None
+
+    def _open_change_stream(self):
+        if not self.use_change_stream:
+            return
+        try:
+            self._stream = self.collection.watch(full_document="updateLookup")
+        except Exception:
+            # Standalone servers and local stand-ins have no change streams
+            self._stream = None
+
+    def _scan(self, query: dict, seen: Optional[set] = None) -> int:
+        changes = 0
+        for profile in self.collection.find(query, PROFILE_PROJECTION).batch_size(self.batch_size):
+            changes += self._upsert(profile)
+            if seen is not None:
+                seen.add(profile["_id"])
+        return changes
+
+    def _remove_missing(self, live_ids: set) -> int:
+        return sum(self._remove(profile_id) for profile_id in set(self._profiles) - live_ids)
+
+    def _apply_change_stream(self) -> int:
+        changes = 0
+        while (change := self._stream.try_next()) is not None:
+            if change["operationType"] == "delete":
+                changes += self._remove(change["documentKey"]["_id"])
+            elif change.get("fullDocument") is not None:
+                changes += self._upsert(change["fullDocument"])
+        return changes
+
+    def _apply_watermark(self) -> int:
+        changes = 0
+        if self._watermark is not None:
+            # $gte: another write may share the watermark's timestamp; unchanged profiles are no-ops
+            changes += self._scan({"updatedAt": {"$gte": self._watermark}})
+        if time.monotonic() - self._last_full_scan < self.full_scan_interval:
+            return changes
+        self._last_full_scan = time.monotonic()
+        if self._watermark is None:
+            # Nothing to filter updates on: rescan everything, which also shows what was deleted
+            seen = set()
+            changes += self._scan({}, seen)
+        else:
+            seen = {doc["_id"] for doc in self.collection.find({}, {"_id": 1}).batch_size(10 * self.batch_size)}
+            # Inserted without an updatedAt past the watermark: the watermark scan never returns these
+            unknown = list(seen - set(self._profiles))
+            if unknown:
+                changes += self._scan({"_id": {"$in": unknown}})
+        return changes + self._remove_missing(seen)
+
+    def refresh(self) -> int:
+        """Bring the cached view up to date. Returns the number of profiles whose formatted text changed."""
+        with self._lock:
+            if not self._loaded:
+                self._open_change_stream()
+                changes = self._scan({})
+                self._last_full_scan = time.monotonic()
+                self._loaded = True
+            elif self._stream is not None:
+                changes = self._apply_change_stream()
+            else:
+                changes = self._apply_watermark()
+            if changes:
+                self.version += 1
+                self._context = None
+            return changes
+
+    def profiles(self) -> List[dict]:
+        with self._lock:
+            return list(self._profiles.values())
+
+    def context(self) -> str:
+        """All formatted profiles joined into one string, rebuilt only after a change."""
+        with self._lock:
+            if self._context is None:
+                self._context = "\n\n".join(self._formatted.values())
+            return self._context
+
+
+def get_profile_loader(collection=None) -> ProfileLoader:
+    """Shared loader for `app-dev.profiles` (or the given collection, e.g. a mongomock one), loaded on first use."""
+    if collection is None:
+        collection = get_mongo_client()["app-dev"]["profiles"]
+    key = f"{collection.database.name}.{collection.name}:{id(collection.database.client)}"
+    with _lock:
+        loader = _loaders.get(key)
+        if loader is None:
+            loader = _loaders[key] = ProfileLoader(collection)
+    if not loader._loaded:
+        loader.refresh()
+    return loader
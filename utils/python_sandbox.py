@@ -0,0 +1,135 @@
+import atexit
+import contextlib
+import io
+import multiprocessing
+import queue
+import re
+import threading
+from typing import Optional, Sequence
+
+try:
+    import resource
+except ImportError:  # Windows: no rlimits, the timeout still applies
+    resource = None
+
+
+class ToolTimeout(TimeoutError):
+    pass
+
+
+def sanitize_input(code: str) -> str:
+    """Strip the markdown fences and leading `python` that agents wrap code in (like PythonREPLTool)."""
+    code = re.sub(r"^(\s|`)*(?i:python)?\s*", "", code)
+    return re.sub(r"(\s|`)*$", "", code)
+
+
+def _worker(conn, memory_mb: Optional[int], preload: Sequence[str]):
+    """Worker process: applies the memory limit once, then runs snippets until the pipe closes."""
+    if resource is not None and memory_mb:
+        limit = memory_mb * 2 ** 20
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    modules = {name: __import__(name) for name in preload}
+    while True:
+        try:
+            code = conn.recv()
+        except (EOFError, KeyboardInterrupt):
+            return
+        output = io.StringIO()
+        try:
+            with contextlib.redirect_stdout(output):
+                exec(code, {"__name__": "__main__", **modules})
+            conn.send(output.getvalue())
+        except MemoryError:
+            conn.send(f"MemoryError: snippet exceeded the {memory_mb} MB limit")
+        except BaseException as e:
+            conn.send(repr(e))
+
+
+class PythonProcessPool:
+    """
+    Runs Python snippets in a few warm worker processes instead of in the agent's own process.
+
+    Workers start on `start()` (or the first call) with `preload` modules imported,
+    so a call only pays for a pipe round trip. Nothing is spawned at construction,
+    which keeps module-level pools safe under the spawn start method. Each call gets
+    a fresh namespace and at most `timeout` seconds. A worker that overruns is killed and replaced, and `ToolTimeout` is
+    raised. With `memory_mb` each worker's address space is capped (POSIX only), so
+    a runaway allocation fails with MemoryError inside the worker. Calls beyond
+    `workers` wait for a free worker. Output mirrors `PythonREPLTool`: captured
+    stdout, or the repr of the exception.
+    """
+
+    def __init__(self, workers: int = 2, timeout: float = 10.0, memory_mb: Optional[int] = 512,
+                 preload: Sequence[str] = ("math", "json", "datetime", "statistics", "random")):
+        self.workers = workers
+        self.timeout = timeout
+        self.memory_mb = memory_mb
+        self.preload = tuple(preload)
+        self.restarts = 0
+        self._context = multiprocessing.get_context()
+        self._idle: "queue.Queue" = queue.Queue()
+        self._lock = threading.Lock()
+        self._started = False
+        self._closed = False
+
+    def start(self):
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        for _ in range(self.workers):
+            self._idle.put(self._spawn())
+        atexit.register(self.close)
+
+    def _spawn(self):
+        parent, child = self._context.Pipe()
+        process = self._context.Process(target=_worker, args=(child, self.memory_mb, self.preload), daemon=True)
+        process.start()
+        child.close()
+        return process, parent
+
+    def _replace(self, worker):
+        process, conn = worker
+        process.kill()
+        process.join()
+        conn.close()
+        with self._lock:
+            self.restarts += 1
+        return self._spawn()
+
+    def run(self, code: str, timeout: Optional[float] = None) -> str:
+        timeout = self.timeout if timeout is None else timeout
+        self.start()
+        worker = self._idle.get()
+        try:
+            try:
+                worker[1].send(sanitize_input(code))
+            except OSError:
+                worker = self._replace(worker)
+                worker[1].send(sanitize_input(code))
+            process, conn = worker
+            if not conn.poll(timeout):
+                worker = self._replace(worker)
+                raise ToolTimeout(f"Python snippet timed out after {timeout:g}s")
+            try:
+                return conn.recv()
+            except EOFError:
+                # The worker died mid-snippet (e.g. killed by the OS); start a fresh one
+                worker = self._replace(worker)
+                return "RuntimeError: Python worker crashed"
+        finally:
+            self._idle.put(worker)
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        while True:
+            try:
+                process, conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            process.join(timeout=1)
+            if process.is_alive():
+                process.kill()
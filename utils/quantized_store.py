@@ -0,0 +1,152 @@
+import json
+import mmap
+import os
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from utils.numpy_vector_store import NumpyVectorStore, normalise, top_k
+
+CODE_TYPES = {"int8": np.int8, "float16": np.float16}
+
+
+def quantize(vectors: np.ndarray, dtype: str, block: int = 65_536) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    (codes, scales) for normalised vectors. int8 is symmetric per dimension:
+    code = round(value / scale) with scale = max |value| / 127 over the stored vectors.
+    float16 codes are the values themselves and the scales are all one.
+    """
+    if dtype not in CODE_TYPES:
+        raise ValueError(f"Unknown code type {dtype!r}, expected one of {sorted(CODE_TYPES)}")
+    dim = vectors.shape[1]
+    if dtype == "float16":
+        return vectors.astype(np.float16), np.ones(dim, dtype=np.float32)
+    scales = np.zeros(dim, dtype=np.float32)
+    for start in range(0, len(vectors), block):
+        np.maximum(scales, np.abs(vectors[start:start + block]).max(axis=0), out=scales)
+    scales = np.where(scales > 0, scales / 127, 1.0).astype(np.float32)
+    codes = np.empty(vectors.shape, dtype=np.int8)
+    for start in range(0, len(vectors), block):
+        codes[start:start + block] = np.rint(vectors[start:start + block] / scales)
+    return codes, scales
+
+
+class QuantizedVectorStore(NumpyVectorStore):
+    """
+    `NumpyVectorStore` that searches int8 (or float16) codes and rescores exactly.
+
+    A query is scored against the quantized codes, a quarter (or half) the size of
+    the float32 vectors, and the best `k * rescore` rows are scored again with their
+    full-precision vectors, so the ranking of the returned top k is exact.
+
+    `save` writes the codes next to the store's vectors and documents, and `load`
+    memory-maps both (the vectors copy-on-write, as `NumpyVectorStore.load` does), so
+    processes loading the same directory share one copy in the page cache. A scan
+    reads the codes block by block and only the rescored rows of the float32 file are
+    touched. Like the IVF lists, the codes are rebuilt on the first search after a change.
+    """
+
+    def __init__(self, embedding: Embeddings, dtype: str = "int8", rescore: int = 4, block_bytes: int = 1 << 19,
+                 **kwargs: Any):
+        super().__init__(embedding, **kwargs)
+        if dtype not in CODE_TYPES:
+            raise ValueError(f"Unknown code type {dtype!r}, expected one of {sorted(CODE_TYPES)}")
+        self.dtype = dtype
+        self.rescore = rescore
+        self.block_bytes = block_bytes
+        self._codes: Optional[np.ndarray] = None
+        self._scales: Optional[np.ndarray] = None
+
+    def add_embeddings(self, documents: Sequence[Document], vectors, ids: Optional[Sequence[str]] = None) -> List[str]:
+        with self._lock:
+            self._codes = None
+            return super().add_embeddings(documents, vectors, ids)
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> Optional[bool]:
+        with self._lock:
+            self._codes = None
+            return super().delete(ids, **kwargs)
+
+    def build_index(self):
+        with self._lock:
+            self._codes, self._scales = quantize(self.vectors, self.dtype)
+
+    @property
+    def nbytes(self) -> dict:
+        """Bytes of the codes scanned per query and of the full-precision vectors only read for rescoring."""
+        return {"codes": self._codes.nbytes if self._codes is not None else 0, "vectors": self.vectors.nbytes}
+
+    def _approximate_scores(self, queries: np.ndarray, rows: Optional[np.ndarray]) -> np.ndarray:
+        # The scale folds into the query, so a code block only needs a cast before the multiply.
+        # A cache-sized block keeps the cast copy out of main memory: per query, only the codes stream through
+        scaled = queries * self._scales
+        count = self._count if rows is None else len(rows)
+        block_rows = max(16, self.block_bytes // (4 * self._codes.shape[1]))
+        scores = np.empty((len(queries), count), dtype=np.float32)
+        buffer = np.empty((min(block_rows, count), self._codes.shape[1]), dtype=np.float32)
+        for start in range(0, count, block_rows):
+            stop = min(start + block_rows, count)
+            codes = self._codes[start:stop] if rows is None else self._codes[rows[start:stop]]
+            block = buffer[:stop - start]
+            block[...] = codes
+            np.matmul(scaled, block.T, out=scores[:, start:stop])
+        return scores
+
+    def search_vectors(self, queries, k: int = 4, filter: Optional[Callable[[Document], bool]] = None,
+                       rescore: Optional[int] = None, exact: bool = False,
+                       **kwargs: Any) -> List[List[Tuple[Document, float]]]:
+        """Top-k (document, cosine score); `rescore` sets how many candidates per result are rescored exactly."""
+        if exact:
+            return super().search_vectors(queries, k, filter)
+        queries = normalise(np.atleast_2d(np.asarray(queries, dtype=np.float32)))
+        with self._lock:
+            if not self._count:
+                return [[] for _ in queries]
+            if self._codes is None:
+                self.build_index()
+            rows = np.flatnonzero(self._filter_mask(filter)) if filter is not None else None
+            candidates = top_k(self._approximate_scores(queries, rows), k * (rescore or self.rescore))
+            if rows is not None:
+                candidates = rows[candidates]
+            results = []
+            for query, candidate_rows in zip(queries, candidates):
+                # Sorted rows read the memory-mapped vectors front to back
+                candidate_rows = np.sort(candidate_rows)
+                scores = self.vectors[candidate_rows] @ query
+                results.append([(self._docs[candidate_rows[i]], float(scores[i])) for i in top_k(scores, k)])
+            return results
+
+    def save(self, directory: str):
+        with self._lock:
+            super().save(directory)
+            if self._codes is None:
+                self.build_index()
+            np.save(os.path.join(directory, "codes.npy"), self._codes)
+            np.save(os.path.join(directory, "scales.npy"), self._scales)
+            with open(os.path.join(directory, "quantized.json"), "w", encoding="utf-8") as f:
+                json.dump({"dtype": self.dtype, "rescore": self.rescore, "count": self._count,
+                           "generation": self._generation}, f)
+
+    @classmethod
+    def load(cls, directory: str, embedding: Embeddings, **kwargs: Any) -> "QuantizedVectorStore":
+        """
+        Memory-map a saved store; a plain `NumpyVectorStore` directory, or codes saved
+        with other vectors than these, are quantized again on first search.
+        """
+        meta_path = os.path.join(directory, "quantized.json")
+        meta = {}
+        if os.path.exists(meta_path):
+            with open(meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+            kwargs = {"dtype": meta["dtype"], "rescore": meta["rescore"], **kwargs}
+        store = super().load(directory, embedding, **kwargs)
+        if isinstance(store._matrix, np.memmap) and hasattr(store._matrix._mmap, "madvise"):
+            # Rescoring reads scattered rows: no readahead or fault-around of their neighbours
+            store._matrix._mmap.madvise(mmap.MADV_RANDOM)
+        if meta and meta["dtype"] == store.dtype and meta["count"] == store._count \
+                and store._generation is not None and meta.get("generation") == store._generation:
+            store._codes = np.load(os.path.join(directory, "codes.npy"), mmap_mode="r")
+            store._scales = np.load(os.path.join(directory, "scales.npy"))
+        return store
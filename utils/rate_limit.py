@@ -0,0 +1,45 @@
+import asyncio
+import random
+import time
+from typing import Awaitable, Callable, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class AsyncRateLimiter:
+    """Token bucket: at most `rate` acquisitions per second on average, bursts up to `burst`."""
+
+    def __init__(self, rate: float, burst: Optional[int] = None):
+        self.rate = rate
+        self.burst = burst or max(1, int(rate))
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+async def retry_async(call: Callable[[], Awaitable[T]], max_retries: int = 5, backoff: float = 1.0,
+                      limiter: Optional[AsyncRateLimiter] = None) -> T:
+    """Run `call`, retrying failures with exponential backoff (longer for rate limits)."""
+    for attempt in range(max_retries + 1):
+        if limiter is not None:
+            await limiter.acquire()
+        try:
+            return await call()
+        except Exception as e:
+            if attempt == max_retries:
+                raise
+            # Imported here: utils.ingestion_pipeline loads langchain_core, which importers should not pay for
+            from utils.ingestion_pipeline import is_rate_limited
+            delay = backoff * (2 ** attempt) * (2 if is_rate_limited(e) else 1)
+            await asyncio.sleep(delay * (0.5 + random.random()))
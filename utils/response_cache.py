@@ -0,0 +1,213 @@
+import atexit
+import hashlib
+import json
+import os
+import pickle
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, Optional, Tuple
+
+if TYPE_CHECKING:
+    from langchain_core.embeddings import Embeddings
+    from utils.numpy_vector_store import NumpyVectorStore
+
+
+def prompt_text(prompt) -> str:
+    """Plain text of a string, PromptValue or list of messages."""
+    if isinstance(prompt, str):
+        return prompt
+    if hasattr(prompt, "to_messages"):
+        prompt = prompt.to_messages()
+    lines = []
+    for message in prompt:
+        if isinstance(message, dict):
+            lines.append(f"{message['role']}: {message['content']}")
+        elif isinstance(message, tuple):
+            lines.append(f"{message[0]}: {message[1]}")
+        else:
+            lines.append(f"{message.type}: {message.content}")
+    return "\n".join(lines)
+
+
+def normalise_prompt(prompt) -> str:
+    return re.sub(r"\s+", " ", prompt_text(prompt)).strip().casefold()
+
+
+@dataclass
+class CacheEntry:
+    value: Any
+    created: float
+    group: str
+    tags: Tuple[str, ...] = ()
+    vector: Optional[list] = None
+
+
+@dataclass
+class CacheStats:
+    exact_hits: int = 0
+    semantic_hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expired: int = 0
+    invalidated: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        hits = self.exact_hits + self.semantic_hits
+        return hits / (hits + self.misses) if hits + self.misses else 0.0
+
+
+class ResponseCache:
+    """
+    Cache of LLM responses keyed by model, parameters and normalised prompt.
+
+    With `embeddings`, a miss falls back to a semantic lookup: the closest cached
+    question for the same model and parameters is served when its cosine similarity
+    reaches `similarity_threshold`. Entries expire after `ttl` seconds, the least
+    recently used are evicted above `max_entries`, and `invalidate(tag)` drops the
+    entries built from data that changed. With `path` the cache is kept across runs.
+    """
+
+    def __init__(self, max_entries: int = 10_000, ttl: Optional[float] = 24 * 3600,
+                 embeddings: Optional["Embeddings"] = None, similarity_threshold: float = 0.95,
+                 path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.embeddings = embeddings
+        self.similarity_threshold = similarity_threshold
+        self.path = path
+        self.stats = CacheStats()
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._semantic: Dict[str, "NumpyVectorStore"] = {}
+        self._lock = threading.RLock()
+        self._dirty = False
+        if path:
+            self._load()
+            atexit.register(self.save)
+
+    @staticmethod
+    def group_key(model: str, params: Optional[dict]) -> str:
+        return hashlib.sha256(json.dumps([model, params or {}], sort_keys=True, default=str).encode()).hexdigest()
+
+    def _key(self, group: str, prompt) -> str:
+        return hashlib.sha256(f"{group}\0{normalise_prompt(prompt)}".encode()).hexdigest()
+
+    def _expired(self, entry: CacheEntry) -> bool:
+        return self.ttl is not None and time.time() - entry.created > self.ttl
+
+    def _drop(self, key: str):
+        entry = self._entries.pop(key)
+        if entry.vector is not None and entry.group in self._semantic:
+            self._semantic[entry.group].delete([key])
+
+    def get(self, model: str, prompt, params: Optional[dict] = None, semantic_text: Optional[str] = None):
+        """Cached value or None. `semantic_text` (e.g. just the question) is what the semantic tier compares."""
+        group = self.group_key(model, params)
+        key = self._key(group, prompt)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._expired(entry):
+                self._drop(key)
+                self.stats.expired += 1
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.stats.exact_hits += 1
+                return entry.value
+
+            store = self._semantic.get(group)
+            if self.embeddings is not None and store is not None and len(store):
+                vector = self.embeddings.embed_query(normalise_prompt(semantic_text or prompt))
+                hits = store.similarity_search_with_score_by_vector(vector, k=1)
+                if hits and hits[0][1] >= self.similarity_threshold:
+                    match = self._entries.get(hits[0][0].id)
+                    if match is not None and not self._expired(match):
+                        self._entries.move_to_end(hits[0][0].id)
+                        self.stats.semantic_hits += 1
+                        return match.value
+            self.stats.misses += 1
+            return None
+
+    def put(self, model: str, prompt, value, params: Optional[dict] = None,
+            semantic_text: Optional[str] = None, tags: Iterable[str] = ()):
+        group = self.group_key(model, params)
+        key = self._key(group, prompt)
+        vector = None
+        if self.embeddings is not None:
+            vector = self.embeddings.embed_query(normalise_prompt(semantic_text or prompt))
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = CacheEntry(value, time.time(), group, tuple(tags), vector)
+            self._dirty = True
+            if vector is not None:
+                self._index_vector(group, key, vector)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+                self.stats.evictions += 1
+
+    def _semantic_store(self, group: str) -> "NumpyVectorStore":
+        if group not in self._semantic:
+            # Only the semantic tier needs NumPy and LangChain, so plain exact caches stay cheap to import
+            from utils.numpy_vector_store import NumpyVectorStore
+
+            self._semantic[group] = NumpyVectorStore(self.embeddings, initial_capacity=64)
+        return self._semantic[group]
+
+    def _index_vector(self, group: str, key: str, vector):
+        from langchain_core.documents import Document
+
+        self._semantic_store(group).add_embeddings([Document(page_content="")], [vector], ids=[key])
+
+    def cached(self, model: str, prompt, compute: Callable[[], Any], params: Optional[dict] = None,
+               semantic_text: Optional[str] = None, tags: Iterable[str] = ()):
+        """Return the cached response or call `compute()` and cache its result."""
+        value = self.get(model, prompt, params, semantic_text)
+        if value is None:
+            value = compute()
+            self.put(model, prompt, value, params, semantic_text, tags)
+        return value
+
+    def invalidate(self, tag: Optional[str] = None) -> int:
+        """Drop every entry carrying `tag`, or every entry when `tag` is None."""
+        with self._lock:
+            keys = [key for key, entry in self._entries.items() if tag is None or tag in entry.tags]
+            for key in keys:
+                self._drop(key)
+            self.stats.invalidated += len(keys)
+            self._dirty = self._dirty or bool(keys)
+            return len(keys)
+
+    def report(self) -> dict:
+        stats = self.stats
+        return {"entries": len(self._entries), "exact_hits": stats.exact_hits, "semantic_hits": stats.semantic_hits,
+                "misses": stats.misses, "evictions": stats.evictions, "expired": stats.expired,
+                "invalidated": stats.invalidated, "hit_rate": round(stats.hit_rate, 3)}
+
+    def save(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "wb") as f:
+                pickle.dump(list(self._entries.items()), f)
+            os.replace(tmp_path, self.path)
+            self._dirty = False
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "rb") as f:
+                items = pickle.load(f)
+        except Exception:
+            return  # a corrupt or incompatible cache file is just a cold cache
+        for key, entry in items:
+            if self._expired(entry):
+                continue
+            self._entries[key] = entry
+            if entry.vector is not None and self.embeddings is not None:
+                self._index_vector(entry.group, key, entry.vector)
@@ -0,0 +1,268 @@
+import asyncio
+import sqlite3
+import threading
+import time
+from typing import Any, AsyncIterator, Dict, Iterator, Optional, Sequence, Tuple
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoints (
+    thread_id TEXT, checkpoint_ns TEXT, checkpoint_id TEXT, parent_id TEXT,
+    type TEXT, checkpoint BLOB, metadata_type TEXT, metadata BLOB,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+);
+CREATE TABLE IF NOT EXISTS writes (
+    thread_id TEXT, checkpoint_ns TEXT, checkpoint_id TEXT, task_id TEXT, idx INTEGER,
+    channel TEXT, type TEXT, value BLOB, task_path TEXT,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+);
+CREATE TABLE IF NOT EXISTS threads (thread_id TEXT PRIMARY KEY, last_used REAL);
+CREATE INDEX IF NOT EXISTS threads_last_used ON threads (last_used);
+"""
+
+CheckpointKey = Tuple[str, str, str]
+
+
+class SqliteCheckpointer(BaseCheckpointSaver):
+    """
+    Durable LangGraph checkpointer on a single SQLite file.
+
+    Writes are buffered and committed in batches (every `batch_size` rows or
+    `flush_interval` seconds); reads merge the buffer, so a session always sees its
+    own latest state. Only the last `keep_last` checkpoints of a thread are kept, and
+    threads idle for more than `ttl` seconds, or beyond the `max_threads` most
+    recently used, are evicted. Unflushed writes are lost if the process dies.
+    """
+
+    def __init__(self, path: str = "checkpoints.sqlite", batch_size: int = 256, flush_interval: float = 1.0,
+                 keep_last: int = 2, ttl: Optional[float] = 7 * 24 * 3600, max_threads: Optional[int] = None,
+                 evict_interval: float = 60.0, **kwargs: Any):
+        super().__init__(**kwargs)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.keep_last = keep_last
+        self.ttl = ttl
+        self.max_threads = max_threads
+        self.evict_interval = evict_interval
+
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.RLock()
+        self._pending_checkpoints: Dict[CheckpointKey, tuple] = {}
+        self._pending_writes: Dict[tuple, tuple] = {}
+        self._pending_threads: Dict[str, float] = {}
+        self._last_flush = time.monotonic()
+        self._last_evict = time.monotonic()
+
+    # --- buffering -------------------------------------------------------
+
+    def _pending_rows(self) -> int:
+        return len(self._pending_checkpoints) + len(self._pending_writes)
+
+    def _maybe_flush(self):
+        if self._pending_rows() >= self.batch_size or time.monotonic() - self._last_flush > self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        """Commit every buffered write in one transaction."""
+        with self._lock:
+            if self._pending_rows() or self._pending_threads:
+                touched = {key[:2] for key in self._pending_checkpoints}
+                self._conn.execute("BEGIN")
+                self._conn.executemany("INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                                       self._pending_checkpoints.values())
+                self._conn.executemany("INSERT OR REPLACE INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                                       self._pending_writes.values())
+                self._conn.executemany("INSERT OR REPLACE INTO threads VALUES (?, ?)",
+                                       self._pending_threads.items())
+                for thread_id, checkpoint_ns in touched:
+                    self._prune(thread_id, checkpoint_ns)
+                self._conn.execute("COMMIT")
+                self._pending_checkpoints.clear()
+                self._pending_writes.clear()
+                self._pending_threads.clear()
+            self._last_flush = time.monotonic()
+            if time.monotonic() - self._last_evict > self.evict_interval:
+                self.evict()
+
+    def _prune(self, thread_id: str, checkpoint_ns: str):
+        self._conn.execute(
+            "DELETE FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id NOT IN "
+            "(SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? "
+            "ORDER BY checkpoint_id DESC LIMIT ?)",
+            (thread_id, checkpoint_ns, thread_id, checkpoint_ns, self.keep_last))
+        self._conn.execute(
+            "DELETE FROM writes WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id NOT IN "
+            "(SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?)",
+            (thread_id, checkpoint_ns, thread_id, checkpoint_ns))
+
+    def evict(self) -> int:
+        """Delete idle threads (TTL) and the least recently used ones above `max_threads`."""
+        with self._lock:
+            self._last_evict = time.monotonic()
+            doomed = []
+            if self.ttl is not None:
+                cutoff = time.time() - self.ttl
+                doomed += [row[0] for row in self._conn.execute(
+                    "SELECT thread_id FROM threads WHERE last_used < ?", (cutoff,))]
+            if self.max_threads is not None:
+                doomed += [row[0] for row in self._conn.execute(
+                    "SELECT thread_id FROM threads ORDER BY last_used DESC LIMIT -1 OFFSET ?", (self.max_threads,))]
+            doomed = [thread_id for thread_id in set(doomed) if thread_id not in self._pending_threads]
+            for thread_id in doomed:
+                self.delete_thread(thread_id)
+            return len(doomed)
+
+    def close(self):
+        self.flush()
+        self._conn.close()
+
+    # --- reads -----------------------------------------------------------
+
+    def _checkpoint_row(self, thread_id: str, checkpoint_ns: str, checkpoint_id: Optional[str]) -> Optional[tuple]:
+        if checkpoint_id:
+            row = self._pending_checkpoints.get((thread_id, checkpoint_ns, checkpoint_id))
+            return row or self._conn.execute(
+                "SELECT * FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+                (thread_id, checkpoint_ns, checkpoint_id)).fetchone()
+        pending = [row for key, row in self._pending_checkpoints.items() if key[:2] == (thread_id, checkpoint_ns)]
+        stored = self._conn.execute(
+            "SELECT * FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? ORDER BY checkpoint_id DESC LIMIT 1",
+            (thread_id, checkpoint_ns)).fetchone()
+        candidates = pending + ([stored] if stored else [])
+        return max(candidates, key=lambda row: row[2]) if candidates else None
+
+    def _writes_for(self, thread_id: str, checkpoint_ns: str, checkpoint_id: str) -> list:
+        rows = {row[3:5]: row for row in self._conn.execute(
+            "SELECT * FROM writes WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+            (thread_id, checkpoint_ns, checkpoint_id))}
+        rows.update({key[3:5]: row for key, row in self._pending_writes.items()
+                     if key[:3] == (thread_id, checkpoint_ns, checkpoint_id)})
+        return [rows[key] for key in sorted(rows)]
+
+    def _to_tuple(self, row: tuple) -> CheckpointTuple:
+        thread_id, checkpoint_ns, checkpoint_id, parent_id, type_, checkpoint, metadata_type, metadata = row
+        writes = self._writes_for(thread_id, checkpoint_ns, checkpoint_id)
+        return CheckpointTuple(
+            config={"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns,
+                                     "checkpoint_id": checkpoint_id}},
+            checkpoint=self.serde.loads_typed((type_, checkpoint)),
+            metadata=self.serde.loads_typed((metadata_type, metadata)),
+            pending_writes=[(w[3], w[5], self.serde.loads_typed((w[6], w[7]))) for w in writes],
+            parent_config=({"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns,
+                                             "checkpoint_id": parent_id}} if parent_id else None),
+        )
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        with self._lock:
+            row = self._checkpoint_row(thread_id, checkpoint_ns, get_checkpoint_id(config))
+            if row is None:
+                return None
+            self._pending_threads[thread_id] = time.time()
+            return self._to_tuple(row)
+
+    def list(self, config: Optional[RunnableConfig], *, filter: Optional[Dict[str, Any]] = None,
+             before: Optional[RunnableConfig] = None, limit: Optional[int] = None) -> Iterator[CheckpointTuple]:
+        query, params = "SELECT * FROM checkpoints WHERE 1 = 1", []
+        if config:
+            query += " AND thread_id = ?"
+            params.append(config["configurable"]["thread_id"])
+            if config["configurable"].get("checkpoint_ns") is not None:
+                query += " AND checkpoint_ns = ?"
+                params.append(config["configurable"]["checkpoint_ns"])
+            if checkpoint_id := get_checkpoint_id(config):
+                query += " AND checkpoint_id = ?"
+                params.append(checkpoint_id)
+        if before and (before_id := get_checkpoint_id(before)):
+            query += " AND checkpoint_id < ?"
+            params.append(before_id)
+        query += " ORDER BY checkpoint_id DESC"
+        items = []
+        with self._lock:
+            self.flush()
+            for row in self._conn.execute(query, params).fetchall():
+                item = self._to_tuple(row)
+                if filter and not all(item.metadata.get(key) == value for key, value in filter.items()):
+                    continue
+                items.append(item)
+                if limit is not None and len(items) >= limit:
+                    break
+        yield from items
+
+    # --- writes ----------------------------------------------------------
+
+    def put(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata,
+            new_versions: ChannelVersions) -> RunnableConfig:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        type_, serialized = self.serde.dumps_typed(checkpoint)
+        metadata_type, serialized_metadata = self.serde.dumps_typed(get_checkpoint_metadata(config, metadata))
+        with self._lock:
+            self._pending_checkpoints[(thread_id, checkpoint_ns, checkpoint["id"])] = (
+                thread_id, checkpoint_ns, checkpoint["id"], config["configurable"].get("checkpoint_id"),
+                type_, serialized, metadata_type, serialized_metadata)
+            self._pending_threads[thread_id] = time.time()
+            self._maybe_flush()
+        return {"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns,
+                                 "checkpoint_id": checkpoint["id"]}}
+
+    def put_writes(self, config: RunnableConfig, writes: Sequence[Tuple[str, Any]], task_id: str,
+                   task_path: str = "") -> None:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        with self._lock:
+            for idx, (channel, value) in enumerate(writes):
+                idx = WRITES_IDX_MAP.get(channel, idx)
+                key = (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+                type_, serialized = self.serde.dumps_typed(value)
+                self._pending_writes[key] = key + (channel, type_, serialized, task_path)
+            self._maybe_flush()
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self._lock:
+            for pending in (self._pending_checkpoints, self._pending_writes):
+                for key in [key for key in pending if key[0] == thread_id]:
+                    del pending[key]
+            self._pending_threads.pop(thread_id, None)
+            for table in ("checkpoints", "writes", "threads"):
+                self._conn.execute(f"DELETE FROM {table} WHERE thread_id = ?", (thread_id,))
+
+    # --- async (SQLite calls are short, run them off the event loop) -----
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(self, config: Optional[RunnableConfig], *, filter: Optional[Dict[str, Any]] = None,
+                    before: Optional[RunnableConfig] = None, limit: Optional[int] = None
+                    ) -> AsyncIterator[CheckpointTuple]:
+        items = await asyncio.to_thread(lambda: list(self.list(config, filter=filter, before=before, limit=limit)))
+        for item in items:
+            yield item
+
+    async def aput(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata,
+                   new_versions: ChannelVersions) -> RunnableConfig:
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config: RunnableConfig, writes: Sequence[Tuple[str, Any]], task_id: str,
+                          task_path: str = "") -> None:
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
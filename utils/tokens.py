@@ -0,0 +1,6 @@
+import math
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token), good enough for budgets and reports."""
+    return math.ceil(len(text) / 4) if text else 0
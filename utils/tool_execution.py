@@ -0,0 +1,143 @@
+import asyncio
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from utils.response_cache import ResponseCache, normalise_prompt
+
+
+@dataclass
+class ToolStats:
+    calls: int = 0
+    cache_hits: int = 0
+    coalesced: int = 0
+    errors: int = 0
+    timeouts: int = 0
+    latencies: List[float] = field(default_factory=list)
+
+    @property
+    def hit_rate(self) -> float:
+        """Share of calls answered without running the tool (cache hits plus coalesced waits)."""
+        return (self.cache_hits + self.coalesced) / self.calls if self.calls else 0.0
+
+    def percentile_ms(self, q: float) -> float:
+        return float(np.percentile(self.latencies, q)) * 1000 if self.latencies else 0.0
+
+
+class ToolRunner:
+    """
+    Execution layer for agent tools.
+
+    `wrap(name, func, cache=True)` answers repeated inputs from a TTL cache (the same
+    `ResponseCache` used for LLM calls, one group per tool). Concurrent identical
+    calls are coalesced: one runs the tool and the others wait for its result.
+    Errors are counted and never cached. For uncached tools (the Python pool) a
+    `TimeoutError` comes back as a message the agent can read. `run_many` runs independent calls at
+    once, and `as_tool` gives a LangChain `Tool` with an async path, so an async
+    `AgentExecutor` can gather several tool calls from one step. Per-tool latency,
+    hit rate and failures are in `stats` / `report()`.
+    """
+
+    def __init__(self, cache: Optional[ResponseCache] = None, cache_ttl: float = 600, max_workers: int = 8):
+        self.cache = cache or ResponseCache(max_entries=2048, ttl=cache_ttl)
+        self.stats: Dict[str, ToolStats] = defaultdict(ToolStats)
+        self._inflight: Dict[Tuple[str, str], Future] = {}
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tool")
+
+    def _finish(self, name: str, start: float, **counters: int):
+        with self._lock:
+            stats = self.stats[name]
+            stats.calls += 1
+            stats.latencies.append(time.perf_counter() - start)
+            for counter, amount in counters.items():
+                setattr(stats, counter, getattr(stats, counter) + amount)
+
+    def _run(self, name: str, func: Callable[[str], str], tool_input: str, start: float) -> str:
+        try:
+            result = func(tool_input)
+        except TimeoutError as e:
+            self._finish(name, start, timeouts=1)
+            return f"TimeoutError: {e}"
+        except Exception:
+            self._finish(name, start, errors=1)
+            raise
+        self._finish(name, start)
+        return result
+
+    def _run_cached(self, name: str, func: Callable[[str], str], tool_input: str, start: float) -> str:
+        model = f"tool:{name}"
+        cached = self.cache.get(model, tool_input)
+        if cached is not None:
+            self._finish(name, start, cache_hits=1)
+            return cached
+
+        key = (name, normalise_prompt(tool_input))
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+        if not leader:
+            try:
+                result = future.result()
+            except Exception:
+                self._finish(name, start, coalesced=1, errors=1)
+                raise
+            self._finish(name, start, coalesced=1)
+            return result
+
+        try:
+            result = func(tool_input)
+            self.cache.put(model, tool_input, result)
+            future.set_result(result)
+        except Exception as e:
+            future.set_exception(e)
+            self._finish(name, start, errors=1)
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+        self._finish(name, start)
+        return result
+
+    def wrap(self, name: str, func: Callable[[str], str], cache: bool = False) -> Callable[[str], str]:
+        run = self._run_cached if cache else self._run
+
+        def call(tool_input: str) -> str:
+            return run(name, func, tool_input, time.perf_counter())
+
+        call.__name__ = name
+        return call
+
+    def run_many(self, calls: Sequence[Tuple[Callable[[str], str], str]]) -> List[str]:
+        """Run independent (wrapped tool, input) calls concurrently; results in call order."""
+        futures = [self._pool.submit(func, tool_input) for func, tool_input in calls]
+        return [future.result() for future in futures]
+
+    def as_tool(self, name: str, func: Callable[[str], str], description: str, cache: bool = False):
+        from langchain_core.tools import Tool
+
+        wrapped = self.wrap(name, func, cache)
+
+        async def acall(tool_input: str) -> str:
+            return await asyncio.get_running_loop().run_in_executor(self._pool, wrapped, tool_input)
+
+        return Tool(name=name, func=wrapped, coroutine=acall, description=description)
+
+    def report(self) -> Dict[str, dict]:
+        with self._lock:
+            return {
+                name: {"calls": stats.calls, "cache_hits": stats.cache_hits, "coalesced": stats.coalesced,
+                       "hit_rate": round(stats.hit_rate, 3), "errors": stats.errors, "timeouts": stats.timeouts,
+                       "p50_ms": round(stats.percentile_ms(50), 1), "p95_ms": round(stats.percentile_ms(95), 1)}
+                for name, stats in self.stats.items()
+            }
+
+    def close(self):
+        self._pool.shutdown(wait=False)
@@ -0,0 +1,364 @@
+import atexit
+import bisect
+import functools
+import json
+import os
+import random
+import threading
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.embeddings import Embeddings
+
+# Upper bounds (seconds) of the latency histogram buckets
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_current: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+
+class _NoopSpan:
+    """What `span()` returns while tracing is off: every call is a no-op."""
+
+    def set(self, key: str, value: Any):
+        pass
+
+    def add(self, key: str, amount: float = 1):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class Span:
+    """
+    One timed stage. `set` adds a descriptive attribute (model, k); `add` bumps a
+    count (items, prompt_tokens, cache_hits) that is also summed into the metrics.
+    """
+
+    __slots__ = ("tracer", "name", "trace_id", "span_id", "parent_id", "attributes", "counts",
+                 "start", "start_ns", "error", "_token")
+
+    def __init__(self, tracer: "Tracer", name: str, parent: Optional["Span"], attributes: Dict[str, Any]):
+        self.tracer = tracer
+        self.name = name
+        self.trace_id = parent.trace_id if parent is not None else f"{random.getrandbits(128):032x}"
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent.span_id if parent is not None else None
+        self.attributes = attributes
+        self.counts: Dict[str, float] = {}
+        self.error: Optional[str] = None
+        self.start_ns = time.time_ns()
+        self.start = time.perf_counter()
+        self._token = None
+
+    def set(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def add(self, key: str, amount: float = 1):
+        self.counts[key] = self.counts.get(key, 0) + amount
+
+    def end(self, error: Optional[BaseException] = None):
+        if error is not None:
+            self.error = f"{type(error).__name__}: {error}"
+        self.tracer._finish(self, time.perf_counter() - self.start)
+
+    def __enter__(self):
+        self._token = _current.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _current.reset(self._token)
+        self.end(exc)
+        return False
+
+    def to_otel(self, seconds: float) -> dict:
+        """The span in OpenTelemetry's JSON field names (one OTLP span, flattened attributes)."""
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_span_id": self.parent_id,
+            "kind": "INTERNAL",
+            "start_time_unix_nano": self.start_ns,
+            "end_time_unix_nano": self.start_ns + int(seconds * 1e9),
+            "attributes": {**self.attributes, **self.counts},
+            "status": {"code": "ERROR", "message": self.error} if self.error else {"code": "OK"},
+            "resource": {"service.name": self.tracer.service},
+        }
+
+
+@dataclass
+class StageMetrics:
+    calls: int = 0
+    errors: int = 0
+    seconds: float = 0.0
+    buckets: List[int] = field(default_factory=lambda: [0] * len(BUCKETS))
+    counts: Dict[str, float] = field(default_factory=dict)
+
+    def observe(self, seconds: float, counts: Dict[str, float], error: bool):
+        self.calls += 1
+        self.errors += error
+        self.seconds += seconds
+        bucket = bisect.bisect_left(BUCKETS, seconds)
+        if bucket < len(BUCKETS):
+            self.buckets[bucket] += 1
+        for key, amount in counts.items():
+            self.counts[key] = self.counts.get(key, 0) + amount
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Tracer:
+    """
+    Per-stage timing for the load -> split -> embed -> store -> retrieve -> generate pipelines.
+
+    Stages are recorded as spans (`with tracer.span("split") as span: span.add("items", n)`),
+    by wrapping a callable or method (`wrap`, `instrument`, `embeddings`), or from
+    LangChain/LangGraph callbacks (`callbacks()`). Every finished span updates per-stage
+    metrics: call count, errors, a latency histogram and summed counts (items,
+    tokens, cache hits). Spans are appended to `spans_path` as OpenTelemetry-style
+    JSON lines; the metrics are written to `metrics_path` in the Prometheus text
+    format on `flush()` and at exit.
+
+    Disabled (no path given, or `enabled=False`) everything short-circuits: `span()`
+    returns a shared no-op, and `wrap`/`instrument`/`embeddings` hand back the
+    original object untouched, so instrumented code runs exactly as before.
+    """
+
+    def __init__(self, spans_path: Optional[str] = None, metrics_path: Optional[str] = None,
+                 enabled: Optional[bool] = None, service: str = "rag", flush_every: int = 256):
+        self.spans_path = spans_path
+        self.metrics_path = metrics_path
+        self.enabled = bool(spans_path or metrics_path) if enabled is None else enabled
+        self.service = service
+        self.flush_every = flush_every
+        self.stages: Dict[str, StageMetrics] = {}
+        self._pending: List[dict] = []
+        self._lock = threading.Lock()
+        if self.enabled:
+            atexit.register(self.flush)
+
+    @classmethod
+    def from_env(cls) -> "Tracer":
+        """Enabled by RAG_TRACE_SPANS (JSON lines file) and/or RAG_TRACE_METRICS (Prometheus text file)."""
+        return cls(os.getenv("RAG_TRACE_SPANS") or None, os.getenv("RAG_TRACE_METRICS") or None)
+
+    def span(self, name: str, parent: Optional[Span] = None, **attributes: Any):
+        if not self.enabled:
+            return NOOP_SPAN
+        return Span(self, name, parent if parent is not None else _current.get(), attributes)
+
+    def _finish(self, span: Span, seconds: float):
+        flush = False
+        with self._lock:
+            self.stages.setdefault(span.name, StageMetrics()).observe(seconds, span.counts, span.error is not None)
+            if self.spans_path:
+                self._pending.append(span.to_otel(seconds))
+                flush = len(self._pending) >= self.flush_every
+        if flush:
+            self._write_spans()
+
+    def wrap(self, func: Callable, stage: str, items: Optional[Callable[..., int]] = None,
+             hits: Optional[Callable[[], int]] = None, **attributes: Any) -> Callable:
+        """
+        `func` timed as `stage`. `items(result, *args, **kwargs)` counts what was
+        processed; `hits()` reads a cache hit counter, and its change during the call
+        is recorded as cache_hits (a shared counter, so concurrent calls blur it).
+        """
+        if not self.enabled:
+            return func
+
+        @functools.wraps(func)
+        def traced(*args, **kwargs):
+            with self.span(stage, **attributes) as span:
+                before = hits() if hits is not None else 0
+                result = func(*args, **kwargs)
+                if items is not None:
+                    span.add("items", items(result, *args, **kwargs))
+                if hits is not None:
+                    span.add("cache_hits", hits() - before)
+                return result
+
+        return traced
+
+    def instrument(self, obj, method: str, stage: str, items: Optional[Callable[..., int]] = None,
+                   hits: Optional[Callable[[], int]] = None, **attributes: Any):
+        """Replace `obj.method` with its traced version, e.g. a store's `add_documents`. Returns `obj`."""
+        if self.enabled:
+            setattr(obj, method, self.wrap(getattr(obj, method), stage, items, hits, **attributes))
+        return obj
+
+    def embeddings(self, embeddings: Embeddings, stage: str = "embed") -> Embeddings:
+        """`embeddings` with every call traced; cache hits come from a `CachedEmbeddings` cache."""
+        if not self.enabled:
+            return embeddings
+        return TracedEmbeddings(embeddings, self, stage)
+
+    def callbacks(self) -> list:
+        """Callback handlers for `config={"callbacks": ...}`; empty while tracing is off."""
+        return [TracingCallbackHandler(self)] if self.enabled else []
+
+    def _write_spans(self):
+        with self._lock:
+            pending, self._pending = self._pending, []
+        if pending and self.spans_path:
+            with open(self.spans_path, "a", encoding="utf-8") as f:
+                f.writelines(json.dumps(span, default=str) + "\n" for span in pending)
+
+    def prometheus_text(self) -> str:
+        lines = []
+        with self._lock:
+            stages = sorted(self.stages.items())
+            counters = sorted({key for _, metrics in stages for key in metrics.counts})
+            lines += [f"# HELP {self.service}_stage_seconds Wall time per pipeline stage.",
+                      f"# TYPE {self.service}_stage_seconds histogram"]
+            for stage, metrics in stages:
+                label = f'stage="{_label(stage)}"'
+                cumulative = 0
+                for bound, count in zip(BUCKETS, metrics.buckets):
+                    cumulative += count
+                    lines.append(f'{self.service}_stage_seconds_bucket{{{label},le="{bound:g}"}} {cumulative}')
+                lines.append(f'{self.service}_stage_seconds_bucket{{{label},le="+Inf"}} {metrics.calls}')
+                lines.append(f"{self.service}_stage_seconds_sum{{{label}}} {metrics.seconds:.6f}")
+                lines.append(f"{self.service}_stage_seconds_count{{{label}}} {metrics.calls}")
+            lines += [f"# TYPE {self.service}_stage_errors_total counter"]
+            lines += [f'{self.service}_stage_errors_total{{stage="{_label(stage)}"}} {metrics.errors}'
+                      for stage, metrics in stages]
+            for key in counters:
+                lines.append(f"# TYPE {self.service}_stage_{key}_total counter")
+                lines += [f'{self.service}_stage_{key}_total{{stage="{_label(stage)}"}} {metrics.counts[key]:g}'
+                          for stage, metrics in stages if key in metrics.counts]
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> Dict[str, dict]:
+        with self._lock:
+            return {stage: {"calls": m.calls, "errors": m.errors, "seconds": round(m.seconds, 4), **m.counts}
+                    for stage, m in self.stages.items()}
+
+    def flush(self):
+        if not self.enabled:
+            return
+        self._write_spans()
+        if self.metrics_path:
+            with open(self.metrics_path + ".tmp", "w", encoding="utf-8") as f:
+                f.write(self.prometheus_text())
+            os.replace(self.metrics_path + ".tmp", self.metrics_path)
+
+
+class TracedEmbeddings(Embeddings):
+    def __init__(self, embeddings: Embeddings, tracer: Tracer, stage: str = "embed"):
+        self.embeddings = embeddings
+        self.tracer = tracer
+        self.stage = stage
+        cache = getattr(embeddings, "cache", None)
+        self._hits = (lambda: cache.hits) if hasattr(cache, "hits") else None
+
+    def __getattr__(self, name: str) -> Any:
+        # model, cache, ... of the wrapped embedder
+        if name == "embeddings":
+            raise AttributeError(name)
+        return getattr(self.embeddings, name)
+
+    def _traced(self, func: Callable, texts: List[str], kind: str):
+        with self.tracer.span(self.stage, kind=kind) as span:
+            before = self._hits() if self._hits else 0
+            result = func()
+            span.add("items", len(texts))
+            if self._hits:
+                span.add("cache_hits", self._hits() - before)
+            return result
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._traced(lambda: self.embeddings.embed_documents(texts), texts, "documents")
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._traced(lambda: self.embeddings.embed_query(text), [text], "query")
+
+
+def _token_usage(response) -> Dict[str, int]:
+    """Prompt/completion tokens from an LLMResult: provider `token_usage` or per-message `usage_metadata`."""
+    usage = (response.llm_output or {}).get("token_usage") or {}
+    if usage:
+        return {"prompt_tokens": usage.get("prompt_tokens", 0), "completion_tokens": usage.get("completion_tokens", 0)}
+    totals = {"prompt_tokens": 0, "completion_tokens": 0}
+    for generations in response.generations:
+        for generation in generations:
+            metadata = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+            totals["prompt_tokens"] += metadata.get("input_tokens", 0)
+            totals["completion_tokens"] += metadata.get("output_tokens", 0)
+    return totals
+
+
+class TracingCallbackHandler(BaseCallbackHandler):
+    """
+    Spans for LangChain model, retriever and tool runs: `generate` (with token usage),
+    `retrieve` (documents returned) and `tool:<name>`. Runs nest under their parent
+    run's span, or under whatever span is open around the chain/graph call.
+    """
+
+    def __init__(self, tracer: Tracer):
+        self.tracer = tracer
+        self._spans: Dict[UUID, Span] = {}
+
+    def _start(self, name: str, run_id: UUID, parent_run_id: Optional[UUID], **attributes: Any):
+        parent = self._spans.get(parent_run_id) if parent_run_id else None
+        self._spans[run_id] = self.tracer.span(name, parent=parent, **attributes)
+
+    def _end(self, run_id: UUID, error: Optional[BaseException] = None, **counts: float) -> None:
+        span = self._spans.pop(run_id, None)
+        if span is None:
+            return
+        for key, amount in counts.items():
+            span.add(key, amount)
+        span.end(error)
+
+    @staticmethod
+    def _model(serialized: Optional[dict], kwargs: dict) -> str:
+        params = kwargs.get("invocation_params") or {}
+        return str(params.get("model") or params.get("model_name") or (serialized or {}).get("name") or "")
+
+    def on_llm_start(self, serialized, prompts, *, run_id, parent_run_id=None, **kwargs):
+        self._start("generate", run_id, parent_run_id, model=self._model(serialized, kwargs))
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, parent_run_id=None, **kwargs):
+        self._start("generate", run_id, parent_run_id, model=self._model(serialized, kwargs))
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        self._end(run_id, items=1, **_token_usage(response))
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error)
+
+    def on_retriever_start(self, serialized, query, *, run_id, parent_run_id=None, **kwargs):
+        self._start("retrieve", run_id, parent_run_id)
+
+    def on_retriever_end(self, documents, *, run_id, **kwargs):
+        self._end(run_id, items=len(documents))
+
+    def on_retriever_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error)
+
+    def on_tool_start(self, serialized, input_str, *, run_id, parent_run_id=None, **kwargs):
+        self._start(f"tool:{(serialized or {}).get('name', 'tool')}", run_id, parent_run_id)
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        self._end(run_id, items=1)
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error)
+
+
+# Process-wide tracer, configured from the environment; off unless RAG_TRACE_SPANS/RAG_TRACE_METRICS is set
+tracer = Tracer.from_env()
@@ -0,0 +1,67 @@
+import hashlib
+import json
+import os
+from typing import Any, Optional
+
+from langchain_core.embeddings import Embeddings
+
+from utils.ann_index import IVFVectorStore
+from utils.numpy_vector_store import NumpyVectorStore
+from utils.quantized_store import QuantizedVectorStore
+
+VECTOR_STORES = {
+    "exact": NumpyVectorStore,
+    "ivf": IVFVectorStore,
+    "quantized": QuantizedVectorStore,
+}
+
+
+def build_vector_store(embeddings: Embeddings, index: Optional[str] = None, **params: Any):
+    """
+    Vector store for the given index type ("exact", "ivf" or "quantized"), defaulting to $VECTOR_INDEX.
+
+    Extra params go to the store, e.g. `build_vector_store(emb, "ivf", n_probe=16)` or
+    `build_vector_store(emb, "quantized", dtype="float16")`.
+    Search-time knobs can also be set per retriever:
+    `store.as_retriever(search_kwargs={"k": 4, "n_probe": 32})`.
+    """
+    return _store_class(index)(embeddings, **params)
+
+
+def _store_class(index: Optional[str]):
+    index = index or os.getenv("VECTOR_INDEX", "exact")
+    if index not in VECTOR_STORES:
+        raise ValueError(f"Unknown vector index {index!r}, expected one of {sorted(VECTOR_STORES)}")
+    return VECTOR_STORES[index]
+
+
+def fingerprint(*parts: Any) -> str:
+    """Hash of whatever a saved store was built from (source files or texts, model, splitter settings)."""
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def load_vector_store(directory: str, source: str, embeddings: Embeddings, index: Optional[str] = None,
+                      **params: Any):
+    """
+    The store saved in `directory` by `save_vector_store` for the same `source`
+    fingerprint, or None when there is none (or it was built from other data).
+    Vectors, and the IVF lists or quantized codes, are memory-mapped rather than rebuilt.
+    """
+    try:
+        with open(os.path.join(directory, "source.json"), encoding="utf-8") as f:
+            if json.load(f)["source"] != source:
+                return None
+    except (OSError, ValueError, KeyError):
+        return None
+    return _store_class(index).load(directory, embeddings, **params)
+
+
+def save_vector_store(store, directory: str, source: str):
+    """Save `store` with the fingerprint of what it was built from, for `load_vector_store`."""
+    source_path = os.path.join(directory, "source.json")
+    # Removed first, so a save that fails halfway is rebuilt next time rather than trusted
+    if os.path.exists(source_path):
+        os.remove(source_path)
+    store.save(directory)
+    with open(source_path, "w", encoding="utf-8") as f:
+        json.dump({"source": source, "store": type(store).__name__}, f)
@@ -0,0 +1,401 @@
+import hashlib
+import http.client
+import json
+import os
+import re
+import threading
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from html.parser import HTMLParser
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from urllib.parse import urljoin, urlsplit
+from xml.etree import ElementTree
+
+from langchain_core.documents import Document
+
+USER_AGENT = "rag-web-ingestion/1.0"
+REDIRECTS = (301, 302, 303, 307, 308)
+# The sitemap protocol's own limit for one (uncompressed) sitemap file
+MAX_SITEMAP_BYTES = 50 * 2 ** 20
+MAX_PAGE_BYTES = 10 * 2 ** 20
+_DTD = re.compile(rb"<!(DOCTYPE|ENTITY)", re.IGNORECASE)
+
+
+def sitemap_locs(body: bytes) -> List[str]:
+    """
+    The <loc> URLs of a sitemap or sitemap index. Sitemaps come from other sites, so
+    oversized bodies and any DTD (entity expansion, external entities) are refused
+    before the XML parser sees them; sitemaps never need one.
+    """
+    if len(body) > MAX_SITEMAP_BYTES:
+        raise ValueError(f"sitemap larger than {MAX_SITEMAP_BYTES} bytes")
+    if _DTD.search(body):
+        raise ValueError("sitemap declares a DTD")
+    return [element.text.strip() for element in ElementTree.fromstring(body).iter()
+            if element.tag.rsplit("}", 1)[-1] == "loc" and element.text and element.text.strip()]
+
+
+def gunzip(body: bytes, limit: int) -> bytes:
+    """Decompress a gzip body in chunks, refusing to inflate it past `limit` bytes."""
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    parts, size, data = [], 0, body
+    while True:
+        part = decompressor.decompress(data, 2 ** 16)
+        size += len(part)
+        if size > limit:
+            raise ValueError(f"gzip body inflates past {limit} bytes")
+        parts.append(part)
+        data = decompressor.unconsumed_tail
+        if not data and len(part) < 2 ** 16:
+            break
+    if not decompressor.eof:
+        raise ValueError("truncated gzip body")
+    return b"".join(parts)
+
+
+class _TextExtractor(HTMLParser):
+    """Title, and the text inside elements with one of `classes` (all text if none), like SoupStrainer + get_text."""
+
+    SKIP = {"script", "style", "noscript", "template"}
+    VOID = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"}
+
+    def __init__(self, classes: Sequence[str]):
+        super().__init__(convert_charrefs=True)
+        self.classes = set(classes)
+        self.title = ""
+        self.parts: List[str] = []
+        self._open: List[Tuple[str, bool, bool]] = []
+        self._keep = self._skip = 0
+        self._in_title = False
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "title":
+            self._in_title = True
+        if tag in self.VOID:
+            return
+        keep = bool(self.classes & set((dict(attrs).get("class") or "").split()))
+        self._open.append((tag, keep, tag in self.SKIP))
+        self._keep += keep
+        self._skip += tag in self.SKIP
+
+    def handle_endtag(self, tag):
+        if tag == "title":
+            self._in_title = False
+        # Close up to the matching start tag: real pages leave elements unclosed
+        for i in range(len(self._open) - 1, -1, -1):
+            if self._open[i][0] == tag:
+                for _, keep, skip in self._open[i:]:
+                    self._keep -= keep
+                    self._skip -= skip
+                del self._open[i:]
+                break
+
+    def handle_data(self, data):
+        if self._in_title:
+            self.title += data
+        elif not self._skip and (self._keep or not self.classes):
+            self.parts.append(data)
+
+
+def parse_html(body: bytes, charset: str, classes: Sequence[str]) -> Tuple[str, str]:
+    """(title, text) of a page; runs in a worker process."""
+    parser = _TextExtractor(classes)
+    parser.feed(body.decode(charset, errors="replace"))
+    parser.close()
+    text = re.sub(r"\n\s*\n+", "\n\n", "".join(parser.parts)).strip()
+    return parser.title.strip(), text
+
+
+def _charset(content_type: str) -> str:
+    match = re.search(r"charset=([\w.-]+)", content_type or "", re.IGNORECASE)
+    return match.group(1) if match else "utf-8"
+
+
+@dataclass
+class WebStats:
+    requests: int = 0
+    downloaded: int = 0
+    not_modified: int = 0
+    # Downloaded again but byte-identical to the cached copy (the server sent no validators)
+    unchanged: int = 0
+    parsed: int = 0
+    errors: int = 0
+    bytes_downloaded: int = 0
+    seconds: float = 0.0
+
+    @property
+    def pages(self) -> int:
+        return self.downloaded + self.not_modified
+
+    @property
+    def pages_per_sec(self) -> float:
+        return self.pages / self.seconds if self.seconds else 0.0
+
+    @property
+    def cache_hit_rate(self) -> float:
+        """Share of pages answered from the cache (304, or an identical body) instead of parsed again."""
+        return (self.not_modified + self.unchanged) / self.pages if self.pages else 0.0
+
+    def __str__(self) -> str:
+        return (f"{self.pages} pages in {self.seconds:.2f}s ({self.pages_per_sec:.1f} pages/sec), "
+                f"cache hit rate {self.cache_hit_rate:.0%} ({self.not_modified} not modified, "
+                f"{self.unchanged} unchanged), {self.parsed} parsed, {self.errors} errors, "
+                f"{self.bytes_downloaded / 1024:.0f} KiB downloaded")
+
+
+class HttpCache:
+    """
+    On-disk cache of fetched pages keyed by URL: `<sha256>.json` holds the validators
+    (ETag, Last-Modified), a hash of the body and the parsed page; `<sha256>.body` the body.
+    """
+
+    def __init__(self, directory: str):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+
+    def _path(self, url: str, suffix: str) -> str:
+        return os.path.join(self.directory, hashlib.sha256(url.encode("utf-8")).hexdigest() + suffix)
+
+    def get(self, url: str) -> Optional[dict]:
+        try:
+            with open(self._path(url, ".json"), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def body(self, url: str) -> bytes:
+        with open(self._path(url, ".body"), "rb") as f:
+            return f.read()
+
+    def _write(self, path: str, data: bytes):
+        # Written to a temporary file and renamed, so readers never see half an entry
+        with open(path + ".tmp", "wb") as f:
+            f.write(data)
+        os.replace(path + ".tmp", path)
+
+    def put(self, url: str, entry: dict, body: Optional[bytes] = None):
+        if body is not None:
+            self._write(self._path(url, ".body"), body)
+        self._write(self._path(url, ".json"), json.dumps(entry).encode("utf-8"))
+
+
+class _HostConnections:
+    """At most `size` keep-alive connections to one host; callers beyond that wait for a free one."""
+
+    def __init__(self, scheme: str, netloc: str, size: int, timeout: float):
+        self.scheme, self.netloc, self.timeout = scheme, netloc, timeout
+        self._slots = threading.BoundedSemaphore(size)
+        self._idle: List[http.client.HTTPConnection] = []
+        self._lock = threading.Lock()
+
+    def _connect(self) -> http.client.HTTPConnection:
+        cls = http.client.HTTPSConnection if self.scheme == "https" else http.client.HTTPConnection
+        return cls(self.netloc, timeout=self.timeout)
+
+    def request(self, path: str, headers: Dict[str, str]) -> Tuple[int, Dict[str, str], bytes]:
+        with self._slots:
+            with self._lock:
+                conn, reused = (self._idle.pop(), True) if self._idle else (self._connect(), False)
+            try:
+                conn.request("GET", path, headers=headers)
+                response = conn.getresponse()
+                body = response.read()
+            except (http.client.HTTPException, OSError):
+                conn.close()
+                if not reused:
+                    raise
+                # The server closed an idle keep-alive connection: one retry on a fresh one
+                conn = self._connect()
+                conn.request("GET", path, headers=headers)
+                response = conn.getresponse()
+                body = response.read()
+            if response.will_close:
+                conn.close()
+            else:
+                with self._lock:
+                    self._idle.append(conn)
+            return response.status, {key.lower(): value for key, value in response.getheaders()}, body
+
+    def close(self):
+        with self._lock:
+            for conn in self._idle:
+                conn.close()
+            self._idle.clear()
+
+
+class WebIngestor:
+    """
+    Fetches web pages concurrently into LangChain documents, revalidating a local cache.
+
+    Up to `max_workers` pages are fetched at once, with at most `max_per_host`
+    keep-alive connections per host. Every page is cached on disk by URL
+    (`HttpCache`) and later requests are conditional (If-None-Match /
+    If-Modified-Since): a 304, or a body identical to the cached one, reuses the
+    cached text without downloading or parsing it again, so the documents are the
+    same and an embedding cache sees no new text. New bodies are parsed in a pool of
+    `parse_workers` processes (0 parses in the fetching threads) while other pages
+    are still downloading. Only text inside elements with one of `classes` is kept,
+    like the `SoupStrainer` this replaces. Gzipped pages may inflate to at most
+    `max_page_bytes` (sitemaps to `MAX_SITEMAP_BYTES`). `stats` covers the last
+    `load`; per-URL failures, pages or sitemaps, are in `errors` and leave that URL out.
+    """
+
+    def __init__(self, cache_dir: str = "web_cache", classes: Sequence[str] = (), max_workers: int = 16,
+                 max_per_host: int = 4, parse_workers: Optional[int] = None, timeout: float = 30.0,
+                 max_redirects: int = 5, max_page_bytes: int = MAX_PAGE_BYTES):
+        self.cache = HttpCache(cache_dir)
+        self.classes = tuple(classes)
+        self.max_workers = max_workers
+        self.max_per_host = max_per_host
+        self.parse_workers = min(os.cpu_count() or 1, 4) if parse_workers is None else parse_workers
+        self.timeout = timeout
+        self.max_redirects = max_redirects
+        self.max_page_bytes = max_page_bytes
+        self.stats = WebStats()
+        self.errors: Dict[str, str] = {}
+        self._hosts: Dict[Tuple[str, str], _HostConnections] = {}
+        self._lock = threading.Lock()
+        # Parsed text is only reused when it was parsed with the same element classes
+        self._parser_key = ",".join(sorted(self.classes))
+
+    def _host(self, scheme: str, netloc: str) -> _HostConnections:
+        with self._lock:
+            host = self._hosts.get((scheme, netloc))
+            if host is None:
+                host = self._hosts[scheme, netloc] = _HostConnections(scheme, netloc, self.max_per_host, self.timeout)
+            return host
+
+    def _get(self, url: str, headers: Dict[str, str], max_bytes: int) -> Tuple[int, Dict[str, str], bytes]:
+        for _ in range(self.max_redirects + 1):
+            parts = urlsplit(url)
+            if parts.scheme not in ("http", "https"):
+                raise ValueError(f"unsupported URL {url!r}")
+            path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+            status, response_headers, body = self._host(parts.scheme, parts.netloc).request(path, {
+                "User-Agent": USER_AGENT, "Accept-Encoding": "gzip", **headers})
+            with self._lock:
+                self.stats.requests += 1
+            if status in REDIRECTS and "location" in response_headers:
+                url = urljoin(url, response_headers["location"])
+                continue
+            if response_headers.get("content-encoding") == "gzip":
+                body = gunzip(body, max_bytes)
+            return status, response_headers, body
+        raise http.client.HTTPException(f"more than {self.max_redirects} redirects")
+
+    def fetch(self, url: str, max_bytes: Optional[int] = None) -> Tuple[dict, Optional[bytes]]:
+        """The cache entry for `url` after revalidating it, and the body when it still needs parsing."""
+        entry = self.cache.get(url)
+        headers = {}
+        if entry and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry and entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        status, response_headers, body = self._get(url, headers, max_bytes or self.max_page_bytes)
+
+        if status == 304 and entry:
+            with self._lock:
+                self.stats.not_modified += 1
+            if entry.get("parser") == self._parser_key:
+                return entry, None
+            return entry, self.cache.body(url)
+        if status != 200:
+            raise http.client.HTTPException(f"HTTP {status} for {url}")
+
+        sha256 = hashlib.sha256(body).hexdigest()
+        with self._lock:
+            self.stats.downloaded += 1
+            self.stats.bytes_downloaded += len(body)
+        previous = entry or {}
+        entry = {"url": url, "etag": response_headers.get("etag"),
+                 "last_modified": response_headers.get("last-modified"),
+                 "charset": _charset(response_headers.get("content-type")), "sha256": sha256}
+        if previous.get("sha256") == sha256 and previous.get("parser") == self._parser_key:
+            with self._lock:
+                self.stats.unchanged += 1
+            entry.update(parser=previous["parser"], title=previous["title"], text=previous["text"])
+            self.cache.put(url, entry)
+            return entry, None
+        self.cache.put(url, entry, body)
+        return entry, body
+
+    def _document(self, url: str, entry: dict) -> Document:
+        return Document(page_content=entry["text"], metadata={"source": url, "title": entry["title"]})
+
+    def load(self, urls: Iterable[str]) -> List[Document]:
+        """Documents for `urls` in the given order; pages that failed are left out (see `errors`)."""
+        urls = list(dict.fromkeys(urls))
+        self.stats = WebStats()
+        # Errors of earlier calls (e.g. sitemap_urls) stay; these pages get a fresh try
+        for url in urls:
+            self.errors.pop(url, None)
+        start = time.perf_counter()
+        documents: Dict[str, Document] = {}
+        parsers = ProcessPoolExecutor(max_workers=self.parse_workers) if self.parse_workers else None
+        if parsers is not None:
+            # Start the workers before the fetching threads exist, so they are not forked mid-request
+            parsers.submit(int).result()
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="fetch") as fetchers:
+                fetches = {fetchers.submit(self.fetch, url): url for url in urls}
+                parses = {}
+                for future in as_completed(fetches):
+                    url = fetches[future]
+                    try:
+                        entry, body = future.result()
+                    except Exception as e:
+                        self.errors[url] = f"{type(e).__name__}: {e}"
+                        continue
+                    if body is None:
+                        documents[url] = self._document(url, entry)
+                    elif parsers is not None:
+                        parses[parsers.submit(parse_html, body, entry["charset"], self.classes)] = (url, entry)
+                    else:
+                        parses[fetchers.submit(parse_html, body, entry["charset"], self.classes)] = (url, entry)
+
+                for future in as_completed(parses):
+                    url, entry = parses[future]
+                    try:
+                        entry["title"], entry["text"] = future.result()
+                    except Exception as e:
+                        self.errors[url] = f"{type(e).__name__}: {e}"
+                        continue
+                    entry["parser"] = self._parser_key
+                    self.cache.put(url, entry)
+                    self.stats.parsed += 1
+                    documents[url] = self._document(url, entry)
+        finally:
+            if parsers is not None:
+                parsers.shutdown()
+        self.stats.errors = sum(url in self.errors for url in urls)
+        self.stats.seconds = time.perf_counter() - start
+        return [documents[url] for url in urls if url in documents]
+
+    def sitemap_urls(self, url: str, _seen: Optional[set] = None) -> List[str]:
+        """
+        Page URLs listed by a sitemap, following sitemap indexes; fetched through the cache too.
+        A sitemap that cannot be fetched or parsed is recorded in `errors` and adds no URLs.
+        """
+        seen = set() if _seen is None else _seen
+        if url in seen:
+            return []  # an index listing itself, directly or through another index
+        seen.add(url)
+        try:
+            entry, body = self.fetch(url, MAX_SITEMAP_BYTES)
+            if body is None:
+                body = self.cache.body(url)
+            locs = sitemap_locs(body)
+        except Exception as e:
+            self.errors[url] = f"{type(e).__name__}: {e}"
+            return []
+        self.errors.pop(url, None)
+        urls = []
+        for loc in locs:
+            urls.extend(self.sitemap_urls(loc, seen) if loc.endswith(".xml") else [loc])
+        return urls
+
+    def close(self):
+        for host in self._hosts.values():
+            host.close()